@@ -0,0 +1,58 @@
+"""
+Prefix lookup of user accounts for autocomplete widgets.
+
+Each word typed must start the username, first name, last name or phone
+number. The lookups are range conditions on ``LOWER(column)`` (see the
+expression indexes on CustomUser), which both SQLite and PostgreSQL answer
+from the index, unlike ``LIKE``/``ILIKE``.
+"""
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .models import CustomUser
+
+PAGE_SIZE = 20
+# Sorts after every character in the Basic Multilingual Plane, under both
+# SQLite's BINARY and ICU collations, so [term, term + PREFIX_END) covers
+# the strings starting with term
+PREFIX_END = '\uffff'
+
+
+def _starts_with(alias, word):
+    return Q(**{f'{alias}__gte': word, f'{alias}__lt': word + PREFIX_END, f'{alias}__startswith': word})
+
+
+def matching_users(user_type, term):
+    """Active users of ``user_type`` matching every word of ``term``, by username"""
+    users = CustomUser.objects.filter(user_type=user_type, is_active=True).alias(
+        username_lower=Lower('username'),
+        first_name_lower=Lower('first_name'),
+        last_name_lower=Lower('last_name'),
+    )
+    for word in term.lower().split():
+        users = users.filter(
+            _starts_with('username_lower', word)
+            | _starts_with('first_name_lower', word)
+            | _starts_with('last_name_lower', word)
+            | _starts_with('phone_number', word)
+        )
+    return users.order_by('username')
+
+
+def label(user):
+    name = user.get_full_name()
+    text = f"{user.username} ({name})" if name else user.username
+    return f"{text} · {user.phone_number}" if user.phone_number else text
+
+
+def page(user_type, term, number=1):
+    """One page of matches in the response format Select2 (and the admin's autocomplete) expects"""
+    start = (max(number, 1) - 1) * PAGE_SIZE
+    users = list(
+        matching_users(user_type, term).only('username', 'first_name', 'last_name', 'phone_number')[start:start + PAGE_SIZE + 1]
+    )
+    return {
+        'results': [{'id': str(user.pk), 'text': label(user)} for user in users[:PAGE_SIZE]],
+        'pagination': {'more': len(users) > PAGE_SIZE},
+    }
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 01:59
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('username'), name='user_type_username_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('first_name'), name='user_type_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('last_name'), name='user_type_last_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['user_type', 'phone_number'], name='user_type_phone_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 
 class CustomUser(AbstractUser):
@@ -10,6 +12,15 @@ class CustomUser(AbstractUser):
     user_type = models.CharField(max_length=20, choices=USER_TYPES)
     phone_number = models.CharField(max_length=15, blank=True)
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Autocomplete lookups by prefix (see accounts.autocomplete)
+            models.Index(F('user_type'), Lower('username'), name='user_type_username_idx'),
+            models.Index(F('user_type'), Lower('first_name'), name='user_type_first_name_idx'),
+            models.Index(F('user_type'), Lower('last_name'), name='user_type_last_name_idx'),
+            models.Index(fields=['user_type', 'phone_number'], name='user_type_phone_idx'),
+        ]
+    
     def is_teacher(self):
         return self.user_type == 'teacher'
     
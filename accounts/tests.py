@@ -1,3 +1,137 @@
+import datetime
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from reports.models import AcademicYear, AssessmentResult, SchoolClass, Student, Subject
+from reports.stats import dashboard_stats
+
+from .models import CustomUser
+
+
+class TeacherDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = CustomUser.objects.create_user('teacher', password='pw', user_type='teacher')
+        cls.year = AcademicYear.objects.create(name='2025-2026', current=True)
+        cls.subjects = Subject.objects.bulk_create([
+            Subject(name=f'Subject {index}', code=f'S{index}') for index in range(4)
+        ])
+
+    def add_class(self, name, students, results_per_student=0):
+        school_class = SchoolClass.objects.create(name=name, teacher=self.teacher, academic_year=self.year)
+        created = Student.objects.bulk_create([
+            Student(
+                student_id=f'{name}-{index}',
+                first_name='Student',
+                last_name=str(index),
+                school_class=school_class,
+                date_of_birth=datetime.date(2015, 1, 1),
+            )
+            for index in range(students)
+        ])
+        AssessmentResult.objects.bulk_create([
+            AssessmentResult(
+                student=student,
+                subject=subject,
+                term=1,
+                academic_year=self.year,
+                performance_level='meeting',
+            )
+            for student in created
+            for subject in self.subjects[:results_per_student]
+        ])
+        return school_class
+
+    def test_dashboard_stats_counts(self):
+        self.add_class('A', students=3, results_per_student=2)
+        self.add_class('B', students=2)
+
+        with self.assertNumQueries(3):
+            stats = dashboard_stats(self.teacher)
+
+        self.assertEqual(stats['total_classes'], 2)
+        self.assertEqual(stats['total_students'], 5)
+        self.assertEqual(stats['total_results'], 6)
+        class_a = stats['classes'][0]
+        self.assertEqual((class_a.student_count, class_a.result_count), (3, 6))
+        # 6 of the 3 students x 4 subjects expected for term 1
+        self.assertEqual(class_a.term_completion[0]['percent'], 50)
+        self.assertEqual(stats['term_completion'][0]['count'], 6)
+
+    def test_results_from_other_years_are_not_counted(self):
+        school_class = self.add_class('A', students=1)
+        old_year = AcademicYear.objects.create(name='2024-2025')
+        AssessmentResult.objects.create(
+            student=school_class.student_set.get(),
+            subject=self.subjects[0],
+            term=1,
+            academic_year=old_year,
+            performance_level='below',
+        )
+        self.assertEqual(dashboard_stats(self.teacher)['total_results'], 0)
+
+    def dashboard_query_count(self):
+        self.client.force_login(self.teacher)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('teacher_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_dashboard_query_count_does_not_grow_with_data(self):
+        self.add_class('A', students=2, results_per_student=1)
+        small = self.dashboard_query_count()
+        for name in 'BCDEF':
+            self.add_class(name, students=20, results_per_student=4)
+        self.assertEqual(self.dashboard_query_count(), small)
+
+
+class UserAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = CustomUser.objects.create_user('teacher', password='pw', user_type='teacher')
+        cls.parent = CustomUser.objects.create_user('parent', password='pw', user_type='parent')
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'parent{index:02d}',
+                first_name='Grace' if index % 2 else 'Peter',
+                last_name=f'Otieno{index:02d}',
+                phone_number=f'0712{index:06d}',
+                user_type='parent',
+            )
+            for index in range(25)
+        ])
+        CustomUser.objects.create_user('gracefully', password='pw', user_type='teacher', first_name='Grace')
+
+    def lookup(self, user_type='parent', **params):
+        return self.client.get(reverse('user_autocomplete', args=[user_type]), params)
+
+    def texts(self, response):
+        return [result['text'].split()[0] for result in response.json()['results']]
+
+    def test_matches_prefixes_of_any_field_case_insensitively(self):
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.texts(self.lookup(q='OTIENO03')), ['parent03'])
+        self.assertEqual(self.texts(self.lookup(q='0712000004')), ['parent04'])
+        self.assertEqual(self.texts(self.lookup(q='grace otieno1')), ['parent11', 'parent13', 'parent15', 'parent17', 'parent19'])
+        self.assertEqual(self.texts(self.lookup(q='tieno')), [])
+
+    def test_pages(self):
+        self.client.force_login(self.teacher)
+        first = self.lookup(term='parent').json()
+        second = self.lookup(term='parent', page=2).json()
+        self.assertEqual(len(first['results']), 20)
+        self.assertTrue(first['pagination']['more'])
+        self.assertEqual(len(second['results']), 6)
+        self.assertFalse(second['pagination']['more'])
 
-# Create your tests here.
+    def test_permissions(self):
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.lookup('teacher', q='grace').status_code, 403)
+        self.client.force_login(self.parent)
+        self.assertEqual(self.lookup(q='grace').status_code, 403)
+        self.parent.is_staff = True
+        self.parent.save()
+        self.assertEqual(self.texts(self.lookup('teacher', q='grace')), ['gracefully'])
@@ -5,4 +5,5 @@ urlpatterns = [
     path('profile/', views.profile, name='profile'),
     path('teacher/dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
     path('parent/dashboard/', views.parent_dashboard, name='parent_dashboard'),
+    path('users/<str:user_type>/autocomplete/', views.user_autocomplete, name='user_autocomplete'),
 ]
\ No newline at end of file
@@ -2,14 +2,21 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
+from . import autocomplete
 from .forms import CustomUserCreationForm
-from reports.models import SchoolClass, Student, AssessmentResult
+from reports.models import Student, AssessmentResult
+from reports.stats import dashboard_stats
+from school_reporting.page_cache import cache_anonymous_page
+from school_reporting.replicas import replica_reads
 
+@cache_anonymous_page
 def home(request):
     if request.user.is_authenticated:
         return redirect('dashboard')
     return render(request, 'accounts/home.html')
 
+@cache_anonymous_page
 def register(request):
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
@@ -45,29 +52,12 @@ def teacher_dashboard(request):
         messages.error(request, 'Access denied. Teacher area only.')
         return redirect('dashboard')
     
-    # Get classes taught by this teacher with student counts
-    classes = SchoolClass.objects.filter(teacher=request.user).prefetch_related('student_set')
-    
-    # Get recent results entered by this teacher
-    recent_results = AssessmentResult.objects.filter(
-        student__school_class__teacher=request.user
-    ).select_related('student', 'subject')[:5]
-    
-    # Calculate stats
-    total_students = sum(cl.student_set.count() for cl in classes)
-    total_results = AssessmentResult.objects.filter(
-        student__school_class__teacher=request.user
-    ).count()
-    
-    context = {
-        'classes': classes,
-        'recent_results': recent_results,
-        'total_students': total_students,
-        'total_results': total_results,
-    }
+    # Class, student and result counts come from aggregate queries
+    context = dashboard_stats(request.user)
     return render(request, 'accounts/teacher_dashboard.html', context)
 
 @login_required
+@replica_reads
 def parent_dashboard(request):
     if not request.user.is_parent():
         messages.error(request, 'Access denied. Parent area only.')
@@ -89,4 +79,22 @@ def parent_dashboard(request):
 
 @login_required
 def profile(request):
-    return render(request, 'accounts/profile.html')
\ No newline at end of file
+    return render(request, 'accounts/profile.html')
+
+@login_required
+def user_autocomplete(request, user_type):
+    """A page of matching parent or teacher accounts for autocomplete widgets, as JSON.
+
+    Teachers may look up parents, to link them to students; staff may look
+    up either. Accepts ``term`` (as sent by the admin's Select2) or ``q``,
+    and ``page``.
+    """
+    allowed = request.user.is_staff or (request.user.is_teacher() and user_type == 'parent')
+    if user_type not in ('parent', 'teacher') or not allowed:
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    term = request.GET.get('term', request.GET.get('q', ''))
+    try:
+        number = int(request.GET.get('page', 1))
+    except ValueError:
+        number = 1
+    return JsonResponse(autocomplete.page(user_type, term, number))
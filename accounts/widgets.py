@@ -0,0 +1,17 @@
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.urls import reverse
+
+
+class UserAutocompleteSelect(AutocompleteSelect):
+    """The admin's Select2 autocomplete, fetching from the user_autocomplete endpoint.
+
+    Only the selected user is rendered as an option, so the form doesn't
+    load every account of the type.
+    """
+
+    def __init__(self, field, admin_site, user_type, attrs=None):
+        super().__init__(field, admin_site, attrs)
+        self.user_type = user_type
+
+    def get_url(self):
+        return reverse('user_autocomplete', args=[self.user_type])
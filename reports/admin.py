@@ -1,21 +1,49 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest
+from django.urls import path
+from django.utils import timezone
+from accounts.widgets import UserAutocompleteSelect
+from . import exporters, search
 from .models import *
 
+class IndexedSearchMixin:
+    """Changelist search through the reports.search index instead of icontains over search_fields"""
+    search_kind = None
+    
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        matching = search.matches(search_term, kind=self.search_kind).values('object_id')
+        return queryset.filter(pk__in=matching), False
+
+class UserAutocompleteMixin:
+    """Pick the users in ``user_autocomplete_fields`` ({field: user_type}) with an autocomplete"""
+    user_autocomplete_fields = {}
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.user_autocomplete_fields:
+            kwargs['widget'] = UserAutocompleteSelect(db_field, self.admin_site, self.user_autocomplete_fields[db_field.name])
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 @admin.register(AcademicYear)
 class AcademicYearAdmin(admin.ModelAdmin):
     list_display = ['name', 'current']
     list_filter = ['current']
 
 @admin.register(SchoolClass)
-class SchoolClassAdmin(admin.ModelAdmin):
+class SchoolClassAdmin(UserAutocompleteMixin, admin.ModelAdmin):
     list_display = ['name', 'teacher', 'academic_year']
     list_filter = ['academic_year', 'teacher']
+    user_autocomplete_fields = {'teacher': 'teacher'}
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(IndexedSearchMixin, UserAutocompleteMixin, admin.ModelAdmin):
     list_display = ['student_id', 'first_name', 'last_name', 'school_class']
     list_filter = ['school_class']
     search_fields = ['student_id', 'first_name', 'last_name']
+    search_kind = 'student'
+    user_autocomplete_fields = {'user': 'parent'}
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
@@ -52,8 +80,53 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
     search_fields = ['assignment__title', 'student__first_name', 'student__last_name']
 
 @admin.register(StudentContact)
-class StudentContactAdmin(admin.ModelAdmin):
+class StudentContactAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['child_name', 'parent_name', 'class_level', 'parent_phone', 'teacher']
     list_filter = ['class_level', 'teacher']
     search_fields = ['child_name', 'parent_name', 'parent_id_number', 'parent_phone']
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    search_kind = 'contact'
+    readonly_fields = ['created_at', 'updated_at']
+    actions = ['export_selected']
+    
+    def get_urls(self):
+        urls = [
+            path('export/', self.admin_site.admin_view(self.export_view), name='reports_studentcontact_export'),
+        ]
+        return urls + super().get_urls()
+    
+    def export_view(self, request):
+        """Every teacher's contacts, optionally filtered by ?teacher= and ?class_level="""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        contacts = StudentContact.objects.order_by('teacher__username', 'class_level', 'child_name')
+        if request.GET.get('teacher'):
+            try:
+                teacher_id = int(request.GET['teacher'])
+            except ValueError:
+                return HttpResponseBadRequest('teacher must be a user ID')
+            contacts = contacts.filter(teacher_id=teacher_id)
+        if request.GET.get('class_level'):
+            contacts = contacts.filter(class_level=request.GET['class_level'])
+        header, rows = exporters.contact_export(contacts, include_teacher=True)
+        filename = f'student_contacts_all_teachers_{timezone.now().strftime("%Y-%m-%d")}'
+        return exporters.export_response(request.GET.get('format'), filename, header, rows)
+    
+    @admin.action(description='Export selected contacts as CSV')
+    def export_selected(self, request, queryset):
+        header, rows = exporters.contact_export(queryset, include_teacher=True)
+        return exporters.csv_response(f'student_contacts_{timezone.now().strftime("%Y-%m-%d")}', header, rows)
+
+@admin.register(PrerenderedReport)
+class PrerenderedReportAdmin(admin.ModelAdmin):
+    list_display = ['student', 'academic_year', 'term', 'rendered_at']
+    list_filter = ['academic_year', 'term']
+    search_fields = ['student__student_id', 'student__first_name', 'student__last_name']
+    readonly_fields = ['fingerprint', 'rendered_at']
+
+@admin.register(ClassPerformanceSummary)
+class ClassPerformanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ['school_class', 'subject', 'term', 'academic_year', 'exceeding', 'meeting', 'approaching', 'below', 'updated_at']
+    list_filter = ['academic_year', 'term', 'subject']
+    list_select_related = ['school_class__academic_year', 'subject', 'academic_year']
+    # Maintained from assessment results; use rebuild_performance_summaries to fix drift
+    readonly_fields = ['exceeding', 'meeting', 'approaching', 'below', 'updated_at']
@@ -0,0 +1,95 @@
+"""
+Batch generation of report cards for a whole class or academic year.
+
+All database work happens up front in the calling process; the collected
+plain data is then rendered across a pool of worker processes and packed
+into a ZIP archive as each PDF comes back.
+"""
+
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import AssessmentResult
+from .rendering import render_report
+from .report_data import RESULT_FIELDS, labelled_rows, report_card_data, report_filename
+
+
+def collect_report_card_data(students):
+    """Return ``(student, student_data)`` pairs for a queryset of students.
+
+    Uses two queries regardless of how many students are passed in.
+    """
+    students = list(students.select_related('school_class__academic_year').order_by('school_class__name', 'last_name', 'first_name'))
+    rows_by_student = {}
+    results = AssessmentResult.objects.filter(student__in=[student.id for student in students])
+    for student_id, *row in results.order_by('student_id', 'term', 'subject__name').values_list('student_id', *RESULT_FIELDS):
+        rows_by_student.setdefault(student_id, []).append(row)
+
+    generated = timezone.now()
+    return [
+        (student, report_card_data(student, labelled_rows(rows_by_student.get(student.id, [])), generated=generated))
+        for student in students
+    ]
+
+
+def collect_report_cards(students):
+    """Return ``(archive_name, student_data)`` pairs for a queryset of students"""
+    collected = collect_report_card_data(students)
+    class_ids = {student.school_class_id for student, _ in collected}
+    cards = []
+    for student, data in collected:
+        name = report_filename(data)
+        if len(class_ids) > 1:
+            name = f"{slugify(student.school_class.name)}/{name}"
+        cards.append((name, data))
+    return cards
+
+
+def render_report_cards(cards, workers=None):
+    """Yield ``(name, pdf_bytes)`` for ``(name, student_data)`` pairs, rendering in worker processes"""
+    workers = workers or settings.REPORT_BATCH_WORKERS
+    if workers <= 1 or len(cards) <= 1:
+        for name, data in cards:
+            yield name, render_report(data)
+        return
+
+    names = [name for name, _ in cards]
+    chunksize = max(1, len(cards) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pdfs = executor.map(render_report, [data for _, data in cards], chunksize=chunksize)
+        yield from zip(names, pdfs)
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only buffer that hands back whatever was written since the last read"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files):
+    """Yield a ZIP archive chunk by chunk from ``(name, bytes)`` pairs"""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield buffer.pop()
+    yield buffer.pop()
+
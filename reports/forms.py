@@ -1,6 +1,8 @@
 from django import forms
-from .models import AssessmentResult, AcademicYear, Student, SchoolClass, SubjectAssignment, AssignmentSubmission, StudentContact
+from django.core.validators import MaxValueValidator
+from .models import AssessmentResult, AcademicYear, Student, Subject, SubjectAssignment, AssignmentSubmission, StudentContact
 from django.contrib.auth import get_user_model
+from . import reference
 
 User = get_user_model()
 
@@ -15,11 +17,22 @@ class StudentForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.school_class = kwargs.pop('school_class', None)
         super().__init__(*args, **kwargs)
-        # Only show parent users in the user dropdown
+        # Only parent users can be linked. The page picks one through the
+        # user_autocomplete endpoint, so the choices are never listed
         self.fields['user'].queryset = User.objects.filter(user_type='parent')
+        self.fields['user'].widget = forms.HiddenInput()
         self.fields['user'].required = False
         self.fields['user'].help_text = "Optional: Link to parent account"
 
+class SpreadsheetUploadForm(forms.Form):
+    file = forms.FileField(help_text="CSV (UTF-8) or Excel .xlsx file with a header row")
+    
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError("Please upload a .csv or .xlsx file.")
+        return upload
+
 class AssessmentResultForm(forms.ModelForm):
     class Meta:
         model = AssessmentResult
@@ -31,13 +44,35 @@ class AssessmentResultForm(forms.ModelForm):
         }
     
     def __init__(self, *args, **kwargs):
+        # Views that already looked up the current year can pass it in
+        current_year = kwargs.pop('current_year', None)
         super().__init__(*args, **kwargs)
         # Only show current academic year
-        current_year = AcademicYear.objects.filter(current=True).first()
+        if current_year is None:
+            current_year = reference.current_academic_year()
         if current_year:
             self.fields['academic_year'].initial = current_year
             self.fields['academic_year'].widget = forms.HiddenInput()
 
+class GradebookSelectForm(forms.Form):
+    subject = forms.ModelChoiceField(queryset=Subject.objects.all(), widget=forms.Select(attrs={'class': 'form-select'}))
+    term = forms.TypedChoiceField(choices=AssessmentResult.TERMS, coerce=int, widget=forms.Select(attrs={'class': 'form-select'}))
+
+class GradebookEntryForm(forms.Form):
+    """One student's row in the gradebook; leaving the level blank skips the student"""
+    student = forms.IntegerField(widget=forms.HiddenInput())
+    performance_level = forms.ChoiceField(
+        choices=[('', '---------')] + AssessmentResult.PERFORMANCE_LEVELS,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'}),
+    )
+    teacher_comment = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'rows': 1, 'class': 'form-control form-control-sm'}),
+    )
+
+GradebookFormSet = forms.formset_factory(GradebookEntryForm, extra=0)
+
 class SubjectAssignmentForm(forms.ModelForm):
     class Meta:
         model = SubjectAssignment
@@ -54,7 +89,7 @@ class SubjectAssignmentForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Set current academic year as initial
-        current_year = AcademicYear.objects.filter(current=True).first()
+        current_year = reference.current_academic_year()
         if current_year:
             self.fields['academic_year'] = forms.ModelChoiceField(
                 queryset=AcademicYear.objects.all(),
@@ -89,6 +124,30 @@ class GradeAssignmentForm(forms.ModelForm):
             'teacher_feedback': forms.Textarea(attrs={'rows': 4}),
         }
 
+class GradingEntryForm(forms.Form):
+    """One submission in the grading queue; leaving the grade blank skips it"""
+    submission = forms.IntegerField(widget=forms.HiddenInput())
+    grade = forms.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.5'}),
+    )
+    teacher_feedback = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'rows': 3, 'class': 'form-control'}),
+    )
+    
+    def __init__(self, *args, max_points=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if max_points is not None:
+            self.fields['grade'].max_value = max_points
+            self.fields['grade'].validators.append(MaxValueValidator(max_points))
+            self.fields['grade'].widget.attrs['max'] = max_points
+
+GradingFormSet = forms.formset_factory(GradingEntryForm, extra=0)
+
 class StudentContactForm(forms.ModelForm):
     class Meta:
         model = StudentContact
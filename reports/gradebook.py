@@ -0,0 +1,83 @@
+"""
+Class-wide result entry.
+
+``save_gradebook`` writes one subject/term column of the gradebook for many
+students in a single transaction: one query to read the existing results,
+one ``bulk_update`` for the changed ones and one ``bulk_create`` for the new
+ones. The insert is an upsert on the ``unique_together`` fields, so a row
+created concurrently by someone else is updated rather than raising
+IntegrityError. The column's class performance summaries are then recounted.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AssessmentResult, Student
+from .performance import refresh_summaries
+from .report_cache import get_report_cache
+
+UNIQUE_FIELDS = ['student', 'subject', 'term', 'academic_year']
+UPDATE_FIELDS = ['performance_level', 'teacher_comment', 'date_modified']
+
+
+def existing_results(student_ids, subject, term, academic_year):
+    """Existing results for one gradebook column, keyed by student ID"""
+    results = AssessmentResult.objects.filter(
+        student_id__in=student_ids,
+        subject=subject,
+        term=term,
+        academic_year=academic_year,
+    )
+    return {result.student_id: result for result in results}
+
+
+def save_gradebook(subject, term, academic_year, entries):
+    """Upsert results from ``{student_id: (performance_level, teacher_comment)}``.
+
+    Returns ``(created, updated)`` counts; unchanged rows are left alone.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        existing = existing_results(entries.keys(), subject, term, academic_year)
+        to_create = []
+        to_update = []
+        for student_id, (performance_level, teacher_comment) in entries.items():
+            result = existing.get(student_id)
+            if result is None:
+                to_create.append(AssessmentResult(
+                    student_id=student_id,
+                    subject=subject,
+                    term=term,
+                    academic_year=academic_year,
+                    performance_level=performance_level,
+                    teacher_comment=teacher_comment,
+                ))
+            elif (result.performance_level, result.teacher_comment) != (performance_level, teacher_comment):
+                result.performance_level = performance_level
+                result.teacher_comment = teacher_comment
+                # bulk_update doesn't apply auto_now
+                result.date_modified = now
+                to_update.append(result)
+
+        if to_update:
+            AssessmentResult.objects.bulk_update(to_update, UPDATE_FIELDS)
+        if to_create:
+            AssessmentResult.objects.bulk_create(
+                to_create,
+                update_conflicts=True,
+                unique_fields=UNIQUE_FIELDS,
+                update_fields=UPDATE_FIELDS,
+            )
+        if to_create or to_update:
+            # Bulk writes don't send post_save either, so recount the
+            # ClassPerformanceSummary groups this column belongs to
+            school_class_ids = Student.objects.filter(
+                pk__in=[result.student_id for result in to_create + to_update]
+            ).values_list('school_class_id', flat=True).distinct()
+            refresh_summaries(list(school_class_ids), subject, term, academic_year)
+
+    # Bulk writes don't send post_save, so drop cached report cards here
+    report_cache = get_report_cache()
+    for result in to_create + to_update:
+        report_cache.invalidate(result.student_id)
+    return len(to_create), len(to_update)
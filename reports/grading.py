@@ -0,0 +1,45 @@
+"""
+Assignment grading queue.
+
+``save_grades`` grades many submissions to one assignment at once: one
+query reads the submissions being graded and one ``bulk_update`` writes
+the grades, feedback and graded flag. ``bulk_update`` sends no signals, so
+the assignment's cached statistics are dropped here.
+"""
+
+from django.db import transaction
+
+from . import stats
+from .models import AssignmentSubmission
+
+UPDATE_FIELDS = ['grade', 'teacher_feedback', 'is_graded']
+
+
+def ungraded_submissions(assignment):
+    """The assignment's ungraded submissions with their students, oldest first"""
+    return (
+        AssignmentSubmission.objects.filter(assignment=assignment, is_graded=False)
+        .select_related('student')
+        .order_by('submitted_at', 'id')
+    )
+
+
+def save_grades(assignment, entries):
+    """Grade submissions from ``{submission_id: (grade, teacher_feedback)}`` and return how many were graded.
+
+    IDs that aren't submissions to ``assignment`` are ignored.
+    """
+    with transaction.atomic():
+        submissions = list(
+            AssignmentSubmission.objects.select_for_update()
+            .filter(assignment=assignment, pk__in=entries.keys())
+            .only('pk', *UPDATE_FIELDS)
+            .order_by()
+        )
+        for submission in submissions:
+            submission.grade, submission.teacher_feedback = entries[submission.pk]
+            submission.is_graded = True
+        if submissions:
+            AssignmentSubmission.objects.bulk_update(submissions, UPDATE_FIELDS)
+            transaction.on_commit(lambda: stats.invalidate_assignment_stats(assignment))
+    return len(submissions)
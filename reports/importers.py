@@ -0,0 +1,351 @@
+"""
+Bulk import of spreadsheet rows.
+
+Uploads are read row by row (CSV through the csv module, XLSX through
+openpyxl's read-only mode) and processed in chunks, so a file is never held
+in memory as a whole. Each chunk is validated with a form per row, checked
+against the database with one query per lookup rather than one per row, and
+written with ``bulk_create``, which skips model signals, so the search
+index is updated here for the new rows.
+"""
+
+import csv
+import io
+import re
+import time
+import uuid
+from itertools import islice
+from pathlib import Path
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from . import search
+from .forms import StudentContactForm
+from .models import Student, StudentContact
+
+User = get_user_model()
+
+IMPORT_CHUNK_SIZE = 500
+
+
+def _column_name(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def iter_rows(uploaded_file):
+    """Yield ``(row_number, row_dict)`` for every data row of a CSV or XLSX upload.
+
+    Column names are lower-cased with spaces replaced by underscores; row
+    numbers match what the user sees in their spreadsheet (header is row 1).
+    """
+    if uploaded_file.name.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        try:
+            workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        except Exception as exc:
+            raise ValidationError(f"Could not read the spreadsheet: {exc}")
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [_column_name(value) for value in next(rows, [])]
+            for row_number, values in enumerate(rows, start=2):
+                if values is None or all(value in (None, '') for value in values):
+                    continue
+                yield row_number, dict(zip(header, values))
+        finally:
+            workbook.close()
+        return
+
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        header = [_column_name(value) for value in next(reader, [])]
+        for row_number, values in enumerate(reader, start=2):
+            if not any(value.strip() for value in values):
+                continue
+            yield row_number, dict(zip(header, values))
+    except UnicodeDecodeError:
+        raise ValidationError("The file must be a UTF-8 encoded CSV or an .xlsx spreadsheet.")
+    finally:
+        text.detach()
+
+
+def stage_upload(uploaded_file):
+    """Keep an upload on disk between a dry run and the real import; returns a token"""
+    token = uuid.uuid4().hex
+    directory = Path(settings.IMPORT_STAGING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    discard_expired_uploads(directory)
+    with open(directory / token, 'wb') as staged:
+        for chunk in uploaded_file.chunks():
+            staged.write(chunk)
+    return token
+
+
+def staged_upload_path(token):
+    if not re.fullmatch(r'[0-9a-f]{32}', token or ''):
+        raise FileNotFoundError(token)
+    return Path(settings.IMPORT_STAGING_DIR) / token
+
+
+def discard_staged_upload(token):
+    try:
+        staged_upload_path(token).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def discard_expired_uploads(directory):
+    """Delete uploads staged longer than IMPORT_STAGING_MAX_AGE_SECONDS ago and never confirmed"""
+    cutoff = time.time() - settings.IMPORT_STAGING_MAX_AGE_SECONDS
+    for path in directory.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def require_columns(row, columns):
+    missing = [column for column in columns if column not in row]
+    if missing:
+        raise ValidationError(f"Missing column(s): {', '.join(missing)}")
+
+
+class ImportReport:
+    """Outcome of an import: how many rows were written and what went wrong with the rest"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    def add_form_errors(self, row_number, form):
+        for field, messages in form.errors.items():
+            label = field if field != '__all__' else 'row'
+            for message in messages:
+                self.add_error(row_number, f"{label}: {message}")
+
+    @property
+    def rows_with_errors(self):
+        return len({row_number for row_number, _ in self.errors})
+
+
+class StudentImportRowForm(forms.Form):
+    student_id = forms.CharField(max_length=20)
+    first_name = forms.CharField(max_length=100)
+    last_name = forms.CharField(max_length=100)
+    date_of_birth = forms.DateField(input_formats=['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'])
+    parent_username = forms.CharField(max_length=150, required=False)
+
+
+STUDENT_COLUMNS = ['student_id', 'first_name', 'last_name', 'date_of_birth']
+
+
+def import_students(school_class, uploaded_file, chunk_size=IMPORT_CHUNK_SIZE):
+    """Create Students in ``school_class`` from an uploaded CSV/XLSX and return an ImportReport"""
+    report = ImportReport()
+    seen_student_ids = set()
+    seen_parents = set()
+    for chunk_number, chunk in enumerate(chunked(iter_rows(uploaded_file), chunk_size)):
+        if chunk_number == 0:
+            require_columns(chunk[0][1], STUDENT_COLUMNS)
+        _import_student_chunk(school_class, chunk, report, seen_student_ids, seen_parents)
+    return report
+
+
+def _import_student_chunk(school_class, chunk, report, seen_student_ids, seen_parents):
+    valid = []
+    for row_number, row in chunk:
+        form = StudentImportRowForm(row)
+        if not form.is_valid():
+            report.add_form_errors(row_number, form)
+            continue
+        data = form.cleaned_data
+        if data['student_id'] in seen_student_ids:
+            report.add_error(row_number, f"student_id: {data['student_id']} appears more than once in the file")
+            continue
+        seen_student_ids.add(data['student_id'])
+        valid.append((row_number, data))
+
+    # One query per lookup for the whole chunk
+    existing_ids = set(Student.objects.filter(
+        student_id__in=[data['student_id'] for _, data in valid]
+    ).values_list('student_id', flat=True))
+    parents = dict(User.objects.filter(
+        user_type='parent',
+        username__in=[data['parent_username'] for _, data in valid if data['parent_username']],
+    ).values_list('username', 'id'))
+    linked_parents = set(Student.objects.filter(user_id__in=parents.values()).values_list('user_id', flat=True))
+
+    pending = []
+    for row_number, data in valid:
+        if data['student_id'] in existing_ids:
+            report.add_error(row_number, f"student_id: {data['student_id']} already exists")
+            continue
+        parent_id = None
+        username = data['parent_username']
+        if username:
+            parent_id = parents.get(username)
+            if parent_id is None:
+                report.add_error(row_number, f"parent_username: no parent account called {username}")
+                continue
+            if parent_id in linked_parents or parent_id in seen_parents:
+                report.add_error(row_number, f"parent_username: {username} is already linked to another student")
+                continue
+            seen_parents.add(parent_id)
+        pending.append((row_number, Student(
+            student_id=data['student_id'],
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            date_of_birth=data['date_of_birth'],
+            user_id=parent_id,
+            school_class=school_class,
+        )))
+
+    try:
+        with transaction.atomic():
+            Student.objects.bulk_create([student for _, student in pending])
+            search.index_students([student for _, student in pending])
+    except IntegrityError:
+        # Someone else added one of these students since the lookup above
+        for row_number, _ in pending:
+            report.add_error(row_number, "not imported: a conflicting student was added during the import, please upload the file again")
+        return
+    report.created += len(pending)
+
+
+CONTACT_COLUMNS = ['class_level', 'parent_name', 'parent_id_number', 'parent_phone', 'child_name']
+CONTACT_OPTIONAL_COLUMNS = ['parent_email', 'child_admission_number', 'emergency_contact', 'home_address', 'special_notes']
+
+# Accept either the stored code ("grade4") or the label ("Grade 4") in the class_level column
+CLASS_LEVEL_CODES = {}
+for code, label in StudentContact.CLASS_LEVELS:
+    CLASS_LEVEL_CODES[code] = code
+    CLASS_LEVEL_CODES[label.lower()] = code
+    if '(' in label:
+        # "Pre-Primary 1 (PP1)" can also be written as just "PP1"
+        CLASS_LEVEL_CODES[label[label.index('(') + 1:label.index(')')].lower()] = code
+
+
+def normalize_phone(value):
+    """Digits only, with the +254 country code written as a leading 0"""
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('254') and len(digits) == 12:
+        digits = '0' + digits[3:]
+    return digits
+
+
+def normalize_code(value):
+    """Upper-case letters and digits only, for ID and admission numbers"""
+    return re.sub(r'[^0-9A-Z]', '', (value or '').upper())
+
+
+def normalize_name(value):
+    return ' '.join((value or '').casefold().split())
+
+
+def contact_keys(child_name, parent_phone, parent_id_number, child_admission_number):
+    """Keys that identify the same child's contact record.
+
+    The admission number identifies a child on its own. Siblings share a
+    parent's phone and ID number, so those only count together with the
+    child's name.
+    """
+    child = normalize_name(child_name)
+    keys = []
+    if admission := normalize_code(child_admission_number):
+        keys.append(('admission', admission))
+    if phone := normalize_phone(parent_phone):
+        keys.append(('phone', phone, child))
+    if id_number := normalize_code(parent_id_number):
+        keys.append(('id', id_number, child))
+    return keys
+
+
+class ContactIndex:
+    """In-memory index of contact keys, built from a teacher's records in one query"""
+
+    def __init__(self):
+        self._entries = {}
+
+    @classmethod
+    def for_teacher(cls, teacher):
+        index = cls()
+        records = StudentContact.objects.filter(teacher=teacher).values_list(
+            'child_name', 'parent_name', 'parent_phone', 'parent_id_number', 'child_admission_number'
+        )
+        for child_name, parent_name, phone, id_number, admission in records.iterator(chunk_size=2000):
+            index.add(contact_keys(child_name, phone, id_number, admission), f"existing contact {child_name} - {parent_name}")
+        return index
+
+    def add(self, keys, label):
+        for key in keys:
+            self._entries.setdefault(key, label)
+
+    def match(self, keys):
+        for key in keys:
+            if key in self._entries:
+                return self._entries[key]
+        return None
+
+
+class ContactImportReport(ImportReport):
+    def __init__(self, dry_run):
+        super().__init__()
+        self.dry_run = dry_run
+        self.new = []
+        self.duplicates = []
+
+
+def import_contacts(teacher, uploaded_file, dry_run=True, chunk_size=IMPORT_CHUNK_SIZE):
+    """Create StudentContacts for ``teacher`` from an uploaded file and return a ContactImportReport.
+
+    Rows matching one of the teacher's existing contacts, or an earlier row in
+    the same file, are reported as duplicates and skipped. With ``dry_run``
+    nothing is written and the report lists the rows that would be created.
+    """
+    report = ContactImportReport(dry_run)
+    index = ContactIndex.for_teacher(teacher)
+    for chunk_number, chunk in enumerate(chunked(iter_rows(uploaded_file), chunk_size)):
+        if chunk_number == 0:
+            require_columns(chunk[0][1], CONTACT_COLUMNS)
+        contacts = []
+        for row_number, row in chunk:
+            row = {key: '' if value is None else str(value).strip() for key, value in row.items()}
+            row['class_level'] = CLASS_LEVEL_CODES.get(row.get('class_level', '').lower(), row.get('class_level', ''))
+            # "+254 712 345 678" is too long for the field as written; store the 07... form
+            row['parent_phone'] = normalize_phone(row.get('parent_phone')) or row.get('parent_phone', '')
+            form = StudentContactForm(row, teacher=teacher)
+            if not form.is_valid():
+                report.add_form_errors(row_number, form)
+                continue
+            contact = form.save(commit=False)
+            keys = contact_keys(contact.child_name, contact.parent_phone, contact.parent_id_number, contact.child_admission_number)
+            match = index.match(keys)
+            if match:
+                report.duplicates.append((row_number, contact, match))
+                continue
+            index.add(keys, f"row {row_number} of this file")
+            if dry_run:
+                report.new.append((row_number, contact))
+            else:
+                contacts.append(contact)
+        if contacts:
+            with transaction.atomic():
+                StudentContact.objects.bulk_create(contacts)
+                search.index_contacts(contacts)
+            report.created += len(contacts)
+    return report
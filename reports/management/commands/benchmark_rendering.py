@@ -0,0 +1,52 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.batch import render_report_cards
+from reports.rendering import render_report
+from reports.report_data import sample_report_card
+
+
+class Command(BaseCommand):
+    help = "Measure report card rendering throughput (PDFs/second) for 1, 10 and 100 students"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100], help='Number of students per run')
+        parser.add_argument('--results', type=int, default=45, help='Result rows per report card')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per size; the best run is reported')
+        parser.add_argument('--workers', type=int, default=1, help='Render through the batch process pool with this many workers')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON for comparing runs')
+
+    def handle(self, *args, **options):
+        # Warm the per-process style cache so the first run isn't penalised
+        render_report(sample_report_card(options['results']))
+
+        rows = []
+        for size in options['sizes']:
+            cards = [
+                (index, sample_report_card(options['results'], student_id=f'BENCH{index:04d}'))
+                for index in range(size)
+            ]
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                total_bytes = sum(len(pdf) for _, pdf in render_report_cards(cards, workers=options['workers']))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            rows.append({
+                'students': size,
+                'seconds': round(best, 4),
+                'pdfs_per_second': round(size / best, 1),
+                'bytes_per_pdf': total_bytes // size,
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps({'workers': options['workers'], 'results': options['results'], 'runs': rows}, indent=2))
+            return
+
+        self.stdout.write(f"{'students':>8} {'seconds':>9} {'PDFs/s':>8} {'bytes/PDF':>10}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['students']:>8} {row['seconds']:>9.3f} {row['pdfs_per_second']:>8.1f} {row['bytes_per_pdf']:>10}"
+            )
@@ -0,0 +1,63 @@
+import gc
+import tempfile
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import FileResponse, HttpResponse
+
+from reports.rendering import render_report, render_report_to
+from reports.report_data import sample_report_card
+
+
+def buffered_response(card, spool_max_bytes):
+    # How download_report used to respond: the whole PDF as bytes in the response
+    return HttpResponse(render_report(card), content_type='application/pdf')
+
+
+def streamed_response(card, spool_max_bytes):
+    pdf = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+    render_report_to(card, pdf)
+    pdf.seek(0)
+    return FileResponse(pdf, content_type='application/pdf')
+
+
+class Command(BaseCommand):
+    help = "Measure memory held per report card download for buffered and streamed responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--results', type=int, default=45, help='Result rows per report card (default: 15 subjects x 3 terms)')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--spool-max-bytes', type=int, default=settings.REPORT_SPOOL_MAX_BYTES)
+
+    def handle(self, *args, **options):
+        card = sample_report_card(options['results'])
+        # The first render also fills ReportLab's font and style caches; keep
+        # that out of the measurements
+        pdf_size = len(render_report(card))
+        self.stdout.write(
+            f"Report card: {options['results']} results, {pdf_size / 1024:.1f} KiB PDF, "
+            f"spool threshold {options['spool_max_bytes'] / 1024:.0f} KiB"
+        )
+        self.stdout.write(f"{'mode':<10} {'peak KiB':>10} {'held KiB':>10}")
+
+        for name, build in [('buffered', buffered_response), ('streamed', streamed_response)]:
+            peaks, held = [], []
+            for _ in range(options['runs']):
+                gc.collect()
+                tracemalloc.start()
+                baseline = tracemalloc.get_traced_memory()[0]
+                response = build(card, options['spool_max_bytes'])
+                # Memory still held once the response is built is what each
+                # in-flight download costs the worker while the client reads it
+                gc.collect()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                for _chunk in response:
+                    pass
+                response.close()
+                peaks.append(peak - baseline)
+                held.append(current - baseline)
+            self.stdout.write(
+                f"{name:<10} {sum(peaks) / len(peaks) / 1024:>10.1f} {sum(held) / len(held) / 1024:>10.1f}"
+            )
@@ -0,0 +1,149 @@
+import gzip
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+STYLE_BLOCK = re.compile(r'[ \t]*<style[^>]*>(.*?)</style>[ \t]*\n?', re.S)
+EXTENDS = re.compile(r"{%\s*extends\s+['\"]([^'\"]+)['\"]\s*%}")
+EXTRA_CSS = re.compile(r'{%\s*block\s+extra_css\s*%}')
+ENDBLOCK = re.compile(r'{%\s*endblock[^%]*%}')
+LOAD_STATIC = re.compile(r'{%\s*load\s+[^%]*\bstatic\b[^%]*%}')
+TEMPLATE_SYNTAX = ('{{', '{%', '{#')
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def bundle_name(template_name):
+    return f"css/templates/{template_name.removesuffix('.html')}.css"
+
+
+def link_tag(bundle, indent=''):
+    return f'{indent}<link rel="stylesheet" href="{{% static \'{bundle}\' %}}">\n'
+
+
+def dedent_css(css):
+    lines = css.strip('\n').splitlines()
+    margin = min((len(line) - len(line.lstrip()) for line in lines if line.strip()), default=0)
+    return '\n'.join(line[margin:].rstrip() for line in lines) + '\n'
+
+
+def extract(source, bundle):
+    """Return ``(template, css, removed_bytes)`` with the template's static <style> blocks moved to ``bundle``.
+
+    Blocks using template syntax stay inline. Returns css as '' when there
+    was nothing to extract. No <link> is added if the template already links
+    ``bundle`` from an earlier run.
+    """
+    blocks = [match for match in STYLE_BLOCK.finditer(source) if not any(tag in match.group(1) for tag in TEMPLATE_SYNTAX)]
+    if not blocks:
+        return source, '', 0
+    css = '\n'.join(dedent_css(match.group(1)) for match in blocks)
+    removed = sum(len(match.group(0).encode()) for match in blocks)
+    linked = f"{{% static '{bundle}' %}}" in source
+
+    # Where the <link> goes: in place of the first block if that's already
+    # in the page head (base.html, or a child's extra_css block), otherwise
+    # into the child's extra_css block, which is created if missing
+    first = blocks[0]
+    extends = EXTENDS.search(source)
+    extra_css = EXTRA_CSS.search(source)
+    in_head = not extends or (
+        extra_css and extra_css.end() <= first.start() < ENDBLOCK.search(source, extra_css.end()).start()
+    )
+    indent = re.match(r'[ \t]*', first.group(0)).group(0)
+    template = ''
+    position = 0
+    for match in blocks:
+        template += source[position:match.start()]
+        if match is first and in_head and not linked:
+            template += link_tag(bundle, indent)
+        position = match.end()
+    template += source[position:]
+
+    if not in_head and not linked:
+        extra_css = EXTRA_CSS.search(template)
+        if extra_css:
+            insert = extra_css.end()
+            template = template[:insert] + '\n' + link_tag(bundle).rstrip('\n') + template[insert:]
+        else:
+            template = template.rstrip('\n') + '\n\n{% block extra_css %}\n' + link_tag(bundle) + '{% endblock %}\n'
+
+    if not LOAD_STATIC.search(template):
+        extends = EXTENDS.search(template)
+        insert = template.index('\n', extends.end()) + 1 if extends else 0
+        template = template[:insert] + '{% load static %}\n' + template[insert:]
+    return template, css, removed
+
+
+def compressed_sizes(data):
+    sizes = {'gzip': len(gzip.compress(data, compresslevel=9))}
+    if brotli:
+        sizes['brotli'] = len(brotli.compress(data))
+    return sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Move static inline <style> blocks out of the project templates into CSS files under "
+        "static/css/templates/, linked with {% static %} so collectstatic fingerprints and compresses them, "
+        "and report the bytes each page no longer sends. Run it in development and commit the result; "
+        "blocks found later are appended to a template's existing bundle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be extracted without writing')
+
+    def handle(self, *args, **options):
+        templates_dir = Path(settings.TEMPLATES[0]['DIRS'][0])
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        if not templates_dir.is_dir():
+            raise CommandError(f"No templates directory at {templates_dir}")
+
+        saved = {}
+        parents = {}
+        for path in sorted(templates_dir.rglob('*.html')):
+            name = path.relative_to(templates_dir).as_posix()
+            source = path.read_text()
+            extends = EXTENDS.search(source)
+            parents[name] = extends.group(1) if extends else None
+            bundle = bundle_name(name)
+            template, css, removed = extract(source, bundle)
+            if not css:
+                continue
+            saved[name] = len(source.encode()) - len(template.encode())
+            target = static_dir / bundle
+            if target.exists():
+                # Blocks added since the last run join the existing bundle
+                css = target.read_text().rstrip('\n') + '\n\n' + css
+            css_bytes = css.encode()
+            sizes = ', '.join(f'{size} B {kind}' for kind, size in compressed_sizes(css_bytes).items())
+            self.stdout.write(f"{name}: {removed} B of <style> -> {bundle} ({len(css_bytes)} B, {sizes})")
+            if not options['dry_run']:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(css)
+                path.write_text(template)
+
+        if not saved:
+            self.stdout.write("No inline <style> blocks to extract.")
+            return
+
+        def page_saving(name):
+            # A page also stops sending whatever the templates it extends had inline
+            total = 0
+            while name:
+                total += saved.get(name, 0)
+                name = parents.get(name)
+            return total
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Bytes saved per page view (uncompressed HTML):"))
+        pages = set(parents) - set(parents.values())
+        for name in sorted(pages, key=page_saving, reverse=True):
+            if page_saving(name):
+                self.stdout.write(f"  {page_saving(name):>8}  {name}")
+        if options['dry_run']:
+            self.stdout.write("Dry run; nothing was written.")
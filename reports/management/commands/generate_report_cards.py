@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.batch import collect_report_cards, render_report_cards, stream_zip
+from reports.models import AcademicYear, SchoolClass, Student
+
+
+class Command(BaseCommand):
+    help = "Render report cards for a class or a whole academic year into a ZIP file"
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--class', dest='class_id', type=int, help='ID of the SchoolClass to render')
+        scope.add_argument('--year', dest='year_id', type=int, help='ID of the AcademicYear to render')
+        parser.add_argument('--output', required=True, help='Path of the ZIP file to write')
+        parser.add_argument('--workers', type=int, help='Number of worker processes (defaults to REPORT_BATCH_WORKERS)')
+
+    def handle(self, *args, **options):
+        if options['class_id']:
+            try:
+                school_class = SchoolClass.objects.get(id=options['class_id'])
+            except SchoolClass.DoesNotExist:
+                raise CommandError(f"SchoolClass {options['class_id']} does not exist")
+            students = Student.objects.filter(school_class=school_class)
+        else:
+            try:
+                academic_year = AcademicYear.objects.get(id=options['year_id'])
+            except AcademicYear.DoesNotExist:
+                raise CommandError(f"AcademicYear {options['year_id']} does not exist")
+            students = Student.objects.filter(school_class__academic_year=academic_year)
+
+        cards = collect_report_cards(students)
+        if not cards:
+            raise CommandError("No students found")
+
+        with open(options['output'], 'wb') as output:
+            for chunk in stream_zip(render_report_cards(cards, workers=options['workers'])):
+                output.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(cards)} report cards to {options['output']}"))
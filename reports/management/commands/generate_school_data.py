@@ -0,0 +1,276 @@
+import datetime
+import math
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from reports import reference, search
+from reports.models import (
+    AcademicYear, AssessmentResult, AssignmentSubmission, SchoolClass, Student, StudentContact, Subject,
+    SubjectAssignment,
+)
+from reports.performance import rebuild_summaries
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'Amani', 'Baraka', 'Chebet', 'Daudi', 'Eshe', 'Faraji', 'Gathoni', 'Hamisi', 'Imani', 'Jabari',
+    'Kamau', 'Lulu', 'Makena', 'Nia', 'Otieno', 'Pendo', 'Rehema', 'Sefu', 'Tumaini', 'Wanjiru',
+]
+LAST_NAMES = [
+    'Achieng', 'Barasa', 'Cheruiyot', 'Kariuki', 'Kiptoo', 'Mutua', 'Njoroge', 'Ochieng', 'Odhiambo',
+    'Omondi', 'Wafula', 'Wambui', 'Wekesa', 'Kimani', 'Mwangi',
+]
+SUBJECT_NAMES = [
+    'Mathematics', 'English', 'Kiswahili', 'Science', 'Social Studies', 'Religious Education', 'Art',
+    'Music', 'Physical Education', 'Agriculture', 'Home Science', 'Computer Studies', 'French',
+    'Geography', 'History', 'Business Studies', 'Drama', 'Health Education', 'Literature', 'Technology',
+]
+# Rough shape of real results: most students meet expectations
+LEVEL_WEIGHTS = [('exceeding', 20), ('meeting', 45), ('approaching', 25), ('below', 10)]
+GRADE_LEVELS = ['grade1', 'grade2', 'grade3', 'grade4', 'grade5', 'grade6', 'grade7', 'grade8']
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic school for benchmarking: teachers, parents, classes, students, results, "
+        "assignments, submissions and contacts. The same --seed always produces the same school "
+        "(dates are relative to today). Everything is named with --prefix so it can be replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000, help='Students per academic year')
+        parser.add_argument('--subjects', type=int, default=15)
+        parser.add_argument('--years', type=int, default=3, help='Academic years of history; the last is current')
+        parser.add_argument('--class-size', type=int, default=40)
+        parser.add_argument('--assignments', type=int, default=10, help='Assignments per teacher in the current year')
+        parser.add_argument('--parent-ratio', type=float, default=0.5, help='Share of current students with a parent account')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='GEN', help='Marks generated rows (max 4 characters)')
+        parser.add_argument('--password', default='password', help='Password for every generated user')
+        parser.add_argument('--replace', action='store_true', help='Delete previously generated data with this prefix first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not prefix.isalnum() or len(prefix) > 4:
+            raise CommandError("--prefix must be 1-4 letters or digits")
+        if options['years'] < 1 or options['students'] < 1:
+            raise CommandError("--years and --students must be at least 1")
+        if options['subjects'] > len(SUBJECT_NAMES):
+            raise CommandError(f"At most {len(SUBJECT_NAMES)} subjects are supported")
+
+        self.rng = random.Random(options['seed'])
+        self.prefix = prefix
+        self.password = make_password(options['password'])
+        self.today = timezone.localdate()
+
+        with transaction.atomic():
+            existing = User.objects.filter(username__startswith=f'{prefix.lower()}_')
+            if existing.exists() or AcademicYear.objects.filter(name__startswith=f'{prefix} ').exists():
+                if not options['replace']:
+                    raise CommandError(f"Data with prefix {prefix} already exists; use --replace to regenerate it")
+                self.delete_generated()
+            self.generate(options)
+
+        # Bulk inserts send no signals, so refresh what the signals maintain
+        groups = rebuild_summaries()
+        entries = search.rebuild_index()
+        reference.bump_version()
+        self.stdout.write(self.style.SUCCESS(f"Done; {groups} performance summaries and {entries} search entries rebuilt"))
+
+    def delete_generated(self):
+        prefix = self.prefix
+        # Years cascade to classes, students, results and assignments
+        AcademicYear.objects.filter(name__startswith=f'{prefix} ').delete()
+        User.objects.filter(username__startswith=f'{prefix.lower()}_').delete()
+        Subject.objects.filter(code__startswith=prefix).delete()
+        self.stdout.write(f"Deleted existing {prefix} data")
+
+    def generate(self, options):
+        rng = self.rng
+        prefix = self.prefix
+        students_per_year = options['students']
+        class_count = max(1, math.ceil(students_per_year / options['class_size']))
+
+        subjects = Subject.objects.bulk_create([
+            Subject(name=f'{name} ({prefix})', code=f'{prefix}{index:02d}')
+            for index, name in enumerate(SUBJECT_NAMES[:options['subjects']])
+        ])
+        teachers = self.create_users('teacher', class_count)
+        User.objects.bulk_create([
+            User(
+                username=f'{prefix.lower()}_admin',
+                password=self.password,
+                user_type='admin',
+                is_staff=True,
+                is_superuser=True,
+            )
+        ])
+        self.stdout.write(f"{len(subjects)} subjects, {len(teachers)} teachers")
+
+        first_year = self.today.year - options['years'] + 1
+        current_students = []
+        current_classes = []
+        for offset in range(options['years']):
+            start = first_year + offset
+            is_current = offset == options['years'] - 1
+            year = AcademicYear.objects.create(name=f'{prefix} {start}-{start + 1}')
+            classes = SchoolClass.objects.bulk_create([
+                SchoolClass(
+                    name=f'Grade {index % 8 + 1}{chr(65 + index // 8 % 26)} {prefix}',
+                    teacher=teacher,
+                    academic_year=year,
+                )
+                for index, teacher in enumerate(teachers)
+            ])
+            students = Student.objects.bulk_create([
+                Student(
+                    student_id=f'{prefix}{start}{index:05d}',
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    school_class=classes[index % class_count],
+                    date_of_birth=datetime.date(start - 6 - index % 8, rng.randint(1, 12), rng.randint(1, 28)),
+                )
+                for index in range(students_per_year)
+            ], batch_size=BATCH_SIZE)
+            # Past years have all three terms; the current one is mid-year
+            terms = [1, 2, 3] if not is_current else [1, 2]
+            results = self.create_results(students, subjects, terms, year)
+            self.stdout.write(f"{year.name}: {len(classes)} classes, {len(students)} students, {results} results")
+            if is_current:
+                current_students, current_classes = students, classes
+                current_year = year
+
+        # Flip "current" through save() so only the newest year is current
+        current_year.current = True
+        current_year.save()
+
+        parents = self.link_parents(current_students, options['parent_ratio'])
+        assignments, submissions = self.create_assignments(
+            current_classes, current_students, subjects, current_year, options['assignments']
+        )
+        contacts = self.create_contacts(current_students, current_classes)
+        self.stdout.write(
+            f"{parents} parents, {assignments} assignments, {submissions} submissions, {contacts} contacts"
+        )
+
+    def create_users(self, user_type, count):
+        return User.objects.bulk_create([
+            User(
+                username=f'{self.prefix.lower()}_{user_type}_{index:04d}',
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                email=f'{self.prefix.lower()}_{user_type}_{index:04d}@example.com',
+                password=self.password,
+                user_type=user_type,
+            )
+            for index in range(count)
+        ], batch_size=BATCH_SIZE)
+
+    def create_results(self, students, subjects, terms, year):
+        levels = [level for level, _ in LEVEL_WEIGHTS]
+        weights = [weight for _, weight in LEVEL_WEIGHTS]
+        created = 0
+        batch = []
+        for student in students:
+            for subject in subjects:
+                for term in terms:
+                    batch.append(AssessmentResult(
+                        student=student,
+                        subject=subject,
+                        term=term,
+                        academic_year=year,
+                        performance_level=self.rng.choices(levels, weights)[0],
+                        teacher_comment=self.rng.choice(['', 'Good progress.', 'Needs more practice.', 'Excellent work.']),
+                    ))
+            if len(batch) >= BATCH_SIZE:
+                AssessmentResult.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        AssessmentResult.objects.bulk_create(batch)
+        return created + len(batch)
+
+    def link_parents(self, students, ratio):
+        linked = [student for student in students if self.rng.random() < ratio]
+        parents = self.create_users('parent', len(linked))
+        for student, parent in zip(linked, parents):
+            student.user = parent
+        Student.objects.bulk_update(linked, ['user'], batch_size=BATCH_SIZE)
+        return len(parents)
+
+    def create_assignments(self, classes, students, subjects, year, per_teacher):
+        now = timezone.now()
+        assignments = SubjectAssignment.objects.bulk_create([
+            SubjectAssignment(
+                title=f'{subject.name.split(" (")[0]} {assignment_type.title()} {index + 1}',
+                description='Generated assignment.',
+                subject=subject,
+                assignment_type=assignment_type,
+                # Half already due, half still open
+                due_date=now + datetime.timedelta(days=self.rng.randint(-30, 30)),
+                max_points=self.rng.choice([10, 20, 50, 100]),
+                created_by=school_class.teacher,
+                academic_year=year,
+            )
+            for school_class in classes
+            for index in range(per_teacher)
+            for subject in [self.rng.choice(subjects)]
+            for assignment_type in [self.rng.choice(SubjectAssignment.ASSIGNMENT_TYPES)[0]]
+        ], batch_size=BATCH_SIZE)
+
+        students_by_teacher = {}
+        class_teacher = {school_class.id: school_class.teacher_id for school_class in classes}
+        for student in students:
+            students_by_teacher.setdefault(class_teacher[student.school_class_id], []).append(student)
+
+        submissions = []
+        for assignment in assignments:
+            due_passed = assignment.due_date < now
+            for student in students_by_teacher.get(assignment.created_by_id, []):
+                if self.rng.random() > 0.8:
+                    continue
+                graded = due_passed and self.rng.random() < 0.7
+                submissions.append(AssignmentSubmission(
+                    assignment=assignment,
+                    student=student,
+                    submission_text='Generated submission.',
+                    grade=round(self.rng.uniform(0.3, 1.0) * assignment.max_points, 2) if graded else None,
+                    is_graded=graded,
+                ))
+        AssignmentSubmission.objects.bulk_create(submissions, batch_size=BATCH_SIZE)
+
+        # submitted_at is auto_now_add, so spread it around the due date afterwards
+        for submission in submissions:
+            submission.submitted_at = submission.assignment.due_date - datetime.timedelta(
+                hours=self.rng.randint(-48, 240)
+            )
+        AssignmentSubmission.objects.bulk_update(submissions, ['submitted_at'], batch_size=BATCH_SIZE)
+        return len(assignments), len(submissions)
+
+    def create_contacts(self, students, classes):
+        class_info = {
+            school_class.id: (school_class.teacher_id, GRADE_LEVELS[index % len(GRADE_LEVELS)])
+            for index, school_class in enumerate(classes)
+        }
+        contacts = []
+        for index, student in enumerate(students):
+            teacher_id, class_level = class_info[student.school_class_id]
+            parent_name = f'{self.rng.choice(FIRST_NAMES)} {student.last_name}'
+            contacts.append(StudentContact(
+                teacher_id=teacher_id,
+                class_level=class_level,
+                parent_name=parent_name,
+                parent_id_number=f'{self.rng.randint(10000000, 39999999)}',
+                parent_phone=f'07{self.rng.randint(10000000, 99999999)}',
+                parent_email=f'parent{index}@example.com' if self.rng.random() < 0.6 else '',
+                child_name=student.full_name(),
+                child_admission_number=student.student_id,
+            ))
+        StudentContact.objects.bulk_create(contacts, batch_size=BATCH_SIZE)
+        return len(contacts)
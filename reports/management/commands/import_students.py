@@ -0,0 +1,32 @@
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.importers import import_students
+from reports.models import SchoolClass
+
+
+class Command(BaseCommand):
+    help = "Import students into a class from a CSV or XLSX file, printing a per-row error report"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with student_id, first_name, last_name, date_of_birth and optional parent_username columns')
+        parser.add_argument('--class', dest='class_id', type=int, required=True, help='ID of the SchoolClass to import into')
+
+    def handle(self, *args, **options):
+        try:
+            school_class = SchoolClass.objects.get(id=options['class_id'])
+        except SchoolClass.DoesNotExist:
+            raise CommandError(f"SchoolClass {options['class_id']} does not exist")
+
+        with open(options['path'], 'rb') as handle:
+            try:
+                report = import_students(school_class, File(handle, name=options['path']))
+            except ValidationError as e:
+                raise CommandError('; '.join(e.messages))
+
+        for row_number, message in report.errors:
+            self.stderr.write(f"row {row_number}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report.created} students imported into {school_class}, {report.rows_with_errors} rows skipped"
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.models import AcademicYear, AssessmentResult
+from reports.prerender import prerender_report_cards
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render report cards for every student with results in a term. "
+        "Safe to re-run: only students whose results changed since the last run are rendered again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, required=True, choices=[term for term, _ in AssessmentResult.TERMS])
+        parser.add_argument('--year', dest='year_id', type=int, help='ID of the AcademicYear (defaults to the current one)')
+        parser.add_argument('--workers', type=int, help='Number of worker processes (defaults to REPORT_BATCH_WORKERS)')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Students rendered and recorded per batch')
+
+    def handle(self, *args, **options):
+        if options['year_id']:
+            academic_year = AcademicYear.objects.filter(id=options['year_id']).first()
+        else:
+            academic_year = AcademicYear.objects.filter(current=True).first()
+        if academic_year is None:
+            raise CommandError("Academic year not found")
+
+        def progress(done, total):
+            self.stdout.write(f"Rendered {done}/{total}")
+
+        rendered = prerender_report_cards(
+            academic_year,
+            options['term'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{rendered} report cards pre-rendered for {academic_year}, Term {options['term']}"
+        ))
@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter under -X importtime. Phase markers go to stderr
+# between the import-time lines; wall times go to stdout as JSON.
+PROBE = """
+import json, sys, time
+import django
+start = time.perf_counter()
+sys.stderr.write('phase: setup\\n')
+django.setup()
+setup = time.perf_counter()
+sys.stderr.write('phase: urls\\n')
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls = time.perf_counter()
+sys.stderr.write('phase: end\\n')
+print(json.dumps({'setup': setup - start, 'urls': urls - setup}))
+"""
+
+PHASES = {'setup': 'django.setup()', 'urls': 'URLconf loading'}
+
+
+def parse_importtime(output):
+    """``{phase: [(module, self_us, cumulative_us, depth)]}`` from -X importtime output with phase markers"""
+    phases = {}
+    current = None
+    for line in output.splitlines():
+        if line.startswith('phase: '):
+            current = line[len('phase: '):]
+            continue
+        if current not in PHASES or not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        phases.setdefault(current, []).append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return phases
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the project in a fresh interpreter and report the time django.setup() and URLconf "
+        "loading take, and which modules the time goes to."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=15, help='Modules to list per phase')
+        parser.add_argument(
+            '--sort', choices=['cumulative', 'self'], default='cumulative',
+            help='cumulative: top-level imports including what they import; self: each module on its own',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'school_reporting.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE], env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Importing the project failed:\n{result.stderr[-2000:]}")
+        wall = json.loads(result.stdout.strip().splitlines()[-1])
+        phases = parse_importtime(result.stderr)
+
+        report = {}
+        for phase in PHASES:
+            modules = phases.get(phase, [])
+            if options['sort'] == 'self':
+                ranked = sorted(modules, key=lambda module: module[1], reverse=True)
+            else:
+                # Imports nested under another module are already in its cumulative time
+                ranked = sorted((module for module in modules if module[3] == 0), key=lambda module: module[2], reverse=True)
+            report[phase] = {
+                'wall_ms': round(wall[phase] * 1000, 1),
+                'import_ms': round(sum(module[1] for module in modules) / 1000, 1),
+                'modules': len(modules),
+                'top': [
+                    {'module': name, 'self_ms': round(self_us / 1000, 1), 'cumulative_ms': round(cumulative_us / 1000, 1)}
+                    for name, self_us, cumulative_us, _ in ranked[:options['limit']]
+                ],
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for phase, label in PHASES.items():
+            data = report[phase]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{label}: {data['wall_ms']} ms, {data['import_ms']} ms importing {data['modules']} modules"
+            ))
+            for row in data['top']:
+                self.stdout.write(f"  {row['cumulative_ms']:>8.1f} {row['self_ms']:>8.1f}  {row['module']}")
+        self.stdout.write(f"(columns: cumulative ms, self ms; sorted by {options['sort']})")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.models import AcademicYear
+from reports.performance import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the class performance summary table from assessment results. "
+        "Run after loading fixtures or writing results outside the ORM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', dest='year_id', type=int, help='Only rebuild this AcademicYear (defaults to all years)')
+
+    def handle(self, *args, **options):
+        academic_year = None
+        if options['year_id']:
+            academic_year = AcademicYear.objects.filter(id=options['year_id']).first()
+            if academic_year is None:
+                raise CommandError("Academic year not found")
+
+        groups = rebuild_summaries(academic_year)
+        scope = academic_year or 'all academic years'
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {groups} performance summaries for {scope}"))
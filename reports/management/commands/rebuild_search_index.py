@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reports.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate the student and contact search index. Run after loading fixtures, writing students or "
+        "contacts outside the ORM, or any migration that alters SearchEntry."
+    )
+
+    def handle(self, *args, **options):
+        entries = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {entries} students and contacts"))
@@ -0,0 +1,208 @@
+import json
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from accounts import urls as account_urls
+from reports import urls as report_urls
+from reports.models import (
+    AcademicYear, AssessmentResult, AssignmentSubmission, SchoolClass, Student, SubjectAssignment,
+)
+
+User = get_user_model()
+
+# Views that only answer to parents or administrators; everything else is
+# requested as the teacher
+PARENT_VIEWS = {'parent_dashboard', 'reports:student_results', 'reports:download_report', 'reports:submit_assignment'}
+ADMIN_VIEWS = {'reports:academic_year_report_cards', 'reports:school_performance'}
+# ZIPs of every report card in a class or year take minutes, not milliseconds
+SLOW_VIEWS = {'reports:class_report_cards', 'reports:academic_year_report_cards'}
+
+
+def url_names():
+    """Names of every URL in accounts.urls and reports.urls, namespaced as reverse() expects"""
+    for module, namespace in [(account_urls, None), (report_urls, report_urls.app_name)]:
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield f'{namespace}:{pattern.name}' if namespace else pattern.name, pattern
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every page in accounts/urls.py and reports/urls.py (with a sample query string where a page "
+        "needs one) through the test client and report "
+        "p50/p95 latency and query counts as JSON. Run against data from generate_school_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20, help='Timed requests per URL')
+        parser.add_argument('--teacher', help='Username to request teacher pages as (default: teacher of the largest current class)')
+        parser.add_argument('--only', nargs='+', default=[], help='Only these URL names (e.g. reports:class_detail)')
+        parser.add_argument('--include-slow', action='store_true', help='Also time the whole-class and whole-year ZIP downloads')
+        parser.add_argument('--output', help='Write the JSON here instead of stdout')
+
+    def handle(self, *args, **options):
+        fixtures = self.fixtures(options['teacher'])
+        clients = {role: self.client_for(user) for role, user in fixtures['users'].items() if user}
+
+        views = []
+        for name, pattern in url_names():
+            if options['only'] and name not in options['only']:
+                continue
+            if name in SLOW_VIEWS and not options['include_slow'] and not options['only']:
+                continue
+            role = 'parent' if name in PARENT_VIEWS else 'admin' if name in ADMIN_VIEWS else 'teacher'
+            kwargs = {key: fixtures['kwargs'].get(key) for key in pattern.pattern.converters}
+            if role not in clients or None in kwargs.values():
+                self.stderr.write(f"Skipping {name}: no {role} or sample object in the database")
+                continue
+            path = reverse(name, kwargs=kwargs)
+            if fixtures['params'].get(name):
+                # Pages that only do their real work once given a query
+                path += '?' + urlencode(fixtures['params'][name])
+            views.append(self.measure(clients[role], name, path, options['runs']))
+            self.stderr.write(f"{name}: p50 {views[-1]['p50_ms']} ms, {views[-1]['queries']} queries")
+
+        report = {
+            'commit': git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'runs': options['runs'],
+            'students': Student.objects.count(),
+            'views': views,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def fixtures(self, teacher_username):
+        """Users to log in as and sample IDs for each URL parameter"""
+        current_year = AcademicYear.objects.filter(current=True).first()
+        if current_year is None:
+            raise CommandError("No current academic year; run generate_school_data first")
+        if teacher_username:
+            teacher = User.objects.filter(username=teacher_username, user_type='teacher').first()
+            if teacher is None:
+                raise CommandError(f"No teacher called {teacher_username}")
+            school_class = SchoolClass.objects.filter(teacher=teacher, academic_year=current_year).first()
+        else:
+            school_class = (
+                SchoolClass.objects.filter(academic_year=current_year)
+                .annotate(size=Count('student'))
+                .order_by('-size')
+                .select_related('teacher')
+                .first()
+            )
+            teacher = school_class.teacher if school_class else None
+        if school_class is None:
+            raise CommandError("The teacher needs a class in the current academic year")
+
+        # Prefer a student with a parent account so the parent pages can be requested too
+        student = (
+            Student.objects.filter(school_class=school_class)
+            .order_by(F('user').asc(nulls_last=True), 'id')
+            .select_related('user')
+            .first()
+        )
+        assignment = SubjectAssignment.objects.filter(created_by=teacher, academic_year=current_year).first()
+        submission = AssignmentSubmission.objects.filter(assignment__created_by=teacher).first()
+        admin = User.objects.filter(is_staff=True, is_active=True).order_by('-is_superuser').first()
+        result = (
+            AssessmentResult.objects.filter(student__school_class=school_class, academic_year=current_year)
+            .order_by('-term', 'subject_id')
+            .first()
+        )
+        parent = student.user if student else None
+        return {
+            'users': {
+                'teacher': teacher,
+                'parent': parent,
+                'admin': admin,
+            },
+            'kwargs': {
+                'pk': school_class.id,
+                'class_id': school_class.id,
+                'student_id': student.id if student else None,
+                'year_id': current_year.id,
+                'assignment_id': assignment.id if assignment else None,
+                'subject_id': assignment.subject_id if assignment else None,
+                'submission_id': submission.id if submission else None,
+                'class_level': 'grade1',
+                'user_type': 'parent',
+            },
+            'params': {
+                'reports:gradebook': {'subject': result.subject_id, 'term': result.term} if result else None,
+                'reports:search': {'q': student.first_name[:3]} if student else None,
+                'user_autocomplete': {'q': (parent.last_name or parent.username)[:3]} if parent else None,
+            },
+        }
+
+    def client_for(self, user):
+        # A host the settings accept, over HTTPS so SECURE_SSL_REDIRECT doesn't bounce us
+        hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+        # Broken pages are reported with their status code rather than stopping the run
+        client = Client(SERVER_NAME=hosts[0] if hosts else 'testserver', raise_request_exception=False)
+        client.force_login(user)
+        return client
+
+    def fetch(self, client, path):
+        response = client.get(path, secure=True)
+        if response.streaming:
+            for _chunk in response.streaming_content:
+                pass
+        response.close()
+        return response
+
+    def measure(self, client, name, path, runs):
+        # One untimed request to fill per-process caches
+        response = self.fetch(client, path)
+        timings = []
+        queries = []
+        for _ in range(runs):
+            # Parent pages read from the replicas, so count every database
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(db)) for db in connections.all()]
+                start = time.perf_counter()
+                self.fetch(client, path)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(sum(len(context) for context in captured))
+        return {
+            'name': name,
+            'path': path,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'queries': max(queries),
+        }
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-17 01:28
+
+import django.db.models.deletion
+import reports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_studentcontact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrerenderedReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField(choices=[(1, 'Term 1'), (2, 'Term 2'), (3, 'Term 3')])),
+                ('fingerprint', models.CharField(max_length=100)),
+                ('pdf', models.FileField(storage=reports.models.prerendered_report_storage, upload_to='report_cards/')),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reports.academicyear')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prerendered_reports', to='reports.student')),
+            ],
+            options={
+                'unique_together': {('student', 'academic_year')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-17 01:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_prerenderedreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassPerformanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField(choices=[(1, 'Term 1'), (2, 'Term 2'), (3, 'Term 3')])),
+                ('exceeding', models.IntegerField(default=0)),
+                ('meeting', models.IntegerField(default=0)),
+                ('approaching', models.IntegerField(default=0)),
+                ('below', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reports.academicyear')),
+                ('school_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_summaries', to='reports.schoolclass')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reports.subject')),
+            ],
+            options={
+                'verbose_name_plural': 'Class Performance Summaries',
+                'unique_together': {('school_class', 'subject', 'term', 'academic_year')},
+            },
+        ),
+    ]
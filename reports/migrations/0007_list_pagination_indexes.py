@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 01:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_referencedataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['school_class', 'last_name', 'first_name', 'id'], name='student_roster_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentcontact',
+            index=models.Index(fields=['teacher', 'class_level', 'child_name', 'id'], name='contact_teacher_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subjectassignment',
+            index=models.Index(fields=['created_by', 'academic_year', '-created_at', '-id'], name='assignment_teacher_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subjectassignment',
+            index=models.Index(fields=['is_published', 'academic_year', '-created_at', '-id'], name='assignment_published_idx'),
+        ),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 5.2 on 2026-10-17 02:10
+
+import re
+import unicodedata
+
+from django.db import OperationalError, migrations
+
+# The SQL and normalization below are copies of reports.search as it was
+# when this migration was written, so later changes there don't alter it.
+# rebuild_search_index recreates the entries with the current rules.
+
+FTS_TABLE = 'reports_searchentry_fts'
+
+SQLITE_INDEX = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "terms, content='reports_searchentry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS reports_searchentry_fts_insert AFTER INSERT ON reports_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, terms) VALUES (new.id, new.terms); END",
+    "CREATE TRIGGER IF NOT EXISTS reports_searchentry_fts_delete AFTER DELETE ON reports_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, terms) VALUES ('delete', old.id, old.terms); END",
+    "CREATE TRIGGER IF NOT EXISTS reports_searchentry_fts_update AFTER UPDATE ON reports_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, terms) VALUES ('delete', old.id, old.terms); "
+    f"INSERT INTO {FTS_TABLE}(rowid, terms) VALUES (new.id, new.terms); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP_INDEX = [
+    "DROP TRIGGER IF EXISTS reports_searchentry_fts_insert",
+    "DROP TRIGGER IF EXISTS reports_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS reports_searchentry_fts_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS reports_searchentry_terms_trgm ON reports_searchentry USING gin (terms gin_trgm_ops)",
+]
+POSTGRES_DROP_INDEX = [
+    "DROP INDEX IF EXISTS reports_searchentry_terms_trgm",
+]
+
+
+def words(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r'[^\W_]+', text.casefold())
+
+
+def normalize_phone(value):
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('254') and len(digits) == 12:
+        digits = '0' + digits[3:]
+    return digits
+
+
+def normalize_code(value):
+    return re.sub(r'[^0-9A-Z]', '', (value or '').upper())
+
+
+def normalize(*values, codes=(), phones=()):
+    terms = []
+    for value in values:
+        terms.extend(words(value))
+    terms.extend(code.lower() for code in map(normalize_code, codes) if code)
+    terms.extend(phone for phone in map(normalize_phone, phones) if phone)
+    return ' ' + ' '.join(dict.fromkeys(terms))
+
+
+def create_search_index(apps, schema_editor):
+    db = schema_editor.connection
+    statements = SQLITE_INDEX if db.vendor == 'sqlite' else POSTGRES_INDEX if db.vendor == 'postgresql' else []
+    with db.cursor() as cursor:
+        for sql in statements:
+            try:
+                cursor.execute(sql)
+            except OperationalError:
+                if db.vendor != 'sqlite':
+                    raise
+                # SQLite built without FTS5; searches fall back to LIKE
+                break
+
+    SearchEntry = apps.get_model('reports', 'SearchEntry')
+    Student = apps.get_model('reports', 'Student')
+    StudentContact = apps.get_model('reports', 'StudentContact')
+    entries = [
+        SearchEntry(
+            kind='student',
+            object_id=student.pk,
+            teacher_id=student.school_class.teacher_id,
+            title=f"{student.first_name} {student.last_name}",
+            detail=f"{student.student_id} · {student.school_class.name}",
+            terms=normalize(student.first_name, student.last_name, student.student_id, codes=[student.student_id]),
+        )
+        for student in Student.objects.select_related('school_class')
+    ] + [
+        SearchEntry(
+            kind='contact',
+            object_id=contact.pk,
+            teacher_id=contact.teacher_id,
+            title=contact.child_name,
+            detail=f"{contact.parent_name} · {contact.parent_phone}",
+            terms=normalize(
+                contact.child_name, contact.parent_name, contact.parent_phone, contact.parent_id_number,
+                contact.child_admission_number,
+                codes=[contact.parent_id_number, contact.child_admission_number],
+                phones=[contact.parent_phone, contact.emergency_contact],
+            ),
+        )
+        for contact in StudentContact.objects.all()
+    ]
+    SearchEntry.objects.bulk_create(
+        entries,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['teacher', 'title', 'detail', 'terms'],
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    db = schema_editor.connection
+    statements = SQLITE_DROP_INDEX if db.vendor == 'sqlite' else POSTGRES_DROP_INDEX if db.vendor == 'postgresql' else []
+    with db.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_searchentry'),
+    ]
+
+    operations = [
+        # Separate from 0008 so the unique index the upserts rely on exists
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
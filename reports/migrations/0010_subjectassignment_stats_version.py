@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subjectassignment',
+            name='stats_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
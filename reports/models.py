@@ -1,3 +1,7 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -36,6 +40,12 @@ class Student(models.Model):
     school_class = models.ForeignKey(SchoolClass, on_delete=models.CASCADE)
     date_of_birth = models.DateField()
     
+    class Meta:
+        indexes = [
+            # Class roster, paged in name order
+            models.Index(fields=['school_class', 'last_name', 'first_name', 'id'], name='student_roster_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
     
@@ -118,15 +128,33 @@ class SubjectAssignment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_published = models.BooleanField(default=True)
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    # Bumped whenever the assignment or one of its submissions changes, so
+    # every process's cached statistics (see reports.stats) go out of date
+    stats_version = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Assignment'
         verbose_name_plural = 'Assignments'
+        indexes = [
+            # Assignment list pages: a teacher's own, or everything published
+            models.Index(fields=['created_by', 'academic_year', '-created_at', '-id'], name='assignment_teacher_idx'),
+            models.Index(fields=['is_published', 'academic_year', '-created_at', '-id'], name='assignment_published_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.subject}"
     
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert'):
+            # stats_version only ever moves forward through an F() update; a
+            # copy loaded before the last bump mustn't write the old value back
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [name for name in update_fields if name != 'stats_version']
+        super().save(*args, **kwargs)
+    
     def is_past_due(self):
         return timezone.now() > self.due_date
     
@@ -182,6 +210,108 @@ class StudentContact(models.Model):
     class Meta:
         ordering = ['class_level', 'child_name']
         verbose_name_plural = "Student Contacts"
+        indexes = [
+            models.Index(fields=['teacher', 'class_level', 'child_name', 'id'], name='contact_teacher_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.child_name} - {self.parent_name} ({self.get_class_level_display()})"
+
+class PrerenderedReportStorage(FileSystemStorage):
+    """Stores files under REPORT_PRERENDER_DIR, read when used rather than at import"""
+
+    @property
+    def base_location(self):
+        return str(settings.REPORT_PRERENDER_DIR)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+def prerendered_report_storage():
+    return PrerenderedReportStorage()
+
+class PrerenderedReport(models.Model):
+    """Manifest entry for a report card rendered ahead of time at term close"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='prerendered_reports')
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    term = models.IntegerField(choices=AssessmentResult.TERMS)
+    # Results fingerprint (see reports.report_cache) the PDF was rendered from
+    fingerprint = models.CharField(max_length=100)
+    pdf = models.FileField(upload_to='report_cards/', storage=prerendered_report_storage)
+    rendered_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['student', 'academic_year']
+    
+    def __str__(self):
+        return f"{self.student} - {self.academic_year} (Term {self.term})"
+
+class ClassPerformanceSummary(models.Model):
+    """Result counts per performance level for one class, subject and term.
+
+    Kept up to date from AssessmentResult changes (see reports.performance)
+    so analytics pages read one row per group instead of every result.
+    """
+    school_class = models.ForeignKey(SchoolClass, on_delete=models.CASCADE, related_name='performance_summaries')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    term = models.IntegerField(choices=AssessmentResult.TERMS)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    # One column per AssessmentResult.PERFORMANCE_LEVELS code
+    exceeding = models.IntegerField(default=0)
+    meeting = models.IntegerField(default=0)
+    approaching = models.IntegerField(default=0)
+    below = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['school_class', 'subject', 'term', 'academic_year']
+        verbose_name_plural = "Class Performance Summaries"
+    
+    def __str__(self):
+        return f"{self.school_class} - {self.subject} - Term {self.term}"
+    
+    @property
+    def total(self):
+        return self.exceeding + self.meeting + self.approaching + self.below
+
+class ReferenceDataVersion(models.Model):
+    """Single row bumped whenever academic years, subjects or report comments change.
+
+    Each worker process caches that reference data (see reports.reference)
+    and reloads it when it sees a new version here.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Reference data version {self.version}"
+
+class SearchEntry(models.Model):
+    """Normalized search text for one Student or StudentContact.
+
+    Kept in sync on save (see reports.search) and indexed with SQLite FTS5
+    or a Postgres trigram index, so lookups don't scan the source tables.
+    """
+    KINDS = [
+        ('student', 'Student'),
+        ('contact', 'Student Contact'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.PositiveBigIntegerField()
+    # The class teacher for students, the owner for contacts
+    teacher = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=200)
+    detail = models.CharField(max_length=255, blank=True)
+    terms = models.TextField()
+    
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        indexes = [
+            models.Index(fields=['teacher', 'kind'], name='searchentry_teacher_idx'),
+        ]
+        verbose_name_plural = "Search Entries"
     
     def __str__(self):
-        return f"{self.child_name} - {self.parent_name} ({self.get_class_level_display()})"
\ No newline at end of file
+        return f"{self.get_kind_display()}: {self.title}"
@@ -0,0 +1,154 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of ``OFFSET``, each page link carries the sort key of the last (or
+first) row shown, and the next page is fetched with ``WHERE key > cursor``
+on the same ordering. With an index matching the ordering every page costs
+the same as the first, and rows added or removed meanwhile don't shift the
+pages. The primary key is appended to the ordering so the key is unique.
+
+Totals come from ``estimated_count``, which caches ``COUNT(*)`` for a short
+while rather than running it on every render.
+"""
+
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+def _encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _after(fields, values):
+    """Q matching rows that sort after ``values`` in the ``fields`` ordering"""
+    condition = Q()
+    equal = Q()
+    for field, value in zip(fields, values):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        condition |= equal & Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _reverse(fields):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in fields]
+
+
+class KeysetPage:
+    def __init__(self, items, fields, query, has_next, has_previous):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self._fields = fields
+        self._query = query
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cursor(self, item):
+        return _encode_cursor([getattr(item, field.lstrip('-')) for field in self._fields])
+
+    def _link(self, **params):
+        query = self._query.copy()
+        for key in ('after', 'before'):
+            query.pop(key, None)
+        query.update(params)
+        return f'?{query.urlencode()}'
+
+    @property
+    def next_link(self):
+        return self._link(after=self._cursor(self.items[-1])) if self.has_next and self.items else None
+
+    @property
+    def previous_link(self):
+        return self._link(before=self._cursor(self.items[0])) if self.has_previous and self.items else None
+
+    @property
+    def first_link(self):
+        return self._link()
+
+    @property
+    def is_first(self):
+        return not self.has_previous
+
+
+def keyset_paginate(request, queryset, ordering, per_page):
+    """Return the KeysetPage of ``queryset`` selected by the ``after``/``before`` query parameters"""
+    model = queryset.model
+    fields = list(ordering)
+    if fields[-1].lstrip('-') not in ('pk', 'id'):
+        fields.append('-id' if fields[-1].startswith('-') else 'id')
+
+    def cursor_values(param):
+        values = _decode_cursor(request.GET.get(param, ''))
+        if values is None or len(values) != len(fields):
+            return None
+        try:
+            return [model._meta.get_field(field.lstrip('-')).to_python(value) for field, value in zip(fields, values)]
+        except Exception:
+            # A mangled or outdated link; start from the first page
+            return None
+
+    def key(item):
+        return [getattr(item, field.lstrip('-')) for field in fields]
+
+    def first_page():
+        rows = list(queryset.order_by(*fields)[:per_page + 1])
+        return rows[:per_page], len(rows) > per_page, False
+
+    before = cursor_values('before')
+    after = None if before is not None else cursor_values('after')
+    if before is not None:
+        # Walk backwards from the cursor, then put the rows back in order
+        rows = list(queryset.filter(_after(_reverse(fields), before)).order_by(*_reverse(fields))[:per_page + 1])
+        has_previous = len(rows) > per_page
+        items = rows[:per_page][::-1]
+        # The cursor row itself may have been deleted since the link was made
+        has_next = bool(items) and queryset.filter(_after(fields, key(items[-1]))).exists()
+    elif after is not None:
+        rows = list(queryset.filter(_after(fields, after)).order_by(*fields)[:per_page + 1])
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_previous = True
+    else:
+        items, has_next, has_previous = first_page()
+    if not items and (before is not None or after is not None):
+        # Nothing left beyond the cursor (rows deleted, or a link past the
+        # end); show the first page rather than an empty one
+        items, has_next, has_previous = first_page()
+    return KeysetPage(items, fields, request.GET, has_next, has_previous)
+
+
+def estimated_count(queryset, page=None):
+    """Row count for display, cached for ``PAGINATION_COUNT_CACHE_SECONDS``.
+
+    When ``page`` is the only page its length is the exact count and no
+    query is run.
+    """
+    if page is not None and page.is_first and not page.has_next:
+        return len(page)
+    sql, params = queryset.query.sql_with_params()
+    key = 'rowcount:' + hashlib.sha256(f'{sql}{params}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT_CACHE_SECONDS)
+    return count
@@ -0,0 +1,202 @@
+"""
+Class performance statistics.
+
+``ClassPerformanceSummary`` holds one row per (class, subject, term,
+academic year) with a count for each performance level. Single saves and
+deletes of an ``AssessmentResult`` adjust the affected counts in place (see
+reports.signals); bulk writes, which send no signals, recompute the groups
+they touched with ``refresh_summaries``. ``rebuild_summaries`` recomputes
+everything and backs the ``rebuild_performance_summaries`` command.
+
+Analytics pages read the summary rows, so their cost depends on the number
+of groups rather than the number of results.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import AssessmentResult, ClassPerformanceSummary, Student
+
+LEVELS = [code for code, _ in AssessmentResult.PERFORMANCE_LEVELS]
+
+
+def _group_counts(results):
+    """Per-group level counts for an AssessmentResult queryset, computed in the database"""
+    return (
+        results.values('student__school_class', 'subject', 'term', 'academic_year')
+        .annotate(**{level: Count('id', filter=Q(performance_level=level)) for level in LEVELS})
+        .order_by()
+    )
+
+
+def _summaries(rows):
+    return [
+        ClassPerformanceSummary(
+            school_class_id=row['student__school_class'],
+            subject_id=row['subject'],
+            term=row['term'],
+            academic_year_id=row['academic_year'],
+            **{level: row[level] for level in LEVELS},
+        )
+        for row in rows
+    ]
+
+
+def adjust_summary(school_class_id, subject_id, term, academic_year_id, level, delta):
+    """Add ``delta`` to one level count, creating or removing the group row as needed"""
+    group = ClassPerformanceSummary.objects.filter(
+        school_class_id=school_class_id,
+        subject_id=subject_id,
+        term=term,
+        academic_year_id=academic_year_id,
+    )
+    changes = {level: F(level) + delta, 'updated_at': timezone.now()}
+    if delta < 0:
+        # Drop groups that no longer have any results. There is nothing to
+        # take away from a group that doesn't exist (its class or subject may
+        # be being deleted along with the result)
+        if group.update(**changes):
+            group.filter(**{level: 0 for level in LEVELS}).delete()
+        return
+    if group.update(**changes):
+        return
+    ClassPerformanceSummary.objects.get_or_create(
+        school_class_id=school_class_id,
+        subject_id=subject_id,
+        term=term,
+        academic_year_id=academic_year_id,
+    )
+    group.update(**changes)
+
+
+def summary_entry(result, school_class_id=None):
+    """``(school_class_id, subject_id, term, academic_year_id, level)`` for a result"""
+    if school_class_id is None:
+        school_class_id = Student.objects.filter(pk=result.student_id).values_list('school_class_id', flat=True).first()
+    if school_class_id is None:
+        return None
+    return (school_class_id, result.subject_id, result.term, result.academic_year_id, result.performance_level)
+
+
+def stored_summary_entry(result_pk):
+    """``(student_id, summary entry)`` for a result as it is currently stored, or None"""
+    row = AssessmentResult.objects.filter(pk=result_pk).values_list(
+        'student_id', 'student__school_class', 'subject', 'term', 'academic_year', 'performance_level'
+    ).first()
+    if row is None:
+        return None
+    return row[0], row[1:]
+
+
+def record_change(previous, current):
+    """Move one result's count from its ``previous`` summary entry to its ``current`` one"""
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous is not None:
+            *group, level = previous
+            adjust_summary(*group, level, -1)
+        if current is not None:
+            *group, level = current
+            adjust_summary(*group, level, 1)
+
+
+def move_student_results(student, previous_class_id):
+    """Move a student's result counts from ``previous_class_id`` to their current class"""
+    counts = (
+        AssessmentResult.objects.filter(student=student)
+        .values('subject_id', 'term', 'academic_year_id', 'performance_level')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        for row in counts:
+            group = (row['subject_id'], row['term'], row['academic_year_id'])
+            adjust_summary(previous_class_id, *group, row['performance_level'], -row['count'])
+            adjust_summary(student.school_class_id, *group, row['performance_level'], row['count'])
+
+
+def refresh_summaries(school_class_ids, subject, term, academic_year):
+    """Recompute the groups for one subject and term in the given classes"""
+    with transaction.atomic():
+        ClassPerformanceSummary.objects.filter(
+            school_class_id__in=school_class_ids,
+            subject=subject,
+            term=term,
+            academic_year=academic_year,
+        ).delete()
+        results = AssessmentResult.objects.filter(
+            student__school_class_id__in=school_class_ids,
+            subject=subject,
+            term=term,
+            academic_year=academic_year,
+        )
+        ClassPerformanceSummary.objects.bulk_create(_summaries(_group_counts(results)))
+
+
+def rebuild_summaries(academic_year=None, batch_size=1000):
+    """Recompute every summary row, or those of one academic year; returns the number of groups"""
+    summaries = ClassPerformanceSummary.objects.all()
+    results = AssessmentResult.objects.all()
+    if academic_year is not None:
+        summaries = summaries.filter(academic_year=academic_year)
+        results = results.filter(academic_year=academic_year)
+    with transaction.atomic():
+        summaries.delete()
+        created = ClassPerformanceSummary.objects.bulk_create(_summaries(_group_counts(results)), batch_size=batch_size)
+    return len(created)
+
+
+def _with_levels(row):
+    """Attach ``total`` and a ``levels`` list of (code, label, count, percent) to a summary row"""
+    total = sum(row[level] for level in LEVELS)
+    row['total'] = total
+    row['levels'] = [
+        (code, label, row[code], round(row[code] * 100 / total) if total else 0)
+        for code, label in AssessmentResult.PERFORMANCE_LEVELS
+    ]
+    return row
+
+
+def class_performance(school_class):
+    """Summary rows for a class's academic year, grouped as ``[(subject, [row per term])]``"""
+    summaries = (
+        ClassPerformanceSummary.objects.filter(
+            school_class=school_class,
+            academic_year_id=school_class.academic_year_id,
+        )
+        .values('subject__name', 'term', *LEVELS)
+        .order_by('subject__name', 'term')
+    )
+    subjects = {}
+    for row in summaries:
+        terms = subjects.setdefault(row['subject__name'], {})
+        terms[row['term']] = _with_levels(row)
+    return [
+        (subject, [terms.get(term) for term, _ in AssessmentResult.TERMS])
+        for subject, terms in subjects.items()
+    ]
+
+
+def school_performance(academic_year, term=None):
+    """Level counts for an academic year summed per class and per subject"""
+    summaries = ClassPerformanceSummary.objects.filter(academic_year=academic_year)
+    if term is not None:
+        summaries = summaries.filter(term=term)
+    # Annotations can't reuse the level column names, so sum into level__sum
+    level_sums = {f'{level}__sum': Sum(level) for level in LEVELS}
+
+    def rows(values):
+        for row in values.annotate(**level_sums):
+            for level in LEVELS:
+                row[level] = row.pop(f'{level}__sum')
+            yield _with_levels(row)
+
+    return {
+        'by_class': list(rows(
+            summaries.values('school_class_id', 'school_class__name', 'school_class__teacher__username')
+            .order_by('school_class__name')
+        )),
+        'by_subject': list(rows(summaries.values('subject_id', 'subject__name').order_by('subject__name'))),
+    }
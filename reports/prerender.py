@@ -0,0 +1,89 @@
+"""
+Term-close pre-rendering of report cards.
+
+``prerender_report_cards`` renders every student with results for a term
+ahead of the results release and records each PDF in the PrerenderedReport
+manifest together with the results fingerprint it was rendered from.
+``download_report`` serves the stored file while the fingerprint still
+matches, so only students whose results changed afterwards are rendered
+live. Each PDF is recorded as soon as it is written, which makes a run
+resumable, and students whose manifest entry is still current are skipped,
+which makes re-runs incremental.
+"""
+
+from django.core.files.base import ContentFile
+
+from .batch import collect_report_card_data, render_report_cards
+from .models import PrerenderedReport, Student
+from .rendering import LAYOUT_VERSION
+from .report_cache import results_fingerprints
+
+
+def manifest_fingerprint(fingerprint):
+    # Layout changes must invalidate pre-rendered files too
+    return f"v{LAYOUT_VERSION}:{fingerprint}"
+
+
+def open_prerendered_report(student, fingerprint):
+    """Return the pre-rendered PDF for a student opened for reading, or None if out of date"""
+    entry = PrerenderedReport.objects.filter(
+        student=student,
+        academic_year_id=student.school_class.academic_year_id,
+        fingerprint=manifest_fingerprint(fingerprint),
+    ).first()
+    if entry is None or not entry.pdf:
+        return None
+    try:
+        return entry.pdf.storage.open(entry.pdf.name, 'rb')
+    except FileNotFoundError:
+        return None
+
+
+def stale_students(academic_year, term):
+    """Students with results for the term whose pre-rendered report is missing or out of date"""
+    students = Student.objects.filter(
+        school_class__academic_year=academic_year,
+        assessmentresult__academic_year=academic_year,
+        assessmentresult__term=term,
+    ).distinct()
+    student_ids = list(students.values_list('id', flat=True))
+    fingerprints = results_fingerprints(student_ids)
+    current = dict(
+        PrerenderedReport.objects.filter(student_id__in=student_ids, academic_year=academic_year)
+        .values_list('student_id', 'fingerprint')
+    )
+    return {
+        student_id: fingerprint
+        for student_id, fingerprint in fingerprints.items()
+        if current.get(student_id) != manifest_fingerprint(fingerprint)
+    }
+
+
+def prerender_report_cards(academic_year, term, workers=None, chunk_size=200, progress=None):
+    """Render every stale report card for the term and return how many were written"""
+    stale = stale_students(academic_year, term)
+    student_ids = sorted(stale)
+    rendered = 0
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        cards = collect_report_card_data(Student.objects.filter(id__in=chunk))
+        for student, pdf in render_report_cards(cards, workers=workers):
+            _store(student, academic_year, term, stale[student.id], pdf)
+            rendered += 1
+        if progress:
+            progress(rendered, len(student_ids))
+    return rendered
+
+
+def _store(student, academic_year, term, fingerprint, pdf):
+    entry, _ = PrerenderedReport.objects.get_or_create(
+        student=student,
+        academic_year=academic_year,
+        defaults={'term': term},
+    )
+    if entry.pdf:
+        entry.pdf.delete(save=False)
+    entry.pdf.save(f"{academic_year.pk}/{student.student_id}.pdf", ContentFile(pdf), save=False)
+    entry.term = term
+    entry.fingerprint = manifest_fingerprint(fingerprint)
+    entry.save()
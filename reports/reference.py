@@ -0,0 +1,102 @@
+"""
+Process-local cache of reference data: the current academic year, subjects
+and report comment templates.
+
+These rarely change but are read on most teacher pages. Each worker process
+keeps one copy, tagged with the version stored in the ReferenceDataVersion
+row. Saving or deleting an AcademicYear, Subject or ReportComment bumps that
+version (see reports.signals); every process compares its copy against the
+row at most once every ``REFERENCE_DATA_RECHECK_SECONDS`` and reloads when
+it is behind, so a change reaches all gunicorn workers within that interval.
+The process that made the change drops its copy straight away.
+
+The cached model instances are shared between requests and must not be
+modified.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import AcademicYear, ReferenceDataVersion, ReportComment, Subject
+
+
+class ReferenceData:
+    def __init__(self, version):
+        self.version = version
+        self.current_year = AcademicYear.objects.filter(current=True).first()
+        self.subjects = list(Subject.objects.order_by('name'))
+        self.subjects_by_id = {subject.id: subject for subject in self.subjects}
+        self.report_comments = {}
+        for subject_id, level, comment in ReportComment.objects.order_by('id').values_list(
+            'subject_id', 'performance_level', 'template_comment'
+        ):
+            self.report_comments.setdefault((subject_id, level), []).append(comment)
+
+
+class _Cache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._checked_at = None
+
+    def get(self):
+        now = time.monotonic()
+        with self._lock:
+            data, checked_at = self._data, self._checked_at
+            if data is not None and now - checked_at < settings.REFERENCE_DATA_RECHECK_SECONDS:
+                return data
+            version = stored_version()
+            if data is None or data.version != version:
+                data = self._data = ReferenceData(version)
+            self._checked_at = now
+            return data
+
+    def clear(self):
+        with self._lock:
+            self._data = None
+
+
+_cache = _Cache()
+
+
+def stored_version():
+    return ReferenceDataVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_version():
+    """Tell every worker process to reload its reference data"""
+    if not ReferenceDataVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        _, created = ReferenceDataVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+        if not created:
+            ReferenceDataVersion.objects.filter(pk=1).update(version=F('version') + 1)
+    _cache.clear()
+    # Data reloaded before the change commits would be tagged with the new
+    # version, so drop it again once the change is visible
+    transaction.on_commit(_cache.clear)
+
+
+def clear():
+    """Drop this process's copy, e.g. between tests"""
+    _cache.clear()
+
+
+def current_academic_year():
+    return _cache.get().current_year
+
+
+def subjects():
+    """All subjects ordered by name"""
+    return _cache.get().subjects
+
+
+def get_subject(subject_id):
+    return _cache.get().subjects_by_id.get(subject_id)
+
+
+def report_comments(subject_id, performance_level):
+    """Template comments for a subject and performance level"""
+    return _cache.get().report_comments.get((subject_id, performance_level), [])
@@ -0,0 +1,108 @@
+"""
+Report card rendering engine.
+
+``render_report`` turns plain report card data (see ``reports.report_data``)
+into PDF bytes. It never touches the database or the ORM, so the view, the
+batch jobs and worker processes all share it. Paragraph and table styles are
+built once per process on first use rather than on every report.
+
+ReportLab takes longer to import than the rest of the project together, and
+this module is imported at startup (for LAYOUT_VERSION) by every process,
+so it is only imported when the first report is rendered.
+"""
+
+import io
+from functools import lru_cache
+
+# Bump whenever the report card layout changes so cached PDFs are re-rendered
+LAYOUT_VERSION = 1
+
+RESULTS_HEADER = ['Subject', 'Performance Level', 'Teacher Comment']
+RESULTS_COLUMN_INCHES = [2, 2, 3]
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Return the paragraph styles and results table style shared by every report"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1,  # Center aligned
+    )
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    return {
+        'title': title_style,
+        'normal': styles['Normal'],
+        'heading': styles['Heading2'],
+        'body': styles['BodyText'],
+        'table': table_style,
+    }
+
+
+def render_report(student_data):
+    """Render a report card to PDF and return the document bytes"""
+    buffer = io.BytesIO()
+    render_report_to(student_data, buffer)
+    return buffer.getvalue()
+
+
+def render_report_to(student_data, output):
+    """Render a report card to PDF, writing it to the binary file object ``output``"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    styles = report_styles()
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    elements = [Paragraph("ACADEMIC REPORT CARD", styles['title'])]
+
+    # Student Information
+    student_info = [
+        f"Student: {student_data['student_name']}",
+        f"Student ID: {student_data['student_id']}",
+        f"Class: {student_data['class_name']}",
+        f"Academic Year: {student_data['academic_year']}",
+        f"Date Generated: {student_data['generated']}"
+    ]
+    for info in student_info:
+        elements.append(Paragraph(info, styles['normal']))
+        elements.append(Spacer(1, 12))
+
+    elements.append(Spacer(1, 24))
+
+    # Group results by term
+    term_results = {}
+    for term, subject, performance, comment in student_data['results']:
+        term_results.setdefault(term, []).append([subject, performance, comment or "No comment"])
+
+    # One table per term
+    for term in sorted(term_results):
+        elements.append(Paragraph(f"TERM {term} RESULTS", styles['heading']))
+        elements.append(Spacer(1, 12))
+        table = Table([RESULTS_HEADER] + term_results[term], colWidths=[width * inch for width in RESULTS_COLUMN_INCHES])
+        table.setStyle(styles['table'])
+        elements.append(table)
+        elements.append(Spacer(1, 24))
+
+    if not student_data['results']:
+        elements.append(Paragraph("No assessment results available yet.", styles['body']))
+
+    doc.build(elements)
@@ -0,0 +1,146 @@
+"""
+On-disk cache for rendered report card PDFs.
+
+Entries are content addressed: the key is derived from the student, their
+academic year and a fingerprint of their results, so any change to the
+results produces a new key and stale entries are simply never read again.
+Saving or deleting a result, or renaming the class, year or a subject
+printed on the card, also drops the affected entries eagerly (see
+``reports.signals``) and the cache is trimmed back to ``max_bytes`` by
+evicting the least recently used files.
+
+Each process keeps a running total of the cache size instead of walking the
+directory on every write. The total is only recounted from disk when it
+passes ``max_bytes``, or after ``rescan_seconds`` to pick up what other
+processes wrote.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import AssessmentResult
+from .rendering import LAYOUT_VERSION
+
+
+def _fingerprint(count, last_modified):
+    return f"{count}:{last_modified.isoformat() if last_modified else ''}"
+
+
+def results_fingerprint(student):
+    """Cheap summary of a student's results that changes whenever they do"""
+    summary = AssessmentResult.objects.filter(student=student).aggregate(
+        last_modified=Max('date_modified'),
+        count=Count('id'),
+    )
+    return _fingerprint(summary['count'], summary['last_modified'])
+
+
+def results_fingerprints(student_ids):
+    """``results_fingerprint`` for many students in a single query"""
+    summaries = AssessmentResult.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        last_modified=Max('date_modified'),
+        count=Count('id'),
+    ).order_by()
+    fingerprints = {student_id: _fingerprint(0, None) for student_id in student_ids}
+    for summary in summaries:
+        fingerprints[summary['student_id']] = _fingerprint(summary['count'], summary['last_modified'])
+    return fingerprints
+
+
+def report_cache_key(student, fingerprint):
+    raw = f"v{LAYOUT_VERSION}:{student.pk}:{student.school_class.academic_year_id}:{fingerprint}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ReportCache:
+    rescan_seconds = 300
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        # Bytes in the cache as of the last scan plus what this process has
+        # written since; None until the first scan
+        self.total_bytes = None
+        self.scanned_at = 0
+
+    def _path(self, student_id, key):
+        return self.directory / str(student_id) / f"{key}.pdf"
+
+    def open(self, student_id, key):
+        """Return the cached PDF opened for reading, or None on a miss"""
+        path = self._path(student_id, key)
+        try:
+            pdf = path.open('rb')
+        except FileNotFoundError:
+            return None
+        # Bump the modification time so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return pdf
+
+    def set(self, student_id, key, fileobj):
+        """Copy a rendered PDF from ``fileobj`` into the cache and rewind it"""
+        path = self._path(student_id, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        fileobj.seek(0)
+        with os.fdopen(fd, 'wb') as tmp:
+            shutil.copyfileobj(fileobj, tmp)
+            size = tmp.tell()
+        fileobj.seek(0)
+        os.replace(tmp_path, path)
+        self._added(size)
+        return path
+
+    def _added(self, size):
+        if self.total_bytes is None or time.monotonic() - self.scanned_at > self.rescan_seconds:
+            self.evict()
+            return
+        self.total_bytes += size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def invalidate(self, student_id):
+        shutil.rmtree(self.directory / str(student_id), ignore_errors=True)
+
+    def evict(self):
+        """Recount the cache and remove least recently used entries until it fits in max_bytes"""
+        self.scanned_at = time.monotonic()
+        entries = []
+        total = 0
+        for path in self.directory.glob('*/*.pdf'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        self.total_bytes = total
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.total_bytes = total
+            if total <= self.max_bytes:
+                break
+
+
+@lru_cache(maxsize=None)
+def get_report_cache():
+    return ReportCache(settings.REPORT_CACHE_DIR, settings.REPORT_CACHE_MAX_BYTES)
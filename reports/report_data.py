@@ -0,0 +1,62 @@
+"""
+Plain report card data for ``reports.rendering``.
+
+Results are fetched as tuples with ``values_list`` so building the data for a
+report card never instantiates AssessmentResult or Subject models.
+"""
+
+from django.utils import timezone
+
+from .models import AssessmentResult
+
+# Columns fetched per result, in the order the renderer expects them
+RESULT_FIELDS = ('term', 'subject__name', 'performance_level', 'teacher_comment')
+
+PERFORMANCE_LABELS = dict(AssessmentResult.PERFORMANCE_LEVELS)
+
+
+def labelled_rows(rows):
+    """Swap the performance level codes in raw result tuples for their display labels"""
+    return [
+        (term, subject, PERFORMANCE_LABELS.get(level, level), comment)
+        for term, subject, level, comment in rows
+    ]
+
+
+def result_rows(results):
+    """Turn an AssessmentResult queryset into ``(term, subject, performance, comment)`` tuples"""
+    return labelled_rows(results.order_by('term', 'subject__name').values_list(*RESULT_FIELDS))
+
+
+def report_card_data(student, rows, generated=None):
+    """Collect everything the report card needs from a student and their result rows"""
+    generated = generated or timezone.now()
+    return {
+        'student_name': f"{student.first_name} {student.last_name}",
+        'student_id': student.student_id,
+        'class_name': student.school_class.name,
+        'academic_year': str(student.school_class.academic_year),
+        'generated': generated.strftime('%Y-%m-%d'),
+        'results': rows,
+    }
+
+
+def report_filename(student_data):
+    generated = student_data['generated'].replace('-', '')
+    return f"report_{student_data['student_id']}_{generated}.pdf"
+
+
+def sample_report_card(result_count, student_id='BENCH001'):
+    """Synthetic report card data for benchmarks"""
+    levels = list(PERFORMANCE_LABELS.values())
+    return {
+        'student_name': 'Sample Student',
+        'student_id': student_id,
+        'class_name': 'Grade 5A',
+        'academic_year': '2025-2026',
+        'generated': '2025-12-01',
+        'results': [
+            (i % 3 + 1, f'Subject {i // 3}', levels[i % len(levels)], 'Consistent effort this term. ' * 4)
+            for i in range(result_count)
+        ],
+    }
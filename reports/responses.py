@@ -0,0 +1,95 @@
+"""
+File responses with HTTP Range support.
+
+Django's FileResponse streams a file in blocks but always sends the whole
+body. ``ranged_file_response`` adds single-range requests on top of it so
+download managers and PDF viewers can resume or fetch parts of a report.
+"""
+
+import io
+import re
+
+from django.http import FileResponse, HttpResponse
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _FileRange:
+    """Read-only view of ``length`` bytes of a file starting at its current position"""
+
+    def __init__(self, fileobj, length):
+        self._file = fileobj
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def _parse_range(header, size):
+    """Return ``(start, end)`` for a single byte range, None to send the whole file
+    (no range, or one that is malformed or asks for several parts), or False
+    if the range can't be satisfied"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Malformed or multi-range requests get the full file
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # Syntactically invalid, so ignored (RFC 7233 section 2.1)
+        return None
+    if start >= size:
+        return False
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def ranged_file_response(request, fileobj, filename, content_type='application/octet-stream'):
+    """Stream ``fileobj`` as an attachment, honouring a single HTTP Range if one was requested"""
+    fileobj.seek(0, io.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+
+    byte_range = None
+    if request.method == 'GET' and 'HTTP_RANGE' in request.META:
+        byte_range = _parse_range(request.META['HTTP_RANGE'], size)
+
+    if byte_range is False:
+        fileobj.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(fileobj, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        fileobj.seek(start)
+        response = FileResponse(
+            _FileRange(fileobj, end - start + 1),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+            status=206,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,242 @@
+"""
+Search over students and student contacts.
+
+Each Student and StudentContact has a SearchEntry holding its normalized
+words: lower-cased, accents removed, codes and phone numbers also stored
+run together (``st0042``, ``0712345678``). Entries are written on save by
+the signal handlers in reports.signals and by the bulk import paths, and
+``rebuild_search_index`` recreates them all.
+
+Every query word must match the start of a stored word. On SQLite the
+words are indexed by an FTS5 table with prefix indexes; on PostgreSQL by a
+pg_trgm GIN index. Other databases fall back to a ``LIKE`` scan of the
+entries, which is still narrower than the source tables.
+
+SQLite rebuilds a table to alter it, which drops the FTS5 triggers; run
+``rebuild_search_index`` after any migration that alters SearchEntry.
+"""
+
+import re
+import unicodedata
+from urllib.parse import urlencode
+
+from django.db import OperationalError, connection, transaction
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+from . import importers
+from .models import SearchEntry, Student, StudentContact
+
+MIN_QUERY_LENGTH = 2
+SEARCH_CANDIDATES = 200
+BATCH_SIZE = 1000
+
+FTS_TABLE = 'reports_searchentry_fts'
+
+SQLITE_INDEX = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "terms, content='reports_searchentry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS reports_searchentry_fts_insert AFTER INSERT ON reports_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, terms) VALUES (new.id, new.terms); END",
+    "CREATE TRIGGER IF NOT EXISTS reports_searchentry_fts_delete AFTER DELETE ON reports_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, terms) VALUES ('delete', old.id, old.terms); END",
+    "CREATE TRIGGER IF NOT EXISTS reports_searchentry_fts_update AFTER UPDATE ON reports_searchentry BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, terms) VALUES ('delete', old.id, old.terms); "
+    f"INSERT INTO {FTS_TABLE}(rowid, terms) VALUES (new.id, new.terms); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP_INDEX = [
+    "DROP TRIGGER IF EXISTS reports_searchentry_fts_insert",
+    "DROP TRIGGER IF EXISTS reports_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS reports_searchentry_fts_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS reports_searchentry_terms_trgm ON reports_searchentry USING gin (terms gin_trgm_ops)",
+]
+POSTGRES_DROP_INDEX = [
+    "DROP INDEX IF EXISTS reports_searchentry_terms_trgm",
+]
+
+# Database name -> whether it has the FTS5 table
+_fts_tables = {}
+
+
+def install_index(db):
+    """Create the database-specific text index over SearchEntry.terms on connection ``db``"""
+    statements = SQLITE_INDEX if db.vendor == 'sqlite' else POSTGRES_INDEX if db.vendor == 'postgresql' else []
+    with db.cursor() as cursor:
+        for sql in statements:
+            try:
+                cursor.execute(sql)
+            except OperationalError:
+                if db.vendor != 'sqlite':
+                    raise
+                # SQLite built without FTS5; searches fall back to LIKE
+                break
+    _fts_tables.clear()
+
+
+def remove_index(db):
+    statements = SQLITE_DROP_INDEX if db.vendor == 'sqlite' else POSTGRES_DROP_INDEX if db.vendor == 'postgresql' else []
+    with db.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    _fts_tables.clear()
+
+
+def words(text):
+    """Lower-case words of ``text`` with accents removed"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r'[^\W_]+', text.casefold())
+
+
+def normalize(*values, codes=(), phones=()):
+    """Space-separated search terms, with a leading space so word prefixes can be matched with LIKE"""
+    terms = []
+    for value in values:
+        terms.extend(words(value))
+    terms.extend(code.lower() for code in map(importers.normalize_code, codes) if code)
+    terms.extend(phone for phone in map(importers.normalize_phone, phones) if phone)
+    return ' ' + ' '.join(dict.fromkeys(terms))
+
+
+def query_terms(query):
+    """Words to look for; a query of digits and separators is treated as one phone or ID number"""
+    terms = words(query)
+    if len(terms) > 1 and all(term.isdigit() for term in terms):
+        return [importers.normalize_phone(query)]
+    return terms
+
+
+def student_entry(student, entry_class=SearchEntry):
+    """Unsaved SearchEntry for ``student``, whose school_class should already be loaded"""
+    school_class = student.school_class
+    return entry_class(
+        kind='student',
+        object_id=student.pk,
+        teacher_id=school_class.teacher_id,
+        title=f"{student.first_name} {student.last_name}",
+        detail=f"{student.student_id} · {school_class.name}",
+        terms=normalize(student.first_name, student.last_name, student.student_id, codes=[student.student_id]),
+    )
+
+
+def contact_entry(contact, entry_class=SearchEntry):
+    return entry_class(
+        kind='contact',
+        object_id=contact.pk,
+        teacher_id=contact.teacher_id,
+        title=contact.child_name,
+        detail=f"{contact.parent_name} · {contact.parent_phone}",
+        terms=normalize(
+            contact.child_name, contact.parent_name, contact.parent_phone, contact.parent_id_number,
+            contact.child_admission_number,
+            codes=[contact.parent_id_number, contact.child_admission_number],
+            phones=[contact.parent_phone, contact.emergency_contact],
+        ),
+    )
+
+
+def save_entries(entries, entry_class=SearchEntry):
+    """Insert or replace ``entries``, matched on kind and object_id"""
+    for start in range(0, len(entries), BATCH_SIZE):
+        entry_class.objects.bulk_create(
+            entries[start:start + BATCH_SIZE],
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['teacher', 'title', 'detail', 'terms'],
+        )
+
+
+def index_students(students):
+    save_entries([student_entry(student) for student in students])
+
+
+def index_contacts(contacts):
+    save_entries([contact_entry(contact) for contact in contacts])
+
+
+def remove(kind, object_ids):
+    SearchEntry.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def rebuild_index():
+    """Recreate every SearchEntry from the source tables and return how many were written"""
+    count = 0
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        install_index(connection)
+        for queryset, entry in [
+            (Student.objects.select_related('school_class').order_by('pk'), student_entry),
+            (StudentContact.objects.order_by('pk'), contact_entry),
+        ]:
+            batch = []
+            for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.append(entry(obj))
+                if len(batch) == BATCH_SIZE:
+                    save_entries(batch)
+                    count += len(batch)
+                    batch = []
+            save_entries(batch)
+            count += len(batch)
+    return count
+
+
+def _has_fts_table():
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+def matches(query, kind=None, teacher=None):
+    """SearchEntries where every word of ``query`` starts a stored word.
+
+    Returns an empty queryset for queries shorter than MIN_QUERY_LENGTH.
+    """
+    entries = SearchEntry.objects.all()
+    if kind:
+        entries = entries.filter(kind=kind)
+    if teacher is not None:
+        entries = entries.filter(teacher=teacher)
+    terms = query_terms(query)
+    if sum(map(len, terms)) < MIN_QUERY_LENGTH:
+        return entries.none()
+    if connection.vendor == 'sqlite' and _has_fts_table():
+        # Terms are only letters and digits, so they're safe to quote
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        return entries.filter(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression]))
+    for term in terms:
+        entries = entries.filter(terms__contains=f' {term}')
+    return entries
+
+
+def result_url(entry):
+    if entry.kind == 'student':
+        return reverse('reports:student_profile', args=[entry.object_id])
+    return f"{reverse('reports:student_contact_list')}?{urlencode({'q': entry.title})}"
+
+
+def search(query, teacher=None, limit=10):
+    """Up to ``limit`` matches as dicts for the JSON search endpoint, in title order.
+
+    Only the first SEARCH_CANDIDATES matches the index returns are sorted,
+    so a short query matching thousands of rows stays fast; typing more
+    narrows it down.
+    """
+    entries = list(matches(query, teacher=teacher)[:SEARCH_CANDIDATES])
+    entries.sort(key=lambda entry: (entry.title.casefold(), entry.kind, entry.object_id))
+    return [
+        {
+            'kind': entry.kind,
+            'kind_label': entry.get_kind_display(),
+            'title': entry.title,
+            'detail': entry.detail,
+            'url': result_url(entry),
+        }
+        for entry in entries[:limit]
+    ]
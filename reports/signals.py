@@ -0,0 +1,149 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import performance, reference, search, stats
+from .models import (
+    AcademicYear, AssessmentResult, AssignmentSubmission, PrerenderedReport, ReportComment, SchoolClass, Student, StudentContact, Subject,
+    SubjectAssignment,
+)
+from .report_cache import get_report_cache
+
+
+@receiver([post_save, post_delete], sender=AssessmentResult)
+def invalidate_report_card(sender, instance, **kwargs):
+    """Drop cached report cards for the student whose results changed"""
+    get_report_cache().invalidate(instance.student_id)
+
+
+@receiver([post_save, post_delete], sender=Student)
+def invalidate_student_report_card(sender, instance, **kwargs):
+    # Name, ID and class are printed on the report card too
+    get_report_cache().invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+def expire_prerendered_report_card(sender, instance, created, **kwargs):
+    # The results fingerprint doesn't cover student details, so mark the
+    # pre-rendered file stale and let the next term-close run replace it
+    if not created:
+        PrerenderedReport.objects.filter(student=instance).update(fingerprint='')
+
+
+def expire_report_cards(student_ids):
+    """Drop cached and pre-rendered report cards for ``student_ids``"""
+    student_ids = list(student_ids)
+    report_cache = get_report_cache()
+    for student_id in student_ids:
+        report_cache.invalidate(student_id)
+    PrerenderedReport.objects.filter(student_id__in=student_ids).update(fingerprint='')
+
+
+@receiver(post_save, sender=SchoolClass)
+def expire_class_report_cards(sender, instance, created, raw, **kwargs):
+    # The class name is printed on the report card
+    if not created and not raw:
+        expire_report_cards(instance.student_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=AcademicYear)
+def expire_year_report_cards(sender, instance, created, raw, **kwargs):
+    # So is the academic year's name
+    if not created and not raw:
+        expire_report_cards(Student.objects.filter(school_class__academic_year=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Subject)
+def expire_subject_report_cards(sender, instance, created, raw, **kwargs):
+    # And every subject name on it
+    if not created and not raw:
+        expire_report_cards(
+            AssessmentResult.objects.filter(subject=instance).values_list('student_id', flat=True).distinct()
+        )
+
+
+@receiver(pre_save, sender=AssessmentResult)
+def remember_stored_result(sender, instance, raw, **kwargs):
+    # Fixture loads skip the summary table; run rebuild_performance_summaries after them
+    if not raw and instance.pk:
+        instance._stored_summary_entry = performance.stored_summary_entry(instance.pk)
+
+
+@receiver(post_save, sender=AssessmentResult)
+def update_performance_summary(sender, instance, raw, **kwargs):
+    """Move the result's count between ClassPerformanceSummary groups"""
+    if raw:
+        return
+    stored = getattr(instance, '_stored_summary_entry', None)
+    instance._stored_summary_entry = None
+    previous, school_class_id = None, None
+    if stored is not None:
+        student_id, previous = stored
+        if student_id == instance.student_id:
+            school_class_id = previous[0]
+    performance.record_change(previous, performance.summary_entry(instance, school_class_id))
+
+
+@receiver(post_delete, sender=AssessmentResult)
+def remove_from_performance_summary(sender, instance, **kwargs):
+    performance.record_change(performance.summary_entry(instance), None)
+
+
+@receiver(pre_save, sender=Student)
+def remember_student_class(sender, instance, raw, **kwargs):
+    if not raw and instance.pk:
+        instance._stored_class_id = Student.objects.filter(pk=instance.pk).values_list('school_class_id', flat=True).first()
+
+
+@receiver(post_save, sender=Student)
+def move_student_performance(sender, instance, created, raw, **kwargs):
+    """Results are counted against the student's class, so follow them when it changes"""
+    stored_class_id = getattr(instance, '_stored_class_id', None)
+    instance._stored_class_id = None
+    if not created and not raw and stored_class_id not in (None, instance.school_class_id):
+        performance.move_student_results(instance, stored_class_id)
+
+
+@receiver([post_save, post_delete], sender=AcademicYear)
+@receiver([post_save, post_delete], sender=Subject)
+@receiver([post_save, post_delete], sender=ReportComment)
+def reference_data_changed(sender, raw=False, **kwargs):
+    """Make every worker reload its cached current year, subjects and comments"""
+    if not raw:
+        reference.bump_version()
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, raw, **kwargs):
+    # Fixture loads skip the search index; run rebuild_search_index after them
+    if not raw:
+        search.index_students([instance])
+
+
+@receiver(post_save, sender=StudentContact)
+def index_contact(sender, instance, raw, **kwargs):
+    if not raw:
+        search.index_contacts([instance])
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=StudentContact)
+def remove_from_search(sender, instance, **kwargs):
+    search.remove('student' if sender is Student else 'contact', [instance.pk])
+
+
+@receiver(post_save, sender=SchoolClass)
+def reindex_class_students(sender, instance, created, raw, **kwargs):
+    """Student entries show the class name and belong to the class teacher"""
+    if not created and not raw:
+        search.index_students(instance.student_set.all())
+
+
+@receiver([post_save, post_delete], sender=AssignmentSubmission)
+def invalidate_submission_stats(sender, instance, **kwargs):
+    stats.invalidate_submission_stats(instance.assignment_id)
+
+
+@receiver([post_save, post_delete], sender=SubjectAssignment)
+def invalidate_assignment_stats(sender, instance, **kwargs):
+    # Lateness and percentages depend on due_date and max_points
+    stats.invalidate_assignment_stats(instance)
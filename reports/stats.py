@@ -0,0 +1,246 @@
+"""
+Aggregate statistics computed in the database.
+
+Every function here runs a fixed number of queries no matter how many
+classes, students or results are involved; nothing loads rows into Python
+just to count them.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, F, FloatField, Max, Min, Q, Value, Window
+from django.db.models.functions import Cast, Floor, Least, RowNumber
+
+from .models import AssessmentResult, AssignmentSubmission, SchoolClass, Student, Subject, SubjectAssignment
+
+
+def _percent(part, whole):
+    if not whole:
+        return 0
+    return min(100, round(part * 100 / whole))
+
+
+def dashboard_stats(user):
+    """Class, student and result counts for a teacher's dashboard in three queries.
+
+    Results are counted for each class's own academic year. Completion for a
+    term is the share of (student, subject) pairs that have a result.
+    """
+    classes = list(
+        SchoolClass.objects.filter(teacher=user)
+        .select_related('academic_year')
+        .annotate(student_count=Count('student'))
+        .order_by('name')
+    )
+    result_counts = (
+        AssessmentResult.objects.filter(
+            student__school_class__teacher=user,
+            academic_year=F('student__school_class__academic_year'),
+        )
+        .values('student__school_class', 'term')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    counts = {(row['student__school_class'], row['term']): row['count'] for row in result_counts}
+    subject_count = Subject.objects.count()
+
+    term_totals = {term: 0 for term, _ in AssessmentResult.TERMS}
+    for school_class in classes:
+        school_class.term_completion = []
+        school_class.result_count = 0
+        expected = school_class.student_count * subject_count
+        for term, label in AssessmentResult.TERMS:
+            count = counts.get((school_class.id, term), 0)
+            school_class.result_count += count
+            term_totals[term] += count
+            school_class.term_completion.append({
+                'term': term,
+                'label': label,
+                'count': count,
+                'percent': _percent(count, expected),
+            })
+
+    total_students = sum(school_class.student_count for school_class in classes)
+    expected = total_students * subject_count
+    return {
+        'classes': classes,
+        'total_classes': len(classes),
+        'total_students': total_students,
+        'total_results': sum(term_totals.values()),
+        'subject_count': subject_count,
+        'term_completion': [
+            {'term': term, 'label': label, 'count': term_totals[term], 'percent': _percent(term_totals[term], expected)}
+            for term, label in AssessmentResult.TERMS
+        ],
+    }
+
+
+# ===== Assignment submissions =====
+
+HISTOGRAM_BUCKETS = 10
+LATE = Q(submitted_at__gt=F('assignment__due_date'))
+
+
+class Median(Aggregate):
+    """Continuous median; PostgreSQL only (see _medians for the fallback)"""
+    function = 'PERCENTILE_CONT'
+    name = 'Median'
+    template = '%(function)s(0.5) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+
+def _grade_percent():
+    """The grade as a percentage of the assignment's max_points"""
+    return Cast('grade', FloatField()) * 100 / Cast('assignment__max_points', FloatField())
+
+
+def _medians(submissions, group):
+    """Median grade percentage per ``group`` value (or for everything, keyed None) using window functions.
+
+    Numbers each group's graded submissions by percentage and returns only
+    the middle one or two rows of each group.
+    """
+    partition = [F(group)] if group else None
+    middle = (
+        submissions.filter(grade__isnull=False)
+        .annotate(
+            percent=_grade_percent(),
+            position=Window(RowNumber(), partition_by=partition, order_by=[F('percent').asc(), F('id').asc()]),
+            size=Window(Count('id'), partition_by=partition),
+        )
+        .filter(Q(position=(F('size') + 1) / 2) | Q(position=(F('size') + 2) / 2))
+        .values_list(group or 'assignment', 'percent')
+        .order_by()
+    )
+    values = {}
+    for key, percent in middle:
+        values.setdefault(key if group else None, []).append(percent)
+    return {key: sum(percents) / len(percents) for key, percents in values.items()}
+
+
+def _summaries(submissions, group=None):
+    """Submission counts and grade percentages, per ``group`` value or for everything (keyed None)"""
+    aggregates = {
+        'submitted': Count('id'),
+        'late': Count('id', filter=LATE),
+        'graded': Count('grade'),
+        'mean': Avg(_grade_percent()),
+        'lowest': Min(_grade_percent()),
+        'highest': Max(_grade_percent()),
+    }
+    postgres = connection.vendor == 'postgresql'
+    if postgres:
+        aggregates['median'] = Median(_grade_percent())
+    if group:
+        rows = {row.pop(group): row for row in submissions.values(group).annotate(**aggregates).order_by()}
+    else:
+        rows = {None: submissions.aggregate(**aggregates)}
+    if not postgres:
+        medians = _medians(submissions, group)
+        for key, row in rows.items():
+            row['median'] = medians.get(key)
+    for row in rows.values():
+        for name in ('mean', 'median', 'lowest', 'highest'):
+            if row[name] is not None:
+                row[name] = round(row[name], 1)
+    return rows
+
+
+def grade_histogram(submissions):
+    """Graded submissions counted in HISTOGRAM_BUCKETS equal bands of grade percentage"""
+    bucket = Least(Floor(_grade_percent() * HISTOGRAM_BUCKETS / 100), Value(HISTOGRAM_BUCKETS - 1.0))
+    counts = {
+        int(row['bucket']): row['count']
+        for row in submissions.filter(grade__isnull=False).annotate(bucket=bucket).values('bucket').annotate(count=Count('id')).order_by()
+    }
+    width = 100 // HISTOGRAM_BUCKETS
+    largest = max(counts.values(), default=0)
+    return [
+        {
+            'label': f'{index * width}-{(index + 1) * width}%',
+            'count': counts.get(index, 0),
+            'percent': _percent(counts.get(index, 0), largest),
+        }
+        for index in range(HISTOGRAM_BUCKETS)
+    ]
+
+
+def _expected_submissions(teacher_id, academic_year_id):
+    """Students in the teacher's classes that year, who are the ones set the assignment"""
+    return Student.objects.filter(school_class__teacher_id=teacher_id, school_class__academic_year_id=academic_year_id).count()
+
+
+def _with_rate(summary, expected):
+    return {**summary, 'expected': expected, 'submission_rate': _percent(summary['submitted'], expected)}
+
+
+def assignment_stats_key(assignment):
+    return f'assignment-stats:{assignment.pk}:{assignment.stats_version}'
+
+
+def subject_stats_key(subject_id, teacher_id, academic_year_id):
+    """Cache key covering the current version of every assignment in the group (one query)"""
+    versions = SubjectAssignment.objects.filter(
+        subject_id=subject_id, created_by_id=teacher_id, academic_year_id=academic_year_id,
+    ).order_by('pk').values_list('pk', 'stats_version')
+    digest = hashlib.sha256(repr(list(versions)).encode()).hexdigest()
+    return f'subject-assignment-stats:{subject_id}:{teacher_id}:{academic_year_id}:{digest}'
+
+
+def invalidate_assignment_stats(assignment):
+    """Make every process recompute the statistics covering ``assignment``, and load its new version"""
+    if invalidate_submission_stats(assignment.pk):
+        assignment.refresh_from_db(fields=['stats_version'])
+
+
+def invalidate_submission_stats(assignment_id):
+    """Make every process recompute the statistics covering assignment ``assignment_id``"""
+    return SubjectAssignment.objects.filter(pk=assignment_id).update(stats_version=F('stats_version') + 1)
+
+
+def assignment_stats(assignment):
+    """Submission rate, lateness and grade distribution for one assignment.
+
+    Cached until the assignment or a submission to it changes (see
+    reports.signals), which bumps its ``stats_version``; ``assignment`` must
+    be freshly loaded for that to be seen.
+    """
+    key = assignment_stats_key(assignment)
+    stats = cache.get(key)
+    if stats is None:
+        submissions = AssignmentSubmission.objects.filter(assignment=assignment)
+        summary = _summaries(submissions)[None]
+        stats = _with_rate(summary, _expected_submissions(assignment.created_by_id, assignment.academic_year_id))
+        stats['histogram'] = grade_histogram(submissions)
+        cache.set(key, stats, settings.ASSIGNMENT_STATS_CACHE_SECONDS)
+    return stats
+
+
+def subject_assignment_stats(subject, teacher, academic_year):
+    """The statistics of every assignment a teacher set in a subject that year, and of all of them together"""
+    key = subject_stats_key(subject.pk, teacher.pk, academic_year.pk)
+    stats = cache.get(key)
+    if stats is None:
+        assignments = list(
+            SubjectAssignment.objects.filter(subject=subject, created_by=teacher, academic_year=academic_year)
+            .order_by('-due_date')
+            .values('id', 'title', 'due_date', 'max_points')
+        )
+        submissions = AssignmentSubmission.objects.filter(
+            assignment__subject=subject, assignment__created_by=teacher, assignment__academic_year=academic_year
+        )
+        expected = _expected_submissions(teacher.pk, academic_year.pk)
+        per_assignment = _summaries(submissions, 'assignment')
+        empty = {'submitted': 0, 'late': 0, 'graded': 0, 'mean': None, 'median': None, 'lowest': None, 'highest': None}
+        for assignment in assignments:
+            assignment['stats'] = _with_rate(per_assignment.get(assignment['id'], empty), expected)
+        stats = {
+            'assignments': assignments,
+            'overall': _with_rate(_summaries(submissions)[None], expected * len(assignments)),
+            'histogram': grade_histogram(submissions),
+        }
+        cache.set(key, stats, settings.ASSIGNMENT_STATS_CACHE_SECONDS)
+    return stats
@@ -1,3 +1,1376 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import parse_qs
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from school_reporting.middleware import view_timings
+from school_reporting.testing import QueryBudgetMixin
+
+from . import batch, grading, importers, performance, prerender, reference, search, stats
+from .gradebook import save_gradebook
+from .models import (
+    AcademicYear, AssessmentResult, AssignmentSubmission, ClassPerformanceSummary, PrerenderedReport, ReferenceDataVersion,
+    ReportComment, SchoolClass, Student, StudentContact, Subject, SubjectAssignment,
+)
+from .report_cache import ReportCache, get_report_cache
+from .responses import ranged_file_response
+
+User = get_user_model()
+
+SUBJECT_COUNT = 5
+
+
+def build_school():
+    """A current year with one class, its teacher, a parent, an administrator and five subjects"""
+    school = SimpleNamespace()
+    school.teacher = User.objects.create_user('teacher', password='pw', user_type='teacher')
+    school.parent = User.objects.create_user('parent', password='pw', user_type='parent')
+    school.admin = User.objects.create_user('admin', password='pw', user_type='admin', is_staff=True)
+    school.year = AcademicYear.objects.create(name='2025-2026', current=True)
+    school.school_class = SchoolClass.objects.create(name='Grade 5A', teacher=school.teacher, academic_year=school.year)
+    school.subjects = Subject.objects.bulk_create([
+        Subject(name=f'Subject {index}', code=f'S{index}') for index in range(SUBJECT_COUNT)
+    ])
+    school.students = []
+    return school
+
+
+def add_students(school, count):
+    """Add students with a result per subject, an assignment and a submission each, and a contact"""
+    start = len(school.students)
+    students = Student.objects.bulk_create([
+        Student(
+            student_id=f'ST{index:04d}',
+            first_name='Student',
+            last_name=f'{index:04d}',
+            school_class=school.school_class,
+            date_of_birth=datetime.date(2015, 1, 1),
+        )
+        for index in range(start, start + count)
+    ])
+    if not school.students:
+        students[0].user = school.parent
+        students[0].save()
+    school.students.extend(students)
+
+    AssessmentResult.objects.bulk_create([
+        AssessmentResult(
+            student=student,
+            subject=subject,
+            term=1,
+            academic_year=school.year,
+            performance_level='meeting',
+        )
+        for student in students
+        for subject in school.subjects
+    ])
+    due = timezone.now() + datetime.timedelta(days=7)
+    assignments = SubjectAssignment.objects.bulk_create([
+        SubjectAssignment(
+            title=f'Assignment {index}',
+            description='Read chapter one.',
+            subject=school.subjects[index % SUBJECT_COUNT],
+            due_date=due,
+            created_by=school.teacher,
+            academic_year=school.year,
+        )
+        for index in range(start, start + count)
+    ])
+    school.assignment = SubjectAssignment.objects.filter(created_by=school.teacher).order_by('id').first()
+    # Every student submits their own assignment and the first one, except
+    # the parent's child, who has submitted nothing yet
+    child = school.students[0]
+    AssignmentSubmission.objects.bulk_create([
+        AssignmentSubmission(assignment=submitted, student=student, submission_text='Done')
+        for assignment, student in zip(assignments, students)
+        if student != child
+        for submitted in {assignment, school.assignment}
+    ])
+    school.submission = AssignmentSubmission.objects.filter(assignment=school.assignment).order_by('id').first()
+    StudentContact.objects.bulk_create([
+        StudentContact(
+            teacher=school.teacher,
+            class_level='grade5',
+            parent_name=f'Parent {student.last_name}',
+            parent_id_number=f'{student.pk:08d}',
+            parent_phone=f'07{student.pk:08d}',
+            child_name=student.full_name(),
+        )
+        for student in students
+    ])
+
+
+# (URL name, who requests it, query budget). Budgets are for the whole
+# request, including the session and user lookups, and must not depend on
+# how many students, results, assignments or contacts there are.
+VIEW_BUDGETS = [
+    ('teacher_dashboard', 'teacher', 5),
+    ('parent_dashboard', 'parent', 4),
+    ('profile', 'teacher', 2),
+    ('reports:class_detail', 'teacher', 4),
+    ('reports:student_results', 'parent', 4),
+    ('reports:add_result', 'teacher', 4),
+    ('reports:gradebook', 'teacher', 7),
+    ('reports:add_student', 'teacher', 4),
+    ('reports:import_students', 'teacher', 3),
+    ('reports:download_report', 'parent', 4),
+    ('reports:class_report_cards', 'teacher', 6),
+    ('reports:academic_year_report_cards', 'admin', 5),
+    ('reports:class_performance', 'teacher', 4),
+    ('reports:school_performance', 'admin', 5),
+    ('reports:student_profile', 'teacher', 4),
+    ('reports:assignment_list', 'teacher', 3),
+    ('reports:assignment_list_by_subject', 'teacher', 3),
+    ('reports:assignment_create', 'teacher', 3),
+    ('reports:assignment_detail', 'teacher', 4),
+    ('reports:subject_assignment_stats', 'teacher', 3),
+    ('reports:assignment_edit', 'teacher', 4),
+    ('reports:assignment_delete', 'teacher', 3),
+    ('reports:submit_assignment', 'parent', 5),
+    ('reports:grade_assignment', 'teacher', 3),
+    ('reports:grading_queue', 'teacher', 4),
+    ('reports:student_contact_home', 'teacher', 2),
+    ('reports:student_contact_class_select', 'teacher', 2),
+    ('reports:student_contact_list', 'teacher', 3),
+    ('reports:student_contact_import', 'teacher', 2),
+    ('reports:student_contact_export', 'teacher', 3),
+    ('reports:student_contact_form', 'teacher', 2),
+]
+
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every page runs a fixed number of queries, whether a class has 10 students or 100"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            REPORT_CACHE_DIR=f'{self.cache_dir}/cache',
+            REPORT_PRERENDER_DIR=f'{self.cache_dir}/prerendered',
+            REPORT_BATCH_WORKERS=1,
+            # A recheck of the reference data version landing in one run but
+            # not the other would show up as an extra query
+            REFERENCE_DATA_RECHECK_SECONDS=3600,
+        )
+        self.settings_override.enable()
+        get_report_cache.cache_clear()
+        cache.clear()
+        reference.clear()
+        self.school = build_school()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        get_report_cache.cache_clear()
+        reference.clear()
+        shutil.rmtree(self.cache_dir)
+
+    def url(self, name):
+        school = self.school
+        kwargs = {
+            'reports:class_detail': {'pk': school.school_class.id},
+            'reports:student_results': {'student_id': school.students[0].id},
+            'reports:add_result': {'student_id': school.students[0].id},
+            'reports:gradebook': {'class_id': school.school_class.id},
+            'reports:add_student': {'class_id': school.school_class.id},
+            'reports:import_students': {'class_id': school.school_class.id},
+            'reports:download_report': {'student_id': school.students[0].id},
+            'reports:class_report_cards': {'class_id': school.school_class.id},
+            'reports:academic_year_report_cards': {'year_id': school.year.id},
+            'reports:class_performance': {'class_id': school.school_class.id},
+            'reports:student_profile': {'student_id': school.students[0].id},
+            'reports:assignment_list_by_subject': {'subject_id': school.subjects[0].id},
+            'reports:subject_assignment_stats': {'subject_id': school.subjects[0].id},
+            'reports:assignment_detail': {'assignment_id': school.assignment.id},
+            'reports:assignment_edit': {'assignment_id': school.assignment.id},
+            'reports:assignment_delete': {'assignment_id': school.assignment.id},
+            'reports:submit_assignment': {'assignment_id': school.assignment.id},
+            'reports:grade_assignment': {'submission_id': school.submission.id},
+            'reports:grading_queue': {'assignment_id': school.assignment.id},
+            'reports:student_contact_form': {'class_level': 'grade5'},
+        }.get(name, {})
+        url = reverse(name, kwargs=kwargs)
+        if name == 'reports:gradebook':
+            url += f'?subject={school.subjects[0].id}&term=1'
+        return url
+
+    def request_page(self, name, role):
+        """Request a page, consuming streamed content, and return the recorded queries"""
+        self.client.force_login(getattr(self.school, role))
+        url = self.url(name)
+        # Warm per-process caches (reference data, report card styles) first
+        self.fetch(url)
+        with self.recordQueries() as queries:
+            response = self.fetch(url)
+        self.assertEqual(response.status_code, 200, f"{name} at {url}")
+        return queries
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        response.close()
+        return response
+
+    def test_view_query_budgets(self):
+        add_students(self.school, 10)
+        small = {name: self.request_page(name, role) for name, role, _ in VIEW_BUDGETS}
+
+        add_students(self.school, 90)
+        for name, role, budget in VIEW_BUDGETS:
+            with self.subTest(view=name):
+                large = self.request_page(name, role)
+                if len(large) > budget:
+                    self.fail(f"{name} ran {len(large)} queries, budget is {budget}:\n{large.describe()}")
+                self.assertSameQueries(small[name], large, name)
+
+
+class ReportFilesMixin:
+    """Keep cached and pre-rendered report cards in a temporary directory"""
+
+    def setUp(self):
+        super().setUp()
+        self.files_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            REPORT_CACHE_DIR=f'{self.files_dir}/cache',
+            REPORT_PRERENDER_DIR=f'{self.files_dir}/prerendered',
+            REPORT_BATCH_WORKERS=1,
+        )
+        self.settings_override.enable()
+        get_report_cache.cache_clear()
+        reference.clear()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        get_report_cache.cache_clear()
+        reference.clear()
+        shutil.rmtree(self.files_dir)
+        super().tearDown()
+
+    def cached_reports(self, student):
+        return list((get_report_cache().directory / str(student.pk)).glob('*.pdf'))
+
+
+class ReportCardCacheTests(ReportFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.school = build_school()
+        add_students(self.school, 2)
+        self.child = self.school.students[0]
+        self.client.force_login(self.school.parent)
+        self.url = reverse('reports:download_report', kwargs={'student_id': self.child.id})
+
+    def download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_cached_until_results_change(self):
+        pdf = self.download()
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(len(self.cached_reports(self.child)), 1)
+        self.assertEqual(self.download(), pdf)
+
+        result = AssessmentResult.objects.filter(student=self.child).first()
+        result.performance_level = 'exceeding'
+        result.save()
+        self.assertEqual(self.cached_reports(self.child), [])
+
+    def test_renaming_what_the_card_prints_expires_it(self):
+        PrerenderedReport.objects.create(
+            student=self.child, academic_year=self.school.year, term=1, fingerprint='v1:current',
+        )
+        for rename in [self.school.school_class, self.school.year, self.school.subjects[0]]:
+            with self.subTest(renamed=type(rename).__name__):
+                self.download()
+                self.assertEqual(len(self.cached_reports(self.child)), 1)
+                PrerenderedReport.objects.update(fingerprint='v1:current')
+
+                rename.name += ' (renamed)'
+                rename.save()
+                self.assertEqual(self.cached_reports(self.child), [])
+                self.assertEqual(PrerenderedReport.objects.get().fingerprint, '')
+
+
+class ReportCacheEvictionTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = ReportCache(self.directory, max_bytes=250)
+
+    def store(self, student_id, key):
+        self.cache.set(student_id, key, io.BytesIO(b'x' * 100))
+
+    def test_only_rescans_when_the_total_passes_max_bytes(self):
+        self.store(1, 'a')
+        with mock.patch.object(Path, 'glob') as glob:
+            self.store(2, 'b')
+        glob.assert_not_called()
+        self.assertEqual(self.cache.total_bytes, 200)
+
+        os.utime(os.path.join(self.directory, '1', 'a.pdf'), (0, 0))
+        self.store(3, 'c')
+        self.assertEqual(self.cache.total_bytes, 200)
+        self.assertEqual(self.cache.open(1, 'a'), None)
+        self.cache.open(2, 'b').close()
+
+    def test_rescans_to_count_other_processes_writes(self):
+        self.store(1, 'a')
+        other = ReportCache(self.directory, max_bytes=250)
+        other.set(2, 'b', io.BytesIO(b'x' * 100))
+        other.set(3, 'c', io.BytesIO(b'x' * 100))
+        self.assertEqual(self.cache.total_bytes, 100)
+
+        self.cache.scanned_at -= ReportCache.rescan_seconds + 1
+        self.store(4, 'd')
+        self.assertEqual(self.cache.total_bytes, 200)
+        self.assertEqual(len(list(Path(self.directory).glob('*/*.pdf'))), 2)
+
+
+class BatchReportCardTests(ReportFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.school = build_school()
+        add_students(self.school, 3)
+
+    def download_zip(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        return {name: archive.read(name) for name in archive.namelist()}
+
+    def test_class_zip_has_a_card_per_student(self):
+        self.client.force_login(self.school.teacher)
+        files = self.download_zip(reverse('reports:class_report_cards', kwargs={'class_id': self.school.school_class.id}))
+        self.assertEqual(
+            sorted(name.split('_')[1] for name in files),
+            sorted(student.student_id for student in self.school.students),
+        )
+        self.assertTrue(all(pdf.startswith(b'%PDF') for pdf in files.values()))
+
+    def test_year_zip_has_a_folder_per_class(self):
+        teacher = User.objects.create_user('teacher2', password='pw', user_type='teacher')
+        school_class = SchoolClass.objects.create(name='Grade 6B', teacher=teacher, academic_year=self.school.year)
+        Student.objects.create(
+            student_id='ST9999', first_name='Other', last_name='Class', school_class=school_class,
+            date_of_birth=datetime.date(2014, 1, 1),
+        )
+        self.client.force_login(self.school.admin)
+        files = self.download_zip(reverse('reports:academic_year_report_cards', kwargs={'year_id': self.school.year.id}))
+        folders = {}
+        for name in files:
+            folder, filename = name.split('/')
+            folders.setdefault(folder, []).append(filename.split('_')[1])
+        self.assertEqual(folders, {'grade-5a': ['ST0000', 'ST0001', 'ST0002'], 'grade-6b': ['ST9999']})
+
+    def test_access(self):
+        class_url = reverse('reports:class_report_cards', kwargs={'class_id': self.school.school_class.id})
+        year_url = reverse('reports:academic_year_report_cards', kwargs={'year_id': self.school.year.id})
+        other = User.objects.create_user('teacher2', password='pw', user_type='teacher')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(class_url).status_code, 404)
+        self.assertRedirects(self.client.get(year_url), reverse('dashboard'), fetch_redirect_response=False)
+
+        empty = SchoolClass.objects.create(name='Empty', teacher=other, academic_year=self.school.year)
+        response = self.client.get(reverse('reports:class_report_cards', kwargs={'class_id': empty.id}))
+        self.assertRedirects(response, reverse('reports:class_detail', kwargs={'pk': empty.id}), fetch_redirect_response=False)
+
+    def test_worker_processes_keep_the_order(self):
+        cards = batch.collect_report_cards(Student.objects.all())
+        serial = list(batch.render_report_cards(cards, workers=1))
+        parallel = list(batch.render_report_cards(cards, workers=2))
+        self.assertEqual([name for name, _ in parallel], [name for name, _ in serial])
+        self.assertTrue(all(pdf.startswith(b'%PDF') for _, pdf in parallel))
+
+
+class PrerenderTests(ReportFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.school = build_school()
+        add_students(self.school, 3)
+        self.child = self.school.students[0]
+
+    def prerender(self):
+        return prerender.prerender_report_cards(self.school.year, 1, workers=1, chunk_size=2)
+
+    def test_reruns_only_render_what_changed(self):
+        self.assertEqual(self.prerender(), 3)
+        self.assertEqual(PrerenderedReport.objects.count(), 3)
+        self.assertEqual(self.prerender(), 0)
+
+        result = AssessmentResult.objects.filter(student=self.child).first()
+        result.performance_level = 'below'
+        result.save()
+        self.assertEqual(self.prerender(), 1)
+
+        # Student details aren't in the fingerprint; saving the student expires the entry
+        self.child.first_name = 'Renamed'
+        self.child.save()
+        self.assertEqual(prerender.stale_students(self.school.year, 1).keys(), {self.child.pk})
+        self.assertEqual(self.prerender(), 1)
+
+        with mock.patch('reports.prerender.LAYOUT_VERSION', 'next'):
+            self.assertEqual(self.prerender(), 3)
+
+    def test_downloads_serve_the_prerendered_file_while_it_is_current(self):
+        self.prerender()
+        stored = PrerenderedReport.objects.get(student=self.child).pdf.read()
+        self.client.force_login(self.school.parent)
+        url = reverse('reports:download_report', kwargs={'student_id': self.child.id})
+        with mock.patch('reports.views.render_report_to') as render:
+            response = self.client.get(url)
+            self.assertEqual(b''.join(response.streaming_content), stored)
+        render.assert_not_called()
+
+        AssessmentResult.objects.filter(student=self.child).first().delete()
+        response = self.client.get(url)
+        self.assertNotEqual(b''.join(response.streaming_content), stored)
+
+    def test_command(self):
+        output = io.StringIO()
+        call_command('prerender_report_cards', term=1, workers=1, stdout=output)
+        self.assertIn('3 report cards pre-rendered', output.getvalue())
+
+
+def csv_upload(rows, name='upload.csv'):
+    return SimpleUploadedFile(name, '\n'.join(rows).encode())
+
+
+class StudentImportTests(TestCase):
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        add_students(self.school, 1)
+        User.objects.create_user('free_parent', password='pw', user_type='parent')
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        upload = csv_upload([
+            'Student ID,First Name,Last Name,Date of Birth,Parent Username',
+            'NEW001,Amina,Otieno,2015-03-01,free_parent',
+            'NEW002,Brian,Kamau,01/02/2015,',
+            'NEW001,Amina,Again,2015-03-01,',
+            'ST0000,Taken,Id,2015-03-01,',
+            'NEW003,No,Parent,2015-03-01,nobody',
+            'NEW004,Linked,Parent,2015-03-01,parent',
+            'NEW005,Second,Child,2015-03-01,free_parent',
+            'NEW006,Bad,Date,someday,',
+            ',,,,',
+        ])
+        report = importers.import_students(self.school.school_class, upload, chunk_size=3)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual(sorted(row for row, _ in report.errors), [4, 5, 6, 7, 8, 9])
+        messages = dict(report.errors)
+        self.assertIn('appears more than once', messages[4])
+        self.assertIn('already exists', messages[5])
+        self.assertIn('no parent account', messages[6])
+        self.assertIn('already linked', messages[7])
+        # Within the file as well as in the database, across chunks
+        self.assertIn('already linked', messages[8])
+        self.assertTrue(messages[9].startswith('date_of_birth:'))
+
+        amina = Student.objects.get(student_id='NEW001')
+        self.assertEqual(amina.school_class, self.school.school_class)
+        self.assertEqual(amina.user.username, 'free_parent')
+        self.assertEqual(Student.objects.get(student_id='NEW002').date_of_birth, datetime.date(2015, 2, 1))
+        # bulk_create skips signals, so the importer indexes the new rows itself
+        self.assertEqual([entry['title'] for entry in search.search('Kamau', teacher=self.school.teacher)], ['Brian Kamau'])
+
+    def test_xlsx_upload(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        workbook.active.append(['student_id', 'first_name', 'last_name', 'date_of_birth'])
+        workbook.active.append(['NEW010', 'Chebet', 'Mutai', datetime.date(2015, 5, 5)])
+        content = io.BytesIO()
+        workbook.save(content)
+        upload = SimpleUploadedFile('students.xlsx', content.getvalue())
+        report = importers.import_students(self.school.school_class, upload)
+        self.assertEqual((report.created, report.errors), (1, []))
+        self.assertEqual(Student.objects.get(student_id='NEW010').date_of_birth, datetime.date(2015, 5, 5))
+
+    def test_missing_columns_reject_the_file(self):
+        with self.assertRaisesMessage(ValidationError, 'date_of_birth'):
+            importers.import_students(self.school.school_class, csv_upload(['student_id,first_name,last_name', 'A,B,C']))
+
+    def test_upload_page(self):
+        self.client.force_login(self.school.teacher)
+        url = reverse('reports:import_students', kwargs={'class_id': self.school.school_class.id})
+        response = self.client.post(url, {'file': csv_upload([
+            'student_id,first_name,last_name,date_of_birth', 'NEW020,Dan,Mwangi,2015-01-01',
+        ])})
+        self.assertRedirects(response, reverse('reports:class_detail', kwargs={'pk': self.school.school_class.id}))
+
+        response = self.client.post(url, {'file': csv_upload([
+            'student_id,first_name,last_name,date_of_birth', 'NEW020,Dan,Mwangi,2015-01-01',
+        ])})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].errors, [(2, 'student_id: NEW020 already exists')])
+
+
+class ContactImportTests(TestCase):
+    HEADER = 'class_level,parent_name,parent_id_number,parent_phone,child_name,child_admission_number'
+
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        add_students(self.school, 1)
+        self.staging_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(IMPORT_STAGING_DIR=self.staging_dir)
+        self.settings_override.enable()
+        self.client.force_login(self.school.teacher)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.staging_dir)
+
+    def test_detects_duplicates_however_the_phone_is_written(self):
+        existing = StudentContact.objects.get()
+        upload = csv_upload([
+            self.HEADER,
+            'Grade 5,Jane Wanjiru,11223344,+254 712 345 678,Tom Wanjiru,ADM-1',
+            f'grade5,Someone,99999999,+254 {existing.parent_phone[1:]},{existing.child_name},',
+            'PP1,Jane Wanjiru,11223344,0712-345-678,Tom Wanjiru,',
+            'PP1,Jane Wanjiru,11223344,0712345678,Ann Wanjiru,adm 1',
+            'Grade 4,Jane Wanjiru,11223344,0712345678,Ann Wanjiru,',
+            'Grade 9,Bad Level,1,0700000000,Child,',
+        ])
+        report = importers.import_contacts(self.school.teacher, upload, dry_run=False)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([(row, match) for row, _, match in report.duplicates], [
+            (3, f'existing contact {existing.child_name} - {existing.parent_name}'),
+            (4, 'row 2 of this file'),
+            (5, 'row 2 of this file'),
+        ])
+        self.assertEqual([row for row, _ in report.errors], [7])
+        tom = StudentContact.objects.get(child_name='Tom Wanjiru')
+        self.assertEqual((tom.class_level, tom.parent_phone), ('grade5', '0712345678'))
+        self.assertEqual(StudentContact.objects.get(child_name='Ann Wanjiru').class_level, 'grade4')
+
+    def test_preview_then_confirm(self):
+        url = reverse('reports:student_contact_import')
+        response = self.client.post(url, {'file': csv_upload([
+            self.HEADER,
+            'grade5,Jane Wanjiru,11223344,+254 712 345 678,Tom Wanjiru,',
+            'grade5,Paul Otieno,55667788,0722000000,Sam Otieno,',
+        ])})
+        self.assertEqual(len(response.context['report'].new), 2)
+        self.assertEqual(StudentContact.objects.count(), 1)
+
+        response = self.client.post(url, {'confirm': '1'})
+        self.assertRedirects(response, reverse('reports:student_contact_list'), fetch_redirect_response=False)
+        self.assertEqual(StudentContact.objects.count(), 3)
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+    def test_confirm_lists_rows_that_stopped_validating(self):
+        url = reverse('reports:student_contact_import')
+        self.client.post(url, {'file': csv_upload([
+            self.HEADER,
+            'grade5,Jane Wanjiru,11223344,0712345678,Tom Wanjiru,',
+            'grade5,Paul Otieno,55667788,0722000000,Sam Otieno,',
+        ])})
+        # The file is re-read at confirm time; pretend a row became invalid
+        token = self.client.session['student_contact_import']['token']
+        with open(importers.staged_upload_path(token), 'w') as staged:
+            staged.write('\n'.join([
+                self.HEADER,
+                'grade5,Jane Wanjiru,11223344,0712345678,Tom Wanjiru,',
+                'grade5,Paul Otieno,55667788,,Sam Otieno,',
+            ]))
+
+        response = self.client.post(url, {'confirm': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].created, 1)
+        self.assertEqual([row for row, _ in response.context['report'].errors], [3])
+        self.assertContains(response, 'Errors (skipped)')
+
+    def test_abandoned_uploads_are_deleted_when_another_is_staged(self):
+        abandoned = importers.stage_upload(csv_upload([self.HEADER]))
+        recent = importers.stage_upload(csv_upload([self.HEADER]))
+        day_ago = time.time() - 24 * 60 * 60 - 1
+        os.utime(importers.staged_upload_path(abandoned), (day_ago, day_ago))
+
+        latest = importers.stage_upload(csv_upload([self.HEADER]))
+        self.assertEqual(sorted(os.listdir(self.staging_dir)), sorted([recent, latest]))
+
+
+class AdminContactExportTests(TestCase):
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        add_students(self.school, 2)
+        other = User.objects.create_user('teacher2', password='pw', user_type='teacher')
+        StudentContact.objects.create(
+            teacher=other, class_level='grade3', parent_name='Other Parent', parent_id_number='1',
+            parent_phone='0700000001', child_name='Other Child',
+        )
+        self.client.force_login(User.objects.create_superuser('root', password='pw'))
+        self.url = reverse('admin:reports_studentcontact_export')
+
+    def rows(self, response):
+        self.assertEqual(response.status_code, 200)
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))[1:]
+
+    def test_filters(self):
+        self.assertEqual(len(self.rows(self.client.get(self.url))), 3)
+        self.assertEqual(len(self.rows(self.client.get(self.url, {'teacher': self.school.teacher.pk}))), 2)
+        self.assertEqual(len(self.rows(self.client.get(self.url, {'class_level': 'grade3'}))), 1)
+
+    def test_bad_teacher_id_is_a_bad_request(self):
+        self.assertEqual(self.client.get(self.url, {'teacher': 'abc'}).status_code, 400)
+
+
+@override_settings(REFERENCE_DATA_RECHECK_SECONDS=60)
+class ReferenceDataTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        self.addCleanup(reference.clear)
+
+    def test_served_from_the_process_cache(self):
+        self.assertEqual(reference.current_academic_year(), self.school.year)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(reference.subjects()), SUBJECT_COUNT)
+            self.assertEqual(reference.get_subject(self.school.subjects[0].pk).name, 'Subject 0')
+
+    def test_changes_in_this_process_show_at_once(self):
+        reference.subjects()
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='Art', code='ART')
+        self.assertIn('Art', [subject.name for subject in reference.subjects()])
+
+        ReportComment.objects.create(subject=self.school.subjects[0], performance_level='meeting', template_comment='Steady work.')
+        self.assertEqual(reference.report_comments(self.school.subjects[0].pk, 'meeting'), ['Steady work.'])
+
+    def test_other_processes_catch_up_after_the_recheck_interval(self):
+        reference.subjects()
+        # Another worker renames a subject and bumps the version; this
+        # process's copy is untouched until it rechecks
+        Subject.objects.filter(pk=self.school.subjects[0].pk).update(name='Renamed')
+        ReferenceDataVersion.objects.update_or_create(pk=1, defaults={'version': reference.stored_version() + 1})
+
+        now = time.monotonic()
+        with mock.patch('reports.reference.time.monotonic', return_value=now + 30):
+            self.assertEqual(reference.get_subject(self.school.subjects[0].pk).name, 'Subject 0')
+        with mock.patch('reports.reference.time.monotonic', return_value=now + 61):
+            self.assertEqual(reference.get_subject(self.school.subjects[0].pk).name, 'Renamed')
+            # Once current, a recheck is a single query for the version
+            with self.assertNumQueries(0):
+                reference.subjects()
+        with mock.patch('reports.reference.time.monotonic', return_value=now + 130):
+            with self.assertNumQueries(1):
+                reference.subjects()
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        self.client.force_login(self.school.teacher)
+        view_timings.reset()
+        self.addCleanup(view_timings.reset)
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('profile'))
+        match = re.fullmatch(r'total;dur=([\d.]+), db;dur=([\d.]+);desc="(\d+) queries"', response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        total_ms, db_ms, count = float(match[1]), float(match[2]), int(match[3])
+        self.assertEqual(count, len(queries))
+        self.assertLessEqual(db_ms, total_ms)
+
+        with self.settings(SERVER_TIMING_HEADER=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('profile')))
+
+    def test_requests_over_budget_are_logged(self):
+        with self.assertNoLogs('school_reporting.timing'):
+            self.client.get(reverse('profile'))
+        with self.settings(REQUEST_VIEW_BUDGETS={'profile': (60000, 0)}):
+            with self.assertLogs('school_reporting.timing', 'WARNING') as logs:
+                self.client.get(reverse('profile'))
+        self.assertIn('Slow request GET /accounts/profile/ (profile)', logs.output[0])
+        self.assertIn('(budget 0)', logs.output[0])
+
+    def test_per_view_totals(self):
+        with self.settings(REQUEST_VIEW_BUDGETS={'profile': (60000, 0)}), self.assertLogs('school_reporting.timing'):
+            for _ in range(3):
+                self.client.get(reverse('profile'))
+        self.client.get(reverse('reports:assignment_list'))
+
+        self.client.force_login(self.school.admin)
+        timings = self.client.get(reverse('request_timings')).json()
+        self.assertEqual(timings['pid'], os.getpid())
+        rows = {row['view']: row for row in timings['views']}
+        self.assertEqual(rows['profile']['requests'], 3)
+        self.assertEqual(rows['profile']['over_budget'], 3)
+        self.assertEqual(rows['reports:assignment_list']['requests'], 1)
+        self.assertEqual(rows['reports:assignment_list']['over_budget'], 0)
+        self.assertGreater(rows['profile']['avg_queries'], 0)
+
+        self.client.post(reverse('request_timings'))
+        after_reset = self.client.get(reverse('request_timings')).json()
+        self.assertEqual([row['view'] for row in after_reset['views']], ['request_timings'])
+        self.assertGreater(after_reset['since'], timings['since'])
+
+    def test_timings_are_staff_only(self):
+        response = self.client.get(reverse('request_timings'))
+        self.assertEqual(response.status_code, 302)
+
+
+class RangeResponseTests(SimpleTestCase):
+    BODY = bytes(range(100))
+
+    def fetch(self, range_header=None):
+        headers = {'HTTP_RANGE': range_header} if range_header else {}
+        request = RequestFactory().get('/report.pdf', **headers)
+        response = ranged_file_response(request, io.BytesIO(self.BODY), 'report.pdf')
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_whole_file(self):
+        response, body = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.BODY)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_partial_content(self):
+        for header, start, end in [
+            ('bytes=10-19', 10, 19),
+            ('bytes=90-', 90, 99),
+            ('bytes=95-200', 95, 99),
+            ('bytes=-5', 95, 99),
+            ('bytes=-500', 0, 99),
+        ]:
+            with self.subTest(range=header):
+                response, body = self.fetch(header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.BODY[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/100')
+                self.assertEqual(int(response['Content-Length']), end - start + 1)
+
+    def test_ignored_ranges_send_the_whole_file(self):
+        for header in ['bytes=0-4,10-14', 'bytes=9-3', 'bytes=-', 'items=0-4', 'bytes=abc']:
+            with self.subTest(range=header):
+                response, body = self.fetch(header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(body, self.BODY)
+
+    def test_unsatisfiable_ranges(self):
+        for header in ['bytes=100-', 'bytes=150-160', 'bytes=-0']:
+            with self.subTest(range=header):
+                response, _ = self.fetch(header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */100')
+
+
+def summary_counts():
+    return set(ClassPerformanceSummary.objects.values_list(
+        'school_class', 'subject', 'term', 'academic_year', *performance.LEVELS,
+    ))
+
+
+class SummaryMixin:
+    def assertSummariesMatchRebuild(self):
+        """The incrementally kept summaries equal a recount from scratch"""
+        kept = summary_counts()
+        performance.rebuild_summaries()
+        self.assertEqual(kept, summary_counts())
+
+
+class GradebookTests(SummaryMixin, ReportFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.school = build_school()
+        add_students(self.school, 3)
+        performance.rebuild_summaries()
+        self.subject = self.school.subjects[0]
+
+    def save(self, levels, term=2):
+        entries = {student.pk: (level, '') for student, level in zip(self.school.students, levels)}
+        return save_gradebook(self.subject, term, self.school.year, entries)
+
+    def column(self, term=2):
+        return dict(
+            AssessmentResult.objects.filter(subject=self.subject, term=term)
+            .values_list('student_id', 'performance_level')
+        )
+
+    def test_resubmitting_counts_created_updated_and_unchanged_rows(self):
+        self.assertEqual(self.save(['meeting', 'below']), (2, 0))
+        self.assertEqual(self.save(['meeting', 'below', 'exceeding']), (1, 0))
+        self.assertEqual(self.save(['meeting', 'approaching', 'exceeding']), (0, 1))
+        self.assertEqual(self.save(['meeting', 'approaching', 'exceeding']), (0, 0))
+        students = self.school.students
+        self.assertEqual(self.column(), {
+            students[0].pk: 'meeting', students[1].pk: 'approaching', students[2].pk: 'exceeding',
+        })
+        self.assertSummariesMatchRebuild()
+
+    def test_updates_bump_date_modified(self):
+        self.save(['meeting', 'below'])
+        before = dict(AssessmentResult.objects.filter(term=2).values_list('student_id', 'date_modified'))
+        self.save(['meeting', 'exceeding'])
+        after = dict(AssessmentResult.objects.filter(term=2).values_list('student_id', 'date_modified'))
+        unchanged, changed = self.school.students[:2]
+        self.assertEqual(after[unchanged.pk], before[unchanged.pk])
+        self.assertGreater(after[changed.pk], before[changed.pk])
+
+    def test_rows_created_concurrently_are_updated(self):
+        self.save(['meeting'])
+        # Another teacher saved the row after this one read the column
+        with mock.patch('reports.gradebook.existing_results', return_value={}):
+            self.assertEqual(self.save(['below']), (1, 0))
+        self.assertEqual(self.column(), {self.school.students[0].pk: 'below'})
+
+    def test_drops_cached_report_cards(self):
+        child = self.school.students[0]
+        self.client.force_login(self.school.parent)
+        b''.join(self.client.get(reverse('reports:download_report', kwargs={'student_id': child.id})).streaming_content)
+        self.assertEqual(len(self.cached_reports(child)), 1)
+        self.save(['exceeding'], term=1)
+        self.assertEqual(self.cached_reports(child), [])
+
+    def test_gradebook_page_saves_the_column(self):
+        self.client.force_login(self.school.teacher)
+        url = reverse('reports:gradebook', kwargs={'class_id': self.school.school_class.id})
+        query = f'?subject={self.subject.id}&term=2'
+        students = self.school.students
+        data = {'form-TOTAL_FORMS': 3, 'form-INITIAL_FORMS': 3}
+        for index, (student, level) in enumerate(zip(students, ['meeting', '', 'below'])):
+            data.update({f'form-{index}-student': student.pk, f'form-{index}-performance_level': level})
+        # A student from another class is ignored
+        other = Student.objects.create(
+            student_id='OTHER', first_name='Other', last_name='Student', date_of_birth=datetime.date(2015, 1, 1),
+            school_class=SchoolClass.objects.create(name='Grade 6A', teacher=self.school.admin, academic_year=self.school.year),
+        )
+        data.update({'form-TOTAL_FORMS': 4, 'form-3-student': other.pk, 'form-3-performance_level': 'meeting'})
+
+        response = self.client.post(url + query, data)
+        self.assertRedirects(response, url + query)
+        self.assertEqual(self.column(), {students[0].pk: 'meeting', students[2].pk: 'below'})
+        self.assertSummariesMatchRebuild()
+
+
+class PerformanceSummaryTests(SummaryMixin, TestCase):
+    """ClassPerformanceSummary follows single saves and deletes without a rebuild"""
+
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        add_students(self.school, 4)
+        other_teacher = User.objects.create_user('teacher2', password='pw', user_type='teacher')
+        self.other_class = SchoolClass.objects.create(name='Grade 5B', teacher=other_teacher, academic_year=self.school.year)
+        performance.rebuild_summaries()
+
+    def counts(self, school_class, subject, term=1):
+        row = ClassPerformanceSummary.objects.filter(school_class=school_class, subject=subject, term=term).values(*performance.LEVELS).first()
+        return {level: count for level, count in row.items() if count} if row else {}
+
+    def test_saves_and_deletes(self):
+        student = self.school.students[0]
+        subject = self.school.subjects[0]
+        result = AssessmentResult.objects.get(student=student, subject=subject)
+
+        result.performance_level = 'exceeding'
+        result.save()
+        self.assertEqual(self.counts(self.school.school_class, subject), {'meeting': 3, 'exceeding': 1})
+
+        result.term = 2
+        result.save()
+        self.assertEqual(self.counts(self.school.school_class, subject), {'meeting': 3})
+        self.assertEqual(self.counts(self.school.school_class, subject, term=2), {'exceeding': 1})
+
+        result.delete()
+        # Empty groups are removed
+        self.assertEqual(self.counts(self.school.school_class, subject, term=2), {})
+        self.assertFalse(ClassPerformanceSummary.objects.filter(term=2).exists())
+
+        AssessmentResult.objects.create(
+            student=student, subject=subject, term=3, academic_year=self.school.year, performance_level='below',
+        )
+        self.assertEqual(self.counts(self.school.school_class, subject, term=3), {'below': 1})
+        self.assertSummariesMatchRebuild()
+
+    def test_results_follow_a_student_to_a_new_class(self):
+        student = self.school.students[1]
+        student.school_class = self.other_class
+        student.save()
+        for subject in self.school.subjects:
+            self.assertEqual(self.counts(self.school.school_class, subject), {'meeting': 3})
+            self.assertEqual(self.counts(self.other_class, subject), {'meeting': 1})
+
+        # A result moved to a student in another class
+        result = AssessmentResult.objects.filter(student=self.school.students[2]).first()
+        result.student = student
+        result.term = 2
+        result.performance_level = 'approaching'
+        result.save()
+        self.assertEqual(self.counts(self.school.school_class, result.subject), {'meeting': 2})
+        self.assertEqual(self.counts(self.other_class, result.subject, term=2), {'approaching': 1})
+        self.assertSummariesMatchRebuild()
+
+    def test_random_changes_match_a_rebuild(self):
+        rng = random.Random(11)
+        classes = [self.school.school_class, self.other_class]
+        levels = performance.LEVELS
+        for _ in range(150):
+            operation = rng.choice(['create', 'update', 'delete', 'move'])
+            results = list(AssessmentResult.objects.all())
+            if operation == 'create':
+                student = rng.choice(self.school.students)
+                subject = rng.choice(self.school.subjects)
+                term = rng.choice([1, 2, 3])
+                AssessmentResult.objects.update_or_create(
+                    student=student, subject=subject, term=term, academic_year=self.school.year,
+                    defaults={'performance_level': rng.choice(levels)},
+                )
+            elif operation == 'update' and results:
+                result = rng.choice(results)
+                result.performance_level = rng.choice(levels)
+                new_term = rng.choice([1, 2, 3])
+                if not AssessmentResult.objects.filter(
+                    student=result.student_id, subject=result.subject_id, term=new_term, academic_year=self.school.year,
+                ).exclude(pk=result.pk).exists():
+                    result.term = new_term
+                result.save()
+            elif operation == 'delete' and results:
+                rng.choice(results).delete()
+            elif operation == 'move':
+                student = Student.objects.get(pk=rng.choice(self.school.students).pk)
+                student.school_class = rng.choice(classes)
+                student.save()
+        self.assertSummariesMatchRebuild()
+
+
+@override_settings(LIST_PAGE_SIZE=7)
+class KeysetPaginationTests(QueryBudgetMixin, TestCase):
+    """Paged lists visit every row once, in order, and later pages cost the same as the first"""
+
+    def setUp(self):
+        # Totals cached by earlier tests would belong to a different database
+        cache.clear()
+        reference.clear()
+        self.school = build_school()
+        add_students(self.school, 20)
+        self.client.force_login(self.school.teacher)
+
+    def walk(self, url):
+        """Follow Next links from ``url``, returning each page's response and query count"""
+        pages = []
+        while url:
+            with self.recordQueries() as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append((response, len(queries)))
+            next_link = response.context['students'].next_link
+            url = response.request['PATH_INFO'] + next_link if next_link else None
+        return pages
+
+    def test_class_roster_pages(self):
+        url = reverse('reports:class_detail', kwargs={'pk': self.school.school_class.id})
+        pages = self.walk(url)
+
+        seen = [student.last_name for response, _ in pages for student in response.context['students']]
+        self.assertEqual(seen, sorted(student.last_name for student in self.school.students))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual({response.context['student_count'] for response, _ in pages}, {20})
+        # The first page also counts the class; after that the total is cached
+        self.assertEqual(len({count for _, count in pages[1:]}), 1)
+        self.assertLessEqual(pages[1][1], pages[0][1])
+
+        # Previous from the last page returns the middle page
+        last = pages[-1][0].context['students']
+        response = self.client.get(url + last.previous_link)
+        self.assertEqual(
+            [student.pk for student in response.context['students']],
+            [student.pk for student in pages[1][0].context['students']],
+        )
+
+    def test_bad_cursor_shows_first_page(self):
+        url = reverse('reports:class_detail', kwargs={'pk': self.school.school_class.id})
+        response = self.client.get(url + '?after=not-a-cursor')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['students'].items[0].last_name, '0000')
+
+    def test_empty_cursor_page_shows_first_page(self):
+        url = reverse('reports:assignment_list')
+        pages = []
+        page_url = url
+        while page_url:
+            response = self.client.get(page_url)
+            pages.append(response.context['assignments'])
+            page_url = url + pages[-1].next_link if pages[-1].has_next else None
+        # A link past the last row, as left by rows deleted since it was made
+        past_end = pages[-1]._link(after=pages[-1]._cursor(pages[-1].items[-1]))
+        response = self.client.get(url + past_end)
+        self.assertEqual(response.status_code, 200)
+        page = response.context['assignments']
+        self.assertEqual([item.pk for item in page], [item.pk for item in pages[0]])
+        self.assertIsNone(page.previous_link)
+
+        # Previous from the second page knows there is a page after it
+        response = self.client.get(url + pages[2].previous_link)
+        page = response.context['assignments']
+        self.assertEqual([item.pk for item in page], [item.pk for item in pages[1]])
+        self.assertTrue(page.has_next)
+        self.assertTrue(page.has_previous)
+
+        # Previous past the first row finds nothing before it
+        before_start = pages[0]._link(before=pages[0]._cursor(pages[0].items[0]))
+        response = self.client.get(url + before_start)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item.pk for item in response.context['assignments']], [item.pk for item in pages[0]])
+
+    def test_contacts_and_assignments_page(self):
+        for name, key, total in [
+            ('reports:student_contact_list', 'contacts', 20),
+            ('reports:assignment_list', 'assignments', 20),
+        ]:
+            with self.subTest(view=name):
+                url = reverse(name)
+                seen = []
+                while url:
+                    response = self.client.get(url)
+                    page = response.context[key]
+                    seen.extend(item.pk for item in page)
+                    url = reverse(name) + page.next_link if page.has_next else None
+                self.assertEqual(len(seen), total)
+                self.assertEqual(len(set(seen)), total)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        self.student = Student.objects.create(
+            student_id='ST-0042',
+            first_name='Zoë',
+            last_name='Wanjiru',
+            school_class=self.school.school_class,
+            date_of_birth=datetime.date(2015, 1, 1),
+        )
+        self.contact = StudentContact.objects.create(
+            teacher=self.school.teacher,
+            class_level='grade5',
+            parent_name='Grace Otieno',
+            parent_id_number='12345678',
+            parent_phone='+254 712 345 678',
+            child_name='Brian Otieno',
+        )
+
+    def titles(self, query, teacher=None):
+        return sorted(entry.title for entry in search.matches(query, teacher=teacher or self.school.teacher))
+
+    def test_matches_word_prefixes_codes_and_phones(self):
+        self.assertEqual(self.titles('zoe wan'), ['Zoë Wanjiru'])
+        self.assertEqual(self.titles('st0042'), ['Zoë Wanjiru'])
+        self.assertEqual(self.titles('0712 345'), ['Brian Otieno'])
+        self.assertEqual(self.titles('otieno'), ['Brian Otieno'])
+        self.assertEqual(self.titles('z'), [])
+        self.assertEqual(self.titles('wanjiru', teacher=self.school.parent), [])
+
+    def test_index_follows_changes(self):
+        self.student.last_name = 'Kamau'
+        self.student.save()
+        self.assertEqual(self.titles('kamau'), ['Zoë Kamau'])
+        self.assertEqual(self.titles('wanjiru'), [])
+
+        self.school.school_class.name = 'Grade 6A'
+        self.school.school_class.save()
+        self.assertEqual(search.search('kamau', teacher=self.school.teacher)[0]['detail'], 'ST-0042 · Grade 6A')
+
+        self.contact.delete()
+        self.assertEqual(self.titles('otieno'), [])
+        self.assertEqual(search.rebuild_index(), 1)
+        self.assertEqual(self.titles('kamau'), ['Zoë Kamau'])
+
+    def test_search_endpoint(self):
+        self.client.force_login(self.school.teacher)
+        response = self.client.get(reverse('reports:search'), {'q': 'brian'})
+        self.assertEqual([result['title'] for result in response.json()['results']], ['Brian Otieno'])
+
+        self.client.force_login(self.school.parent)
+        self.assertEqual(self.client.get(reverse('reports:search'), {'q': 'brian'}).status_code, 403)
+
+    def test_contact_links_keep_the_whole_name(self):
+        self.contact.child_name = 'Amani & Baraka #2 + Co'
+        self.contact.save()
+        [result] = search.search('baraka', teacher=self.school.teacher)
+        path, query = result['url'].split('?')
+        self.assertEqual(path, reverse('reports:student_contact_list'))
+        self.assertEqual(parse_qs(query), {'q': ['Amani & Baraka #2 + Co']})
+
+
+class GradingQueueTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        reference.clear()
+        self.school = build_school()
+        add_students(self.school, 6)
+        self.assignment = self.school.assignment
+        self.url = reverse('reports:grading_queue', kwargs={'assignment_id': self.assignment.id})
+        self.client.force_login(self.school.teacher)
+
+    def post(self, rows):
+        data = {'form-TOTAL_FORMS': len(rows), 'form-INITIAL_FORMS': len(rows)}
+        for index, (submission, grade, feedback) in enumerate(rows):
+            data.update({
+                f'form-{index}-submission': submission.id,
+                f'form-{index}-grade': grade,
+                f'form-{index}-teacher_feedback': feedback,
+            })
+        return self.client.post(self.url, data)
+
+    def test_lists_ungraded_submissions(self):
+        submissions = list(self.assignment.submissions.all())
+        submissions[0].is_graded = True
+        submissions[0].save()
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['rows']), len(submissions) - 1)
+
+    def test_grades_many_submissions_in_one_post(self):
+        first, second, third = self.assignment.submissions.order_by('id')[:3]
+        other = AssignmentSubmission.objects.exclude(assignment=self.assignment).first()
+        # Session, user, assignment, then one read and one UPDATE in a savepoint
+        with self.assertNumQueries(7):
+            response = self.post([(first, '80', 'Good'), (second, '', ''), (third, '95.5', ''), (other, '10', 'Wrong')])
+        self.assertRedirects(response, self.url)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((first.grade, first.teacher_feedback, first.is_graded), (80, 'Good', True))
+        self.assertFalse(second.is_graded)
+        self.assertFalse(other.is_graded)
+        self.assertEqual(len(self.client.get(self.url).context['rows']), self.assignment.submissions.count() - 2)
+
+    def test_grade_above_max_points_is_rejected(self):
+        submission = self.assignment.submissions.first()
+        response = self.post([(submission, str(self.assignment.max_points + 1), '')])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].forms[0].errors)
+        self.assertEqual(response.context['rows'][0][0], submission)
+        submission.refresh_from_db()
+        self.assertFalse(submission.is_graded)
+
+    def test_other_teachers_cannot_open_the_queue(self):
+        other = User.objects.create_user('other', password='pw', user_type='teacher')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class SubmissionStatsTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        self.school = build_school()
+        add_students(self.school, 6)
+        self.assignment = self.school.assignment
+        # Students 1-5 submitted; grade four of them 20%, 40%, 70% and 90%
+        self.submissions = list(self.assignment.submissions.order_by('id'))
+        grading.save_grades(self.assignment, {
+            submission.id: (grade, '') for submission, grade in zip(self.submissions, [20, 40, 70, 90])
+        })
+        late = timezone.now() + datetime.timedelta(days=8)
+        AssignmentSubmission.objects.filter(pk=self.submissions[0].pk).update(submitted_at=late)
+
+    def test_assignment_stats(self):
+        result = stats.assignment_stats(self.assignment)
+        self.assertEqual(
+            {key: result[key] for key in ('submitted', 'expected', 'submission_rate', 'late', 'graded')},
+            {'submitted': 5, 'expected': 6, 'submission_rate': 83, 'late': 1, 'graded': 4},
+        )
+        self.assertEqual((result['mean'], result['median'], result['lowest'], result['highest']), (55.0, 55.0, 20.0, 90.0))
+        self.assertEqual([bucket['count'] for bucket in result['histogram']], [0, 0, 1, 0, 1, 0, 0, 1, 0, 1])
+
+    def test_stats_are_cached_until_a_submission_changes(self):
+        stats.assignment_stats(self.assignment)
+        with self.assertNumQueries(0):
+            stats.assignment_stats(self.assignment)
+
+        submission = self.submissions[4]
+        submission.grade = 100
+        submission.is_graded = True
+        submission.save()
+        self.assignment.refresh_from_db()
+        result = stats.assignment_stats(self.assignment)
+        self.assertEqual((result['graded'], result['median'], result['highest']), (5, 70.0, 100.0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grading.save_grades(self.assignment, {self.submissions[0].id: (60, '')})
+        self.assignment.refresh_from_db()
+        self.assertEqual(stats.assignment_stats(self.assignment)['lowest'], 40.0)
+
+    def test_changes_reach_every_process(self):
+        # Each worker has its own cache; the write happens in another one,
+        # so this process's cached entries are never deleted
+        subject, teacher, year = self.school.subjects[0], self.school.teacher, self.school.year
+        stats.assignment_stats(self.assignment)
+        stats.subject_assignment_stats(subject, teacher, year)
+        with mock.patch.object(stats, 'cache') as other_cache:
+            submission = self.submissions[4]
+            submission.grade = 100
+            submission.is_graded = True
+            submission.save()
+        other_cache.delete_many.assert_not_called()
+
+        assignment = SubjectAssignment.objects.get(pk=self.assignment.pk)
+        self.assertEqual(stats.assignment_stats(assignment)['highest'], 100.0)
+        result = stats.subject_assignment_stats(subject, teacher, year)
+        self.assertEqual(result['overall']['graded'], 5)
+
+    def test_saving_a_stale_assignment_keeps_the_version_moving_forward(self):
+        stale = SubjectAssignment.objects.get(pk=self.assignment.pk)
+        for grade in (95, 100):
+            submission = self.submissions[4]
+            submission.grade = grade
+            submission.is_graded = True
+            submission.save()
+            assignment = SubjectAssignment.objects.get(pk=self.assignment.pk)
+            stats.assignment_stats(assignment)
+
+        stale.max_points = 10
+        stale.save()
+        self.assertEqual(stale.stats_version, 3)
+        assignment = SubjectAssignment.objects.get(pk=self.assignment.pk)
+        self.assertEqual((assignment.stats_version, assignment.max_points), (3, 10))
+        result = stats.assignment_stats(assignment)
+        cache.clear()
+        self.assertEqual(result, stats.assignment_stats(assignment))
+        self.assertEqual(result['highest'], 1000.0)
+
+    def test_subject_stats(self):
+        other = SubjectAssignment.objects.filter(subject=self.school.subjects[0]).exclude(pk=self.assignment.pk).get()
+        AssignmentSubmission.objects.filter(assignment=other).update(grade=other.max_points, is_graded=True)
+        result = stats.subject_assignment_stats(self.school.subjects[0], self.school.teacher, self.school.year)
+        by_id = {assignment['id']: assignment['stats'] for assignment in result['assignments']}
+        self.assertEqual(by_id[self.assignment.id]['median'], 55.0)
+        self.assertEqual((by_id[other.id]['submitted'], by_id[other.id]['median']), (1, 100.0))
+        self.assertEqual((result['overall']['submitted'], result['overall']['expected']), (6, 12))
+        self.assertEqual((result['overall']['graded'], result['overall']['median']), (5, 70.0))
+
+    def test_stats_pages(self):
+        self.client.force_login(self.school.teacher)
+        response = self.client.get(reverse('reports:assignment_detail', args=[self.assignment.id]))
+        self.assertEqual(response.context['stats']['graded'], 4)
+        response = self.client.get(reverse('reports:subject_assignment_stats', args=[self.school.subjects[0].id]))
+        self.assertContains(response, self.assignment.title)
+
+        self.client.force_login(self.school.parent)
+        response = self.client.get(reverse('reports:subject_assignment_stats', args=[self.school.subjects[0].id]))
+        self.assertRedirects(response, reverse('reports:assignment_list'))
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+    # The benchmarks count queries on every database, replicas included
+    databases = {'default', 'replica'}
+
+    def generate(self, **options):
+        call_command(
+            'generate_school_data', students=12, subjects=3, years=2, class_size=6, assignments=2,
+            stdout=io.StringIO(), **options,
+        )
+
+    def test_generate_then_benchmark(self):
+        self.generate()
+        counts = (Student.objects.count(), SubjectAssignment.objects.count())
+        with self.assertRaises(CommandError):
+            self.generate()
+        self.generate(replace=True)
+        self.assertEqual((Student.objects.count(), SubjectAssignment.objects.count()), counts)
+
+        output = io.StringIO()
+        call_command('run_benchmarks', runs=1, stdout=output, stderr=io.StringIO())
+        views = {view['name']: view for view in json.loads(output.getvalue())['views']}
+        self.assertIn('user_autocomplete', views)
+        self.assertNotIn('reports:class_report_cards', views)
+        self.assertRegex(views['reports:gradebook']['path'], r'\?subject=\d+&term=\d$')
+        self.assertIn('?q=', views['reports:search']['path'])
+        self.assertEqual({name for name, view in views.items() if view['status'] >= 500}, set())
+        self.assertEqual(views['reports:gradebook']['status'], 200)
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_startup_does_not_import_reportlab(self):
+        # Every worker and management command pays for what django.setup() and the URLconf import
+        probe = (
+            "import sys, django; django.setup(); "
+            "from django.urls import get_resolver; get_resolver().url_patterns; "
+            "print(sorted(name for name in sys.modules if name.startswith('reportlab')))"
+        )
+        result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+class ExtractInlineCSSTests(SimpleTestCase):
+    def test_moves_static_styles_into_the_head(self):
+        from .management.commands.extract_inline_css import extract
+
+        source = (
+            "{% extends 'base.html' %}\n{% block content %}\n<p>Hi</p>\n"
+            "<style>\n    .a { color: red; }\n</style>\n"
+            "<style>.b { width: {{ width }}px; }</style>\n{% endblock %}\n"
+        )
+        template, css, removed = extract(source, 'css/templates/page.css')
+        self.assertEqual(css, '.a { color: red; }\n')
+        self.assertEqual(
+            template,
+            "{% extends 'base.html' %}\n{% load static %}\n{% block content %}\n<p>Hi</p>\n"
+            "<style>.b { width: {{ width }}px; }</style>\n{% endblock %}\n\n"
+            "{% block extra_css %}\n<link rel=\"stylesheet\" href=\"{% static 'css/templates/page.css' %}\">\n{% endblock %}\n",
+        )
+        # Running it again finds nothing left to move
+        self.assertEqual(extract(template, 'css/templates/page.css')[1], '')
+
+    def test_rerun_appends_to_the_existing_bundle(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        templates_dir = os.path.join(root, 'templates')
+        static_dir = os.path.join(root, 'static')
+        os.makedirs(templates_dir)
+        page = os.path.join(templates_dir, 'page.html')
+        with open(page, 'w') as f:
+            f.write("{% extends 'base.html' %}\n{% block content %}\n<style>.a { color: red; }</style>\n{% endblock %}\n")
+        templates = [{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [templates_dir]}]
+
+        with override_settings(TEMPLATES=templates, STATICFILES_DIRS=[static_dir]):
+            call_command('extract_inline_css', stdout=io.StringIO())
+            with open(page) as f:
+                source = f.read()
+            with open(page, 'w') as f:
+                f.write(source.replace('{% endblock %}', '<style>.b { color: blue; }</style>\n{% endblock %}', 1))
+            out = io.StringIO()
+            call_command('extract_inline_css', stdout=out)
+
+        with open(os.path.join(static_dir, 'css', 'templates', 'page.css')) as f:
+            self.assertEqual(f.read(), '.a { color: red; }\n\n.b { color: blue; }\n')
+        with open(page) as f:
+            template = f.read()
+        self.assertEqual(template.count('<link'), 1)
+        self.assertNotIn('<style', template)
+        self.assertNotIn(' -', out.getvalue().split('(uncompressed HTML):')[1])
@@ -8,23 +8,34 @@ urlpatterns = [
     path('class/<int:pk>/', views.class_detail, name='class_detail'),
     path('student/<int:student_id>/results/', views.student_results, name='student_results'),
     path('student/<int:student_id>/add-result/', views.add_result, name='add_result'),
+    path('class/<int:class_id>/gradebook/', views.gradebook, name='gradebook'),
     path('class/<int:class_id>/add-student/', views.add_student, name='add_student'),
+    path('class/<int:class_id>/import-students/', views.import_students, name='import_students'),
     path('student/<int:student_id>/download-report/', views.download_report, name='download_report'),
+    path('class/<int:class_id>/report-cards/', views.class_report_cards, name='class_report_cards'),
+    path('year/<int:year_id>/report-cards/', views.academic_year_report_cards, name='academic_year_report_cards'),
+    path('class/<int:class_id>/performance/', views.class_performance, name='class_performance'),
+    path('performance/', views.school_performance, name='school_performance'),
     path('student/<int:student_id>/profile/', views.student_profile, name='student_profile'),
+    path('search/', views.search_records, name='search'),
     
     # Assignment URLs
     path('assignments/', views.assignment_list, name='assignment_list'),
     path('assignments/subject/<int:subject_id>/', views.assignment_list, name='assignment_list_by_subject'),
+    path('assignments/subject/<int:subject_id>/stats/', views.subject_assignment_stats, name='subject_assignment_stats'),
     path('assignments/create/', views.assignment_create, name='assignment_create'),
     path('assignments/<int:assignment_id>/', views.assignment_detail, name='assignment_detail'),
     path('assignments/<int:assignment_id>/edit/', views.assignment_edit, name='assignment_edit'),
     path('assignments/<int:assignment_id>/delete/', views.assignment_delete, name='assignment_delete'),
     path('assignments/<int:assignment_id>/submit/', views.submit_assignment, name='submit_assignment'),
     path('submissions/<int:submission_id>/grade/', views.grade_assignment, name='grade_assignment'),
+    path('assignments/<int:assignment_id>/grading/', views.grading_queue, name='grading_queue'),
     
     # Student Contact URLs - FIXED ORDER
     path('student-contact/', views.student_contact_home, name='student_contact_home'),
     path('student-contact/select-class/', views.student_contact_class_select, name='student_contact_class_select'),
     path('student-contact/list/', views.student_contact_list, name='student_contact_list'),  # MOVED UP
+    path('student-contact/import/', views.student_contact_import, name='student_contact_import'),
+    path('student-contact/export/', views.student_contact_export, name='student_contact_export'),
     path('student-contact/<str:class_level>/', views.student_contact_form, name='student_contact_form'),  # MOVED DOWN
 ]
\ No newline at end of file
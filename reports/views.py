@@ -1,36 +1,47 @@
+import tempfile
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Q
-from .models import SchoolClass, Student, AssessmentResult, AcademicYear, Subject, SubjectAssignment, AssignmentSubmission, StudentContact
-from .forms import AssessmentResultForm, StudentForm, SubjectAssignmentForm, AssignmentSubmissionForm, GradeAssignmentForm, StudentContactForm
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-import io
+from django.utils.text import slugify
+from .models import SchoolClass, Student, AssessmentResult, AcademicYear, SubjectAssignment, AssignmentSubmission, StudentContact
+from .forms import AssessmentResultForm, StudentForm, SubjectAssignmentForm, AssignmentSubmissionForm, GradeAssignmentForm, GradingFormSet, StudentContactForm, GradebookSelectForm, GradebookFormSet, SpreadsheetUploadForm
+from .batch import collect_report_cards, render_report_cards, stream_zip
+from .rendering import render_report_to
+from .report_data import report_card_data, result_rows
+from .report_cache import get_report_cache, report_cache_key, results_fingerprint
+from .prerender import open_prerendered_report
+from .responses import ranged_file_response
+from .gradebook import existing_results, save_gradebook
+from .grading import save_grades, ungraded_submissions
+from .pagination import estimated_count, keyset_paginate
+from . import exporters, importers, performance, reference, search, stats
+from school_reporting.replicas import replica_reads
 
 @login_required
 def class_detail(request, pk):
     # Only allow teachers to access their own classes
-    school_class = get_object_or_404(SchoolClass, pk=pk, teacher=request.user)
+    school_class = get_object_or_404(SchoolClass.objects.select_related('academic_year'), pk=pk, teacher=request.user)
     
     students = Student.objects.filter(school_class=school_class)
+    page = keyset_paginate(request, students, ['last_name', 'first_name'], settings.LIST_PAGE_SIZE)
     
     context = {
         'class': school_class,
-        'students': students,
+        'students': page,
+        'student_count': estimated_count(students, page),
     }
     return render(request, 'reports/class_detail.html', context)
 
 @login_required
+@replica_reads
 def student_results(request, student_id):
     # Only allow parents to access their own children's results
-    student = get_object_or_404(Student, id=student_id, user=request.user)
+    student = get_object_or_404(Student.objects.select_related('school_class'), id=student_id, user=request.user)
     
     # Get all results for this student, ordered by term and subject
     results = AssessmentResult.objects.filter(student=student).select_related('subject').order_by('term', 'subject__name')
@@ -52,18 +63,18 @@ def student_results(request, student_id):
 @login_required
 def add_result(request, student_id):
     # Only allow teachers to add results for students in their classes
-    student = get_object_or_404(Student, id=student_id)
+    student = get_object_or_404(Student.objects.select_related('school_class'), id=student_id)
     
     # Check if the current teacher teaches this student's class
-    if student.school_class.teacher != request.user:
+    if student.school_class.teacher_id != request.user.id:
         messages.error(request, 'You can only add results for students in your classes.')
         return redirect('teacher_dashboard')
     
     # Get current academic year
-    current_year = AcademicYear.objects.filter(current=True).first()
+    current_year = reference.current_academic_year()
     
     if request.method == 'POST':
-        form = AssessmentResultForm(request.POST)
+        form = AssessmentResultForm(request.POST, current_year=current_year)
         if form.is_valid():
             result = form.save(commit=False)
             result.student = student
@@ -72,7 +83,7 @@ def add_result(request, student_id):
             return redirect('reports:class_detail', pk=student.school_class.id)
     else:
         # Pre-fill the form with current academic year
-        form = AssessmentResultForm(initial={'academic_year': current_year})
+        form = AssessmentResultForm(initial={'academic_year': current_year}, current_year=current_year)
     
     context = {
         'form': form,
@@ -81,6 +92,57 @@ def add_result(request, student_id):
     }
     return render(request, 'reports/add_result.html', context)
 
+@login_required
+def gradebook(request, class_id):
+    """Enter one subject's results for a whole class in a single submission"""
+    school_class = get_object_or_404(SchoolClass, id=class_id, teacher=request.user)
+    
+    current_year = reference.current_academic_year()
+    if not current_year:
+        messages.error(request, "No current academic year set. Please contact administrator.")
+        return redirect('reports:class_detail', pk=school_class.id)
+    
+    select_form = GradebookSelectForm(request.GET or None)
+    formset = None
+    students = []
+    if select_form.is_valid():
+        subject = select_form.cleaned_data['subject']
+        term = select_form.cleaned_data['term']
+        students = list(Student.objects.filter(school_class=school_class).order_by('last_name', 'first_name'))
+        
+        if request.method == 'POST':
+            formset = GradebookFormSet(request.POST)
+            if formset.is_valid():
+                class_student_ids = {student.id for student in students}
+                entries = {
+                    row['student']: (row['performance_level'], row['teacher_comment'])
+                    for row in formset.cleaned_data
+                    if row.get('performance_level') and row['student'] in class_student_ids
+                }
+                created, updated = save_gradebook(subject, term, current_year, entries)
+                messages.success(request, f'{subject.name} Term {term}: {created} results added, {updated} updated.')
+                return redirect(f"{request.path}?{request.GET.urlencode()}")
+        else:
+            existing = existing_results([student.id for student in students], subject, term, current_year)
+            initial = []
+            for student in students:
+                result = existing.get(student.id)
+                initial.append({
+                    'student': student.id,
+                    'performance_level': result.performance_level if result else '',
+                    'teacher_comment': result.teacher_comment if result else '',
+                })
+            formset = GradebookFormSet(initial=initial)
+    
+    context = {
+        'class': school_class,
+        'current_year': current_year,
+        'select_form': select_form,
+        'formset': formset,
+        'rows': list(zip(students, formset.forms)) if formset is not None else [],
+    }
+    return render(request, 'reports/gradebook.html', context)
+
 @login_required
 def add_student(request, class_id):
     # Only allow teachers to add students to their own classes
@@ -104,110 +166,134 @@ def add_student(request, class_id):
     return render(request, 'reports/add_student.html', context)
 
 @login_required
-def download_report(request, student_id):
-    # Only allow parents to download their own children's reports
-    student = get_object_or_404(Student, id=student_id, user=request.user)
+def import_students(request, class_id):
+    """Add many students to a class from an admissions spreadsheet"""
+    school_class = get_object_or_404(SchoolClass.objects.select_related('academic_year'), id=class_id, teacher=request.user)
     
-    # Get all results for this student
-    results = AssessmentResult.objects.filter(student=student).select_related('subject').order_by('term', 'subject__name')
-    
-    # Create the PDF object
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=1,  # Center aligned
-    )
-    
-    # Title
-    title = Paragraph(f"ACADEMIC REPORT CARD", title_style)
-    elements.append(title)
-    
-    # Student Information
-    student_info = [
-        f"Student: {student.first_name} {student.last_name}",
-        f"Student ID: {student.student_id}",
-        f"Class: {student.school_class.name}",
-        f"Academic Year: {student.school_class.academic_year}",
-        f"Date Generated: {timezone.now().strftime('%Y-%m-%d')}"
-    ]
-    
-    for info in student_info:
-        elements.append(Paragraph(info, styles['Normal']))
-        elements.append(Spacer(1, 12))
-    
-    elements.append(Spacer(1, 24))
-    
-    # Group results by term
-    term_results = {}
-    for result in results:
-        if result.term not in term_results:
-            term_results[result.term] = []
-        term_results[result.term].append(result)
-    
-    # Create table for each term
-    for term in sorted(term_results.keys()):
-        # Term header
-        term_header = Paragraph(f"TERM {term} RESULTS", styles['Heading2'])
-        elements.append(term_header)
-        elements.append(Spacer(1, 12))
-        
-        # Table data
-        table_data = [['Subject', 'Performance Level', 'Teacher Comment']]
-        
-        for result in term_results[term]:
-            table_data.append([
-                result.subject.name,
-                result.get_performance_level_display(),
-                result.teacher_comment or "No comment"
-            ])
-        
-        # Create table
-        table = Table(table_data, colWidths=[2*inch, 2*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 24))
+    report = None
+    if request.method == 'POST':
+        form = SpreadsheetUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                report = importers.import_students(school_class, form.cleaned_data['file'])
+            except ValidationError as e:
+                form.add_error('file', e)
+            else:
+                if report.created:
+                    messages.success(request, f'{report.created} students imported into {school_class.name}.')
+                if not report.errors:
+                    return redirect('reports:class_detail', pk=school_class.id)
+    else:
+        form = SpreadsheetUploadForm()
     
-    # If no results
-    if not results:
-        no_data = Paragraph("No assessment results available yet.", styles['BodyText'])
-        elements.append(no_data)
+    context = {
+        'form': form,
+        'school_class': school_class,
+        'report': report,
+        'columns': importers.STUDENT_COLUMNS + ['parent_username'],
+    }
+    return render(request, 'reports/import_students.html', context)
+
+@login_required
+@replica_reads
+def download_report(request, student_id):
+    # Only allow parents to download their own children's reports
+    student = get_object_or_404(Student.objects.select_related('school_class__academic_year'), id=student_id, user=request.user)
+    
+    # Serve from the PDF cache or the term-close pre-render unless the results
+    # changed since either was rendered
+    fingerprint = results_fingerprint(student)
+    report_cache = get_report_cache()
+    cache_key = report_cache_key(student, fingerprint)
+    pdf = report_cache.open(student.id, cache_key) or open_prerendered_report(student, fingerprint)
+    if pdf is None:
+        rows = result_rows(AssessmentResult.objects.filter(student=student))
+        # Large documents spill to disk instead of staying in worker memory
+        pdf = tempfile.SpooledTemporaryFile(max_size=settings.REPORT_SPOOL_MAX_BYTES)
+        render_report_to(report_card_data(student, rows), pdf)
+        report_cache.set(student.id, cache_key, pdf)
+    
+    filename = f'report_{student.student_id}_{timezone.now().strftime("%Y%m%d")}.pdf'
+    return ranged_file_response(request, pdf, filename, content_type='application/pdf')
+
+def _zip_response(students, filename):
+    cards = collect_report_cards(students)
+    response = StreamingHttpResponse(stream_zip(render_report_cards(cards)), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+@replica_reads
+def class_report_cards(request, class_id):
+    """Download every report card in a class as a single ZIP"""
+    school_class = get_object_or_404(SchoolClass, id=class_id, teacher=request.user)
+    students = Student.objects.filter(school_class=school_class)
+    if not students.exists():
+        messages.warning(request, 'There are no students in this class yet.')
+        return redirect('reports:class_detail', pk=school_class.id)
     
-    # Build PDF
-    doc.build(elements)
+    filename = f'report_cards_{slugify(school_class.name)}_{timezone.now().strftime("%Y%m%d")}.zip'
+    return _zip_response(students, filename)
+
+@login_required
+@replica_reads
+def academic_year_report_cards(request, year_id):
+    """Download every report card in an academic year, one folder per class"""
+    if not (request.user.is_staff or request.user.is_admin()):
+        messages.error(request, 'Access denied. Administrators only.')
+        return redirect('dashboard')
+    
+    academic_year = get_object_or_404(AcademicYear, id=year_id)
+    students = Student.objects.filter(school_class__academic_year=academic_year)
+    filename = f'report_cards_{slugify(academic_year.name)}_{timezone.now().strftime("%Y%m%d")}.zip'
+    return _zip_response(students, filename)
+
+@login_required
+def class_performance(request, class_id):
+    """Performance level breakdown per subject and term for one class"""
+    school_class = get_object_or_404(SchoolClass.objects.select_related('academic_year'), id=class_id, teacher=request.user)
     
-    # File response
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="report_{student.student_id}_{timezone.now().strftime("%Y%m%d")}.pdf"'
+    context = {
+        'class': school_class,
+        'subjects': performance.class_performance(school_class),
+        'terms': AssessmentResult.TERMS,
+        'levels': AssessmentResult.PERFORMANCE_LEVELS,
+    }
+    return render(request, 'reports/class_performance.html', context)
+
+@login_required
+def school_performance(request):
+    """Performance level breakdown per class and per subject across the school"""
+    if not (request.user.is_staff or request.user.is_admin()):
+        messages.error(request, 'Access denied. Administrators only.')
+        return redirect('dashboard')
+    
+    academic_years = AcademicYear.objects.order_by('-name')
+    year_id = request.GET.get('year')
+    if year_id and year_id.isdigit():
+        academic_year = get_object_or_404(AcademicYear, id=year_id)
+    else:
+        academic_year = reference.current_academic_year() or academic_years.first()
+    term = request.GET.get('term')
+    term = int(term) if term in {str(value) for value, _ in AssessmentResult.TERMS} else None
     
-    return response
+    context = {
+        'academic_year': academic_year,
+        'academic_years': academic_years,
+        'term': term,
+        'terms': AssessmentResult.TERMS,
+        'levels': AssessmentResult.PERFORMANCE_LEVELS,
+    }
+    if academic_year is not None:
+        context.update(performance.school_performance(academic_year, term))
+    return render(request, 'reports/school_performance.html', context)
 
 @login_required
 def student_profile(request, student_id):
     # Only allow teachers to view profiles of students in their classes
-    student = get_object_or_404(Student, id=student_id)
+    student = get_object_or_404(Student.objects.select_related('school_class__academic_year', 'user'), id=student_id)
     
-    if student.school_class.teacher != request.user:
+    if student.school_class.teacher_id != request.user.id:
         messages.error(request, 'Access denied.')
         return redirect('teacher_dashboard')
     
@@ -229,24 +315,28 @@ def assignment_list(request, grade_id=None, subject_id=None):
         assignments = SubjectAssignment.objects.filter(created_by=request.user)
     else:
         assignments = SubjectAssignment.objects.filter(is_published=True)
+    # Each card shows the subject name
+    assignments = assignments.select_related('subject')
     
     # Get current academic year
-    current_year = AcademicYear.objects.filter(current=True).first()
+    current_year = reference.current_academic_year()
     if current_year:
         assignments = assignments.filter(academic_year=current_year)
     
     # Filter by subject if provided
     if subject_id:
-        subject = get_object_or_404(Subject, id=subject_id)
+        subject = reference.get_subject(subject_id)
+        if subject is None:
+            raise Http404("No Subject matches the given query.")
         assignments = assignments.filter(subject=subject)
     else:
         subject = None
     
     # Get available subjects for filters
-    subjects = Subject.objects.all()
+    subjects = reference.subjects()
     
     context = {
-        'assignments': assignments,
+        'assignments': keyset_paginate(request, assignments, ['-created_at'], settings.LIST_PAGE_SIZE),
         'subject': subject,
         'subjects': subjects,
         'current_subject_id': subject_id,
@@ -256,14 +346,14 @@ def assignment_list(request, grade_id=None, subject_id=None):
 
 @login_required
 def assignment_detail(request, assignment_id):
-    assignment = get_object_or_404(SubjectAssignment, id=assignment_id)
+    assignment = get_object_or_404(SubjectAssignment.objects.select_related('subject'), id=assignment_id)
     
     # Check permissions
     if not assignment.is_published and not request.user.is_teacher():
         messages.error(request, "You don't have permission to view this assignment.")
         return redirect('reports:assignment_list')
     
-    if request.user.is_teacher() and assignment.created_by != request.user:
+    if request.user.is_teacher() and assignment.created_by_id != request.user.id:
         messages.error(request, "You can only view assignments you created.")
         return redirect('reports:assignment_list')
     
@@ -280,23 +370,48 @@ def assignment_detail(request, assignment_id):
     
     # Get all submissions for teachers
     submissions = None
-    if request.user.is_teacher() and assignment.created_by == request.user:
-        submissions = AssignmentSubmission.objects.filter(assignment=assignment)
+    assignment_stats = None
+    if request.user.is_teacher() and assignment.created_by_id == request.user.id:
+        submissions = AssignmentSubmission.objects.filter(assignment=assignment).select_related('student')
+        assignment_stats = stats.assignment_stats(assignment)
     
     context = {
         'assignment': assignment,
         'user_submission': user_submission,
         'submissions': submissions,
+        'stats': assignment_stats,
     }
     return render(request, 'reports/assignment_detail.html', context)
 
+@login_required
+def subject_assignment_stats(request, subject_id):
+    """How each of the teacher's assignments in a subject went this academic year"""
+    if not request.user.is_teacher():
+        messages.error(request, "Only teachers can view assignment statistics.")
+        return redirect('reports:assignment_list')
+    
+    subject = reference.get_subject(subject_id)
+    if subject is None:
+        raise Http404("No Subject matches the given query.")
+    current_year = reference.current_academic_year()
+    if not current_year:
+        messages.error(request, "No current academic year set. Please contact administrator.")
+        return redirect('reports:assignment_list')
+    
+    context = {
+        'subject': subject,
+        'current_year': current_year,
+        'stats': stats.subject_assignment_stats(subject, request.user, current_year),
+    }
+    return render(request, 'reports/subject_assignment_stats.html', context)
+
 @login_required
 def assignment_create(request):
     if not request.user.is_teacher():
         messages.error(request, "Only teachers can create assignments.")
         return redirect('reports:assignment_list')
     
-    current_year = AcademicYear.objects.filter(current=True).first()
+    current_year = reference.current_academic_year()
     if not current_year:
         messages.error(request, "No current academic year set. Please contact administrator.")
         return redirect('reports:assignment_list')
@@ -369,7 +484,7 @@ def submit_assignment(request, assignment_id):
         messages.error(request, "Only students (through parent accounts) can submit assignments.")
         return redirect('reports:assignment_list')
     
-    assignment = get_object_or_404(SubjectAssignment, id=assignment_id, is_published=True)
+    assignment = get_object_or_404(SubjectAssignment.objects.select_related('subject'), id=assignment_id, is_published=True)
     
     # Get the student for this parent
     student = Student.objects.filter(user=request.user).first()
@@ -408,10 +523,12 @@ def grade_assignment(request, submission_id):
         messages.error(request, "Only teachers can grade assignments.")
         return redirect('reports:assignment_list')
     
-    submission = get_object_or_404(AssignmentSubmission, id=submission_id)
+    submission = get_object_or_404(
+        AssignmentSubmission.objects.select_related('assignment__subject', 'student'), id=submission_id
+    )
     
     # Check if the teacher created this assignment
-    if submission.assignment.created_by != request.user:
+    if submission.assignment.created_by_id != request.user.id:
         messages.error(request, "You can only grade assignments you created.")
         return redirect('reports:assignment_list')
     
@@ -430,6 +547,57 @@ def grade_assignment(request, submission_id):
     }
     return render(request, 'reports/grade_assignment.html', context)
 
+@login_required
+def grading_queue(request, assignment_id):
+    """Grade all of an assignment's ungraded submissions from one page"""
+    if not request.user.is_teacher():
+        messages.error(request, "Only teachers can grade assignments.")
+        return redirect('reports:assignment_list')
+    
+    assignment = get_object_or_404(
+        SubjectAssignment.objects.select_related('subject'), id=assignment_id, created_by=request.user
+    )
+    form_kwargs = {'max_points': assignment.max_points}
+    
+    if request.method == 'POST':
+        formset = GradingFormSet(request.POST, form_kwargs=form_kwargs)
+        if formset.is_valid():
+            entries = {
+                row['submission']: (row['grade'], row['teacher_feedback'])
+                for row in formset.cleaned_data
+                if row.get('grade') is not None
+            }
+            graded = save_grades(assignment, entries)
+            messages.success(request, f'{graded} submissions graded.')
+            return redirect('reports:grading_queue', assignment_id=assignment.id)
+        # Show the posted rows again, with their errors, beside their submissions
+        posted_ids = [str(form['submission'].value()) for form in formset.forms]
+        posted = AssignmentSubmission.objects.filter(assignment=assignment).select_related('student').in_bulk(
+            [int(value) for value in posted_ids if value.isdigit()]
+        )
+        rows = [
+            (posted[int(value)], form)
+            for value, form in zip(posted_ids, formset.forms)
+            if value.isdigit() and int(value) in posted
+        ]
+    else:
+        submissions = list(ungraded_submissions(assignment))
+        formset = GradingFormSet(
+            initial=[
+                {'submission': submission.id, 'grade': submission.grade, 'teacher_feedback': submission.teacher_feedback}
+                for submission in submissions
+            ],
+            form_kwargs=form_kwargs,
+        )
+        rows = list(zip(submissions, formset.forms))
+    
+    context = {
+        'assignment': assignment,
+        'formset': formset,
+        'rows': rows,
+    }
+    return render(request, 'reports/grading_queue.html', context)
+
 # ===== STUDENT CONTACT VIEWS =====
 
 @login_required
@@ -498,10 +666,97 @@ def student_contact_list(request):
     class_level = request.GET.get('class_level')
     if class_level:
         contacts = contacts.filter(class_level=class_level)
+    query = request.GET.get('q', '').strip()
+    if query:
+        contacts = contacts.filter(pk__in=search.matches(query, kind='contact', teacher=request.user).values('object_id'))
+    page = keyset_paginate(request, contacts, ['class_level', 'child_name'], settings.LIST_PAGE_SIZE)
     
     context = {
-        'contacts': contacts,
+        'contacts': page,
+        'contact_count': estimated_count(contacts, page),
         'class_levels': StudentContact.CLASS_LEVELS,
         'current_class': class_level,
+        'query': query,
     }
-    return render(request, 'reports/student_contact_list.html', context)
\ No newline at end of file
+    return render(request, 'reports/student_contact_list.html', context)
+
+@login_required
+def student_contact_export(request):
+    """Download the teacher's contacts as CSV or XLSX, with the same class filter as the list"""
+    if not request.user.is_teacher():
+        messages.error(request, 'Access denied. Teachers only.')
+        return redirect('home')
+    
+    contacts = StudentContact.objects.filter(teacher=request.user)
+    class_level = request.GET.get('class_level')
+    if class_level:
+        contacts = contacts.filter(class_level=class_level)
+    
+    header, rows = exporters.contact_export(contacts)
+    filename = f'student_contacts_{class_level or "all"}_{timezone.now().strftime("%Y-%m-%d")}'
+    return exporters.export_response(request.GET.get('format'), filename, header, rows)
+
+CONTACT_IMPORT_SESSION_KEY = 'student_contact_import'
+
+@login_required
+def student_contact_import(request):
+    """Upload a class list of contacts, review new rows and duplicates, then import"""
+    if not request.user.is_teacher():
+        messages.error(request, 'Access denied. Teachers only.')
+        return redirect('home')
+    
+    staged = request.session.get(CONTACT_IMPORT_SESSION_KEY)
+    report = None
+    
+    if request.method == 'POST' and 'confirm' in request.POST:
+        if not staged:
+            messages.error(request, 'Nothing to import. Please upload the file again.')
+            return redirect('reports:student_contact_import')
+        del request.session[CONTACT_IMPORT_SESSION_KEY]
+        try:
+            with open(importers.staged_upload_path(staged['token']), 'rb') as handle:
+                report = importers.import_contacts(request.user, File(handle, name=staged['name']), dry_run=False)
+        except (FileNotFoundError, ValidationError):
+            messages.error(request, 'The uploaded file is no longer available. Please upload it again.')
+            return redirect('reports:student_contact_import')
+        finally:
+            importers.discard_staged_upload(staged['token'])
+        messages.success(request, f'{report.created} contacts imported, {len(report.duplicates)} duplicates skipped.')
+        if not report.errors:
+            return redirect('reports:student_contact_list')
+        # Rows that stopped validating since the preview; list them rather than drop them
+        form = SpreadsheetUploadForm()
+    elif request.method == 'POST':
+        form = SpreadsheetUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            if staged:
+                importers.discard_staged_upload(staged['token'])
+            upload = form.cleaned_data['file']
+            token = importers.stage_upload(upload)
+            try:
+                with open(importers.staged_upload_path(token), 'rb') as handle:
+                    report = importers.import_contacts(request.user, File(handle, name=upload.name), dry_run=True)
+            except ValidationError as e:
+                importers.discard_staged_upload(token)
+                request.session.pop(CONTACT_IMPORT_SESSION_KEY, None)
+                form.add_error('file', e)
+            else:
+                request.session[CONTACT_IMPORT_SESSION_KEY] = {'token': token, 'name': upload.name}
+    else:
+        form = SpreadsheetUploadForm()
+    
+    context = {
+        'form': form,
+        'report': report,
+        'columns': importers.CONTACT_COLUMNS,
+        'optional_columns': importers.CONTACT_OPTIONAL_COLUMNS,
+    }
+    return render(request, 'reports/student_contact_import.html', context)
+
+@login_required
+def search_records(request):
+    """As-you-type search over the teacher's students and contacts, as JSON"""
+    if not request.user.is_teacher():
+        return JsonResponse({'error': 'Teachers only.'}, status=403)
+    query = request.GET.get('q', '')
+    return JsonResponse({'query': query, 'results': search.search(query, teacher=request.user)})
@@ -0,0 +1,135 @@
+"""
+Per-request timing.
+
+``RequestTimingMiddleware`` measures the wall time of every request and the
+number and duration of the database queries it ran, adds them to the
+response as a ``Server-Timing`` header, logs a warning when a view goes over
+its budget and keeps running totals per view. The totals live in each
+worker process, not across the deployment: staff see them through
+``school_reporting.views.request_timings``, which reports the totals of
+whichever worker answered, labelled with its process ID.
+"""
+
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger('school_reporting.timing')
+
+
+class QueryTimer:
+    """Database execute wrapper that counts queries and adds up their duration"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class ViewTimings:
+    """Running per-view totals for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self.since = timezone.now()
+
+    def record(self, view_name, total_ms, db_ms, queries, over_budget):
+        with self._lock:
+            stats = self._views.setdefault(view_name, {
+                'requests': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'db_ms': 0.0,
+                'queries': 0,
+                'max_queries': 0,
+                'over_budget': 0,
+            })
+            stats['requests'] += 1
+            stats['total_ms'] += total_ms
+            stats['max_ms'] = max(stats['max_ms'], total_ms)
+            stats['db_ms'] += db_ms
+            stats['queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+            stats['over_budget'] += over_budget
+
+    def summary(self):
+        """One row per view with averages, slowest total time first"""
+        with self._lock:
+            views = {name: dict(stats) for name, stats in self._views.items()}
+        rows = []
+        for name, stats in views.items():
+            requests = stats['requests']
+            rows.append({
+                'view': name,
+                'requests': requests,
+                'avg_ms': round(stats['total_ms'] / requests, 1),
+                'max_ms': round(stats['max_ms'], 1),
+                'avg_db_ms': round(stats['db_ms'] / requests, 1),
+                'avg_queries': round(stats['queries'] / requests, 1),
+                'max_queries': stats['max_queries'],
+                'over_budget': stats['over_budget'],
+                'total_ms': round(stats['total_ms'], 1),
+            })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self.since = timezone.now()
+
+
+view_timings = ViewTimings()
+
+
+def view_budget(view_name):
+    """``(milliseconds, queries)`` allowed for a view"""
+    return settings.REQUEST_VIEW_BUDGETS.get(
+        view_name, (settings.REQUEST_BUDGET_MS, settings.REQUEST_BUDGET_QUERIES)
+    )
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        # For streamed responses this covers building the response, not
+        # sending the body
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = timer.seconds * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else '<unresolved>'
+        budget_ms, budget_queries = view_budget(view_name)
+        over_budget = total_ms > budget_ms or timer.count > budget_queries
+        if over_budget:
+            logger.warning(
+                "Slow request %s %s (%s): %.0f ms (budget %g), %d queries (budget %s), %.0f ms in the database",
+                request.method, request.path, view_name, total_ms, budget_ms, timer.count, budget_queries, db_ms,
+            )
+        view_timings.record(view_name, total_ms, db_ms, timer.count, over_budget)
+
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = (
+                f'total;dur={total_ms:.1f}, db;dur={db_ms:.1f};desc="{timer.count} queries"'
+            )
+        return response
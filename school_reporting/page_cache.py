@@ -0,0 +1,88 @@
+"""
+Whole-page cache for anonymous visitors.
+
+``cache_anonymous_page`` stores the response to an anonymous GET in the
+``pages`` cache, keyed on the path and the active language, and serves it
+to later anonymous visitors without running the view. Pages must look the
+same to every anonymous visitor and not depend on the query string (the
+login form posts back to its own URL, so ``?next=`` needs no variant).
+
+CSRF tokens are per visitor, so pages are rendered with a placeholder in
+place of ``{% csrf_token %}`` (see ``csrf_placeholder``) and each response
+gets a fresh token substituted on the way out. Requests with pending
+flash messages bypass the cache.
+
+Keys are prefixed with PAGE_CACHE_VERSION, which changes on every deploy,
+so pages never outlive the templates that rendered them.
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+CSRF_PLACEHOLDER = 'page-cache-csrf-token'
+
+
+def csrf_placeholder(request):
+    """Context processor putting the placeholder in ``csrf_token`` while a cached page is rendered"""
+    return {'csrf_token': CSRF_PLACEHOLDER} if getattr(request, 'rendering_cached_page', False) else {}
+
+
+def page_key(request):
+    return f'page:{get_language()}:{request.path}'
+
+
+def cacheable(request):
+    return (
+        settings.PAGE_CACHE_SECONDS > 0
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def with_csrf_token(request, content, headers):
+    response = HttpResponse(content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode()))
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def render_page(view, request, *args, **kwargs):
+    """Run the view, rendering any TemplateResponse, with the CSRF placeholder in the context"""
+    request.rendering_cached_page = True
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    finally:
+        request.rendering_cached_page = False
+    return response
+
+
+def cache_anonymous_page(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not cacheable(request):
+            return view(request, *args, **kwargs)
+        cache = caches['pages']
+        key = page_key(request)
+        page = cache.get(key)
+        if page is None:
+            response = render_page(view, request, *args, **kwargs)
+            if response.streaming:
+                return response
+            page = (response.content, dict(response.headers))
+            if response.status_code != 200 or response.cookies:
+                # Not shared, but still needs a real token in place of the placeholder
+                response.content = with_csrf_token(request, *page).content
+                return response
+            cache.set(key, page, settings.PAGE_CACHE_SECONDS)
+        return with_csrf_token(request, *page)
+
+    return wrapper
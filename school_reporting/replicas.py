@@ -0,0 +1,108 @@
+"""
+Read replicas.
+
+Views decorated with ``replica_reads`` run their queries against one of
+the ``DATABASE_REPLICAS`` aliases; everything else, and every write, uses
+the primary (``default``). Replicas lag behind the primary, so:
+
+- ``ReplicaStickinessMiddleware`` marks a browser that has just sent a
+  POST (or other unsafe request) with a short-lived cookie, and its reads
+  stay on the primary for ``REPLICA_STICKY_SECONDS`` so users see their
+  own changes.
+- Reads inside a transaction on the primary stay on the primary, as they
+  may need to see its uncommitted writes.
+"""
+
+import contextvars
+import random
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+def replica_aliases():
+    return list(settings.DATABASE_REPLICAS)
+
+
+@contextmanager
+def use_replica(alias=None):
+    """Send reads in the block to ``alias``, or a random replica; to the primary if there are none"""
+    replicas = replica_aliases()
+    if alias is None and replicas:
+        alias = random.choice(replicas)
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def use_primary():
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def is_sticky(request):
+    """Whether ``request`` must read from the primary to see the user's recent writes"""
+    return request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES
+
+
+def replica_reads(view):
+    """Run a read-only view's queries on a replica, unless the user has just written something"""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if is_sticky(request):
+            return view(request, *args, **kwargs)
+        with use_replica():
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get the schema from the primary
+        return db not in replica_aliases()
+
+
+class ReplicaStickinessMiddleware:
+    """Keep a browser's reads on the primary for a while after it sends a write"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_aliases():
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,21 @@
+"""
+Settings for school_reporting, layered by environment.
+
+``base`` holds what every environment shares. ``DJANGO_ENV`` picks the
+layer applied on top of it: ``development`` (the default) or
+``production``. A layer can also be named directly in
+DJANGO_SETTINGS_MODULE, e.g. ``school_reporting.settings.production``.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'development')
+
+if DJANGO_ENV == 'production':
+    from .production import *
+elif DJANGO_ENV == 'development':
+    from .development import *
+else:
+    raise ImproperlyConfigured(f"DJANGO_ENV must be 'development' or 'production', not {DJANGO_ENV!r}.")
@@ -0,0 +1,261 @@
+"""
+Django settings for school_reporting project shared by every environment.
+
+The development and production layers import this and override it.
+"""
+
+import os
+from pathlib import Path
+
+from . import database
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+SECRET_KEY = os.environ.get('SECRET_KEY')
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'school-reporting.onrender.com',
+    'green-bells-academy-report-system.onrender.com',
+    '.onrender.com',
+    'localhost',
+    '127.0.0.1',
+]
+
+# Application definition
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'accounts',
+    'reports',
+]
+
+MIDDLEWARE = [
+    'school_reporting.middleware.RequestTimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'school_reporting.replicas.ReplicaStickinessMiddleware',
+]
+
+ROOT_URLCONF = 'school_reporting.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'school_reporting.page_cache.csrf_placeholder',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'school_reporting.wsgi.application'
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+# DATABASE_URL when set (see database.from_url), otherwise a local SQLite file
+DATABASE_URL = os.environ.get('DATABASE_URL')
+DATABASES = {
+    'default': database.from_url(DATABASE_URL) if DATABASE_URL else database.sqlite(BASE_DIR / 'db.sqlite3'),
+}
+
+# Read replicas (school_reporting.replicas): comma-separated database URLs,
+# added as replica1, replica2, ... Parent-facing pages read from them.
+DATABASES.update(database.replicas(os.environ.get('DATABASE_REPLICA_URLS', '')))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['school_reporting.replicas.ReplicaRouter']
+# After a write, the user's reads stay on the primary this long so replica
+# lag doesn't hide their change
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+# The directory where collectstatic will collect static files for deployment
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Additional locations of static files
+STATICFILES_DIRS = [
+    BASE_DIR / 'static',
+]
+
+# Enable WhiteNoise compression and caching: collectstatic writes each file
+# under a content-hashed name with gzip and (with the Brotli package) .br
+# copies, and WhiteNoise serves hashed names with far-future cache headers.
+# The page CSS in static/css/templates comes from extract_inline_css, run
+# in development with its output committed; deploys only collect it.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Custom user model
+AUTH_USER_MODEL = 'accounts.CustomUser'
+
+# Login/Logout URLs
+LOGIN_REDIRECT_URL = 'dashboard'
+LOGOUT_REDIRECT_URL = 'home'
+LOGIN_URL = 'login'
+
+# Report cards
+# Number of worker processes used when rendering a whole class or year at once
+REPORT_BATCH_WORKERS = int(os.environ.get('REPORT_BATCH_WORKERS', os.cpu_count() or 1))
+
+# Rendered PDFs are cached on local disk and trimmed back to this size (LRU)
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', BASE_DIR / 'cache' / 'report_cards')
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Live-rendered PDFs larger than this spill from memory to a temporary file
+REPORT_SPOOL_MAX_BYTES = int(os.environ.get('REPORT_SPOOL_MAX_BYTES', 64 * 1024))
+
+# Report cards pre-rendered at term close by the prerender_report_cards command
+REPORT_PRERENDER_DIR = os.environ.get('REPORT_PRERENDER_DIR', BASE_DIR / 'cache' / 'prerendered_reports')
+
+# Uploaded spreadsheets waiting for the user to confirm a dry-run import
+IMPORT_STAGING_DIR = os.environ.get('IMPORT_STAGING_DIR', BASE_DIR / 'cache' / 'imports')
+# Staged uploads that were never confirmed are deleted after this long
+IMPORT_STAGING_MAX_AGE_SECONDS = int(os.environ.get('IMPORT_STAGING_MAX_AGE_SECONDS', 24 * 60 * 60))
+
+# Current academic year, subjects and report comments are cached in each
+# worker process; other workers pick up a change within this many seconds
+REFERENCE_DATA_RECHECK_SECONDS = float(os.environ.get('REFERENCE_DATA_RECHECK_SECONDS', 5))
+
+# Request timing (school_reporting.middleware.RequestTimingMiddleware)
+# Requests slower or running more queries than this are logged as warnings
+REQUEST_BUDGET_MS = float(os.environ.get('REQUEST_BUDGET_MS', 500))
+REQUEST_BUDGET_QUERIES = int(os.environ.get('REQUEST_BUDGET_QUERIES', 30))
+# Per-view overrides: {'reports:class_report_cards': (30000, 100)}
+REQUEST_VIEW_BUDGETS = {}
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'True').lower() == 'true'
+
+# Paged lists (reports.pagination): rows per page and how long the
+# "N students"/"N contacts" totals are cached before being recounted
+LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', 50))
+PAGINATION_COUNT_CACHE_SECONDS = int(os.environ.get('PAGINATION_COUNT_CACHE_SECONDS', 60))
+
+# Anonymous home, login and register pages (school_reporting.page_cache)
+# are cached whole for this long; 0 turns the cache off
+PAGE_CACHE_SECONDS = int(os.environ.get('PAGE_CACHE_SECONDS', 600))
+# Changes with every deploy (Render sets RENDER_GIT_COMMIT) so pages
+# rendered by the previous templates are never served
+PAGE_CACHE_VERSION = os.environ.get('PAGE_CACHE_VERSION') or os.environ.get('RENDER_GIT_COMMIT', 'local')
+# 'file' is shared by every worker on the host (put PAGE_CACHE_DIR on
+# /dev/shm to keep it in memory); 'memory' is a cache per worker process
+PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'file')
+PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR', BASE_DIR / 'cache' / 'pages')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': {
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+            'memory': 'django.core.cache.backends.locmem.LocMemCache',
+        }[PAGE_CACHE_BACKEND],
+        'LOCATION': str(PAGE_CACHE_DIR) if PAGE_CACHE_BACKEND == 'file' else 'pages',
+        'KEY_PREFIX': f'pages-{PAGE_CACHE_VERSION}',
+    },
+}
+
+# Assignment statistics (reports.stats) are cached under the assignment's
+# stats_version, which changes with every submission, so no process serves
+# them stale; this only bounds how long a class roster change takes to show
+ASSIGNMENT_STATS_CACHE_SECONDS = int(os.environ.get('ASSIGNMENT_STATS_CACHE_SECONDS', 900))
+
+# WhiteNoise configuration
+WHITENOISE_MANIFEST_STRICT = False
+WHITENOISE_USE_FINDERS = True
+
+# Logging configuration
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'style': '{',
+        },
+        'simple': {
+            'format': '{levelname} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'INFO',
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,101 @@
+"""
+DATABASES entries for the settings layers.
+
+SQLite is tuned for several server processes sharing one file: WAL lets
+reads carry on while a write is in progress, ``busy_timeout`` makes a
+writer wait for the lock instead of failing with "database is locked", and
+``IMMEDIATE`` transactions take the write lock when they start, so two
+transactions can't deadlock trying to upgrade their read locks.
+
+PostgreSQL connections are held in a psycopg 3 pool in each worker process
+(Django's ``pool`` option), sized by the ``DB_POOL_*`` environment variables.
+"""
+
+import os
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+POSTGRES_ENGINE = 'django.db.backends.postgresql'
+
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': 'WAL',
+        # Durable at every checkpoint rather than every commit; with WAL a
+        # power cut can lose the last commits but not corrupt the file
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+        'temp_store': 'MEMORY',
+    }
+
+
+def sqlite(name):
+    return {
+        'ENGINE': SQLITE_ENGINE,
+        'NAME': name,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {pragma}={value}' for pragma, value in sqlite_pragmas().items()),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+
+
+def pool_options():
+    return {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+        # A sync gunicorn worker uses one connection at a time
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 4)),
+        # Seconds to wait for a free connection before the request fails
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+
+def from_url(url):
+    """A DATABASES entry for ``url``: pooled on PostgreSQL, tuned on SQLite"""
+    config = dj_database_url.parse(url)
+    if config['ENGINE'] == SQLITE_ENGINE:
+        return sqlite(config['NAME'])
+    if config['ENGINE'] == POSTGRES_ENGINE:
+        # Django refuses persistent connections alongside a pool
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS'] = {**config.get('OPTIONS', {}), 'pool': pool_options()}
+    else:
+        config['CONN_MAX_AGE'] = 600
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
+
+
+def replicas(urls):
+    """DATABASES entries for comma-separated replica ``urls``.
+
+    Tests read the primary's test database through them rather than
+    creating their own.
+    """
+    return {
+        f'replica{index}': {**from_url(url.strip()), 'TEST': {'MIRROR': 'default'}}
+        for index, url in enumerate(filter(str.strip, urls.split(',')), 1)
+    }
+
+
+def check_production(databases, allow_sqlite=False):
+    """Raise ImproperlyConfigured unless every database is pooled PostgreSQL (or SQLite, if allowed)"""
+    for alias, config in databases.items():
+        engine = config.get('ENGINE')
+        if engine == SQLITE_ENGINE:
+            if not allow_sqlite:
+                raise ImproperlyConfigured(
+                    f"The '{alias}' database is SQLite. Set DATABASE_URL to the PostgreSQL database, "
+                    "or ALLOW_SQLITE_IN_PRODUCTION=True for a single-server deployment."
+                )
+        elif engine == POSTGRES_ENGINE:
+            if not config.get('OPTIONS', {}).get('pool'):
+                raise ImproperlyConfigured(f"The '{alias}' database has no connection pool.")
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                raise ImproperlyConfigured("Connection pooling needs psycopg 3 with the pool extra: psycopg[pool].")
+        else:
+            raise ImproperlyConfigured(f"The '{alias}' database uses {engine}, which production isn't set up for.")
@@ -0,0 +1,35 @@
+"""
+Settings for local development and tests.
+"""
+
+from .base import *
+
+SECRET_KEY = SECRET_KEY or 'django-insecure-your-default-dev-secret-key-change-this-in-production'
+
+DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
+
+# Without configured replicas, a second connection to the primary stands in
+# for one so replica routing runs locally and in tests
+if not DATABASE_REPLICAS:
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS = ['replica']
+
+SECURE_SSL_REDIRECT = False
+SESSION_COOKIE_SECURE = False
+CSRF_COOKIE_SECURE = False
+
+WHITENOISE_AUTOREFRESH = DEBUG
+
+# Serve static files under their own names; the manifest of hashed names
+# only exists after collectstatic
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Template edits should show on the next reload
+PAGE_CACHE_SECONDS = int(os.environ.get('PAGE_CACHE_SECONDS', 0))
+
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -0,0 +1,32 @@
+"""
+Settings for deployment.
+
+Refuses to start on a database that isn't pooled PostgreSQL, unless
+ALLOW_SQLITE_IN_PRODUCTION is set for a single-server deployment.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *
+
+if not SECRET_KEY:
+    raise ImproperlyConfigured("Set the SECRET_KEY environment variable.")
+
+ALLOW_SQLITE_IN_PRODUCTION = os.environ.get('ALLOW_SQLITE_IN_PRODUCTION', 'False').lower() == 'true'
+database.check_production(DATABASES, allow_sqlite=ALLOW_SQLITE_IN_PRODUCTION)
+
+SECURE_SSL_REDIRECT = True
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+SECURE_BROWSER_XSS_FILTER = True
+SECURE_CONTENT_TYPE_NOSNIFF = True
+SECURE_HSTS_SECONDS = 31536000  # 1 year
+SECURE_HSTS_INCLUDE_SUBDOMAINS = True
+SECURE_HSTS_PRELOAD = True
+
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.environ.get('EMAIL_HOST')
+EMAIL_PORT = os.environ.get('EMAIL_PORT', 587)
+EMAIL_USE_TLS = True
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
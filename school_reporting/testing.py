@@ -0,0 +1,101 @@
+"""
+Test helpers for keeping query counts in check.
+
+``QueryBudgetMixin.assertQueryBudget`` fails when a block runs more queries
+than allowed and lists every query with where it came from: the template
+tag or variable being rendered, if any, and the innermost line of project
+code. ``assertSameQueries`` compares two runs of the same page at different
+data sizes and points at the lines whose query count grew.
+
+Queries are recorded on every database. Inside a ``TestCase`` the whole
+test runs in a transaction, so ``ReplicaRouter`` keeps reads on the primary
+and budgets count replica-routed views as if they had no replicas;
+``ReplicaRoutingTests`` covers the replica path.
+"""
+
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+PROJECT_DIR = Path(settings.BASE_DIR).resolve()
+
+
+def _project_file(filename):
+    path = Path(filename).resolve()
+    return PROJECT_DIR in path.parents and 'site-packages' not in path.parts and path != Path(__file__).resolve()
+
+
+def query_origin(frame):
+    """Describe where the query executing in ``frame``'s call stack came from"""
+    template = None
+    code = None
+    while frame is not None and (template is None or code is None):
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            # The innermost template node being rendered
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template = f"{origin.template_name}:{token.lineno} {{{{ {token.contents} }}}}"
+        if code is None and _project_file(frame.f_code.co_filename):
+            relative = Path(frame.f_code.co_filename).resolve().relative_to(PROJECT_DIR)
+            code = f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return ' <- '.join(part for part in (template, code) if part) or 'unknown'
+
+
+class QueryRecorder:
+    """Database execute wrapper recording each query's SQL and origin"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, query_origin(sys._getframe(1))))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def origins(self):
+        return Counter(origin for _, origin in self.queries)
+
+    def describe(self, limit=30):
+        """Queries per origin, then the first ``limit`` queries in order"""
+        lines = [f"  {count} x {origin}" for origin, count in self.origins().most_common()]
+        lines.append("First queries:")
+        for index, (sql, origin) in enumerate(self.queries[:limit], 1):
+            lines.append(f"  {index}. {origin}\n     {sql[:200]}")
+        return '\n'.join(lines)
+
+
+class QueryBudgetMixin:
+    @contextmanager
+    def recordQueries(self):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            yield recorder
+
+    @contextmanager
+    def assertQueryBudget(self, budget, label=''):
+        with self.recordQueries() as recorder:
+            yield recorder
+        if len(recorder) > budget:
+            self.fail(f"{label or 'Block'} ran {len(recorder)} queries, budget is {budget}:\n{recorder.describe()}")
+
+    def assertSameQueries(self, small, large, label=''):
+        """Fail if ``large`` ran more queries than ``small``, naming the lines responsible"""
+        if len(large) == len(small):
+            return
+        grown = large.origins() - small.origins()
+        lines = '\n'.join(f"  +{count} from {origin}" for origin, count in grown.most_common())
+        self.fail(
+            f"{label or 'Block'} ran {len(small)} queries with the small fixture and {len(large)} "
+            f"with the large one; extra queries came from:\n{lines}"
+        )
@@ -2,12 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from accounts import views as account_views
+from . import views
+from .page_cache import cache_anonymous_page
 
 urlpatterns = [
+    path('admin/timings/', views.request_timings, name='request_timings'),
     path('admin/', admin.site.urls),
     path('', account_views.home, name='home'),
     path('dashboard/', account_views.dashboard, name='dashboard'),
-    path('login/', auth_views.LoginView.as_view(template_name='accounts/login.html'), name='login'),
+    path('login/', cache_anonymous_page(auth_views.LoginView.as_view(template_name='accounts/login.html')), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='home'), name='logout'),
     path('register/', account_views.register, name='register'),
     path('accounts/', include('accounts.urls')),
@@ -0,0 +1,24 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from .middleware import view_timings
+
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def request_timings(request):
+    """Per-view request timings recorded by the worker process serving this request; POST clears them.
+
+    Each worker keeps its own totals, so with several workers consecutive
+    requests may show (or clear) different ones; ``pid`` says which.
+    """
+    if request.method == 'POST':
+        view_timings.reset()
+    return JsonResponse({
+        'pid': os.getpid(),
+        'since': view_timings.since.isoformat(),
+        'views': view_timings.summary(),
+    })